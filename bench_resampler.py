@@ -0,0 +1,101 @@
+"""
+Benchmark: resample_tf (integer bucket ids + reduceat) vs pandas
+resample().agg on the same buckets, for 1M M1 bars.
+
+Checks that both give the same frame (pandas on New York wall time for
+the FX-day anchored H4 / D1 / W1), then times each TF.
+
+Run:  python bench_resampler.py [--bars 1000000] [--repeats 3]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from pa_engine.db.resampler import resample_tf
+
+# TF -> pandas rule and kwargs giving the same buckets. H4 / D1 / W1 are
+# resampled on New York wall time shifted so the 17:00 FX-day open is
+# midnight (1970-01-05 was a Monday)
+PANDAS_RULES = {
+    "M5": ("5min", {}),
+    "M15": ("15min", {}),
+    "H1": ("1h", {}),
+    "H4": ("4h", {}),
+    "D1": ("1D", {}),
+    "W1": ("168h", {"origin": pd.Timestamp("1970-01-05")}),
+}
+FX_DAY_TFS = ("H4", "D1", "W1")
+NY_SHIFT = pd.Timedelta(hours=7)
+
+
+def make_m1(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # FX hours only: drop Saturday and most of Sunday like real data
+    index = pd.date_range("2020-01-01", periods=int(n_bars * 1.5), freq="1min", name="ts_utc")
+    weekend = (index.dayofweek == 5) | ((index.dayofweek == 6) & (index.hour < 22)) | (
+        (index.dayofweek == 4) & (index.hour >= 22)
+    )
+    index = index[~weekend][:n_bars]
+    close = 150.0 + np.cumsum(rng.normal(0, 0.02, len(index)))
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close + rng.uniform(0, 0.01, len(index)),
+            "low": close - rng.uniform(0, 0.01, len(index)),
+            "close": close,
+            "norm_volume": rng.integers(1, 100, len(index)).astype(float),
+        },
+        index=index,
+    )
+
+
+def pandas_resample(df: pd.DataFrame, tf: str) -> pd.DataFrame:
+    """Previous resample_tf, with the anchoring of the new one."""
+    rule, kwargs = PANDAS_RULES[tf]
+    index = df.index
+    if tf in FX_DAY_TFS:
+        wall = index.tz_localize("UTC").tz_convert("America/New_York").tz_localize(None)
+        df = df.set_axis(wall + NY_SHIFT)
+    ohlc = df[["open", "high", "low", "close"]].resample(rule, **kwargs).agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last"}
+    )
+    ohlc["norm_volume"] = df["norm_volume"].resample(rule, **kwargs).sum()
+    ohlc = ohlc.dropna(subset=["open", "close"])
+    if tf in FX_DAY_TFS:
+        opens = (ohlc.index - NY_SHIFT).tz_localize("America/New_York").tz_convert("UTC").tz_localize(None)
+        ohlc.index = opens.rename(index.name).as_unit(index.unit)
+    return ohlc
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_m1(args.bars)
+    for tf in PANDAS_RULES:
+        pd.testing.assert_frame_equal(resample_tf(df, tf), pandas_resample(df, tf), check_freq=False)
+
+    print(f"{len(df):,} M1 bars, best of {args.repeats}")
+    print(f"{'TF':4s} {'pandas':>10s} {'reduceat':>10s} {'speedup':>8s}")
+    for tf in PANDAS_RULES:
+        t_pd = best_of(lambda: pandas_resample(df, tf), args.repeats)
+        t_np = best_of(lambda: resample_tf(df, tf), args.repeats)
+        print(f"{tf:4s} {t_pd * 1000:8.1f}ms {t_np * 1000:8.1f}ms {t_pd / t_np:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: StreamerService end-to-end against the MT5 simulator.
+
+Runs the real service (initial backfill, polls, writer thread, spool, DB
+inserts) for a simulator job against the Postgres configured in
+config/.env, with simulated time running `speedup` times faster than real
+time, and prints throughput plus the per-stage metrics summary.
+
+Run:  python bench_streamer_sim.py --job sim_streaming_job --cycles 200 --speedup 100
+"""
+
+import argparse
+import logging
+import time
+
+from src.mt5_sim import SimClock
+from src.streamer_service import StreamerService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streamer load test on the MT5 simulator")
+    parser.add_argument("--job", default="sim_streaming_job")
+    parser.add_argument("--cycles", type=int, default=200, help="poll cycles after the backfill")
+    parser.add_argument("--speedup", type=float, default=None, help="override simulation.speedup")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+    service = StreamerService(args.job)
+    if service.simulator is None:
+        raise SystemExit(f"Job '{args.job}' does not use a simulator broker (type: mt5_sim)")
+    clock = service.simulator.clock
+    if args.speedup is not None:
+        clock = SimClock(clock.start_utc, speedup=args.speedup)
+        service.simulator.clock = service.clock = clock
+
+    service.mt5_client.connect()
+    service.start_writer()
+    service.start_spool_flusher()
+
+    t0 = time.perf_counter()
+    service.initial_backfill()
+    service.flush()
+    t_backfill = time.perf_counter() - t0
+    rows_backfill = service.metrics.total("rows_inserted_total")
+
+    sim_start = service._now_utc()
+    t1 = time.perf_counter()
+    for _ in range(args.cycles):
+        service._poll_once()
+        service._sleep(service.poll_interval_seconds)
+    service.flush()
+    t_live = time.perf_counter() - t1
+    sim_elapsed = (service._now_utc() - sim_start).total_seconds()
+    rows_live = service.metrics.total("rows_inserted_total") - rows_backfill
+
+    print(f"Job {args.job}: {len(service.instruments)} instruments, speedup {clock.speedup:g}x")
+    print(f"Backfill: {rows_backfill:,.0f} rows in {t_backfill:.2f}s ({rows_backfill / t_backfill:,.0f} rows/s)")
+    print(
+        f"Live:     {args.cycles} polls, {rows_live:,.0f} rows in {t_live:.2f}s real / "
+        f"{sim_elapsed / 60:.0f} min simulated ({sim_elapsed / t_live:.0f}x real time)"
+    )
+    print("Stages:")
+    for line in service.metrics.summary_lines():
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,7 @@ class DatabaseConfig:
     historical_table: str
     storage_timezone: str
     statement_timeout_ms: int
+    unified_table: Optional[str] = None
 
 
 @dataclass
@@ -76,6 +77,7 @@ def build_app_config() -> AppConfig:
         historical_table=db_raw["historical_table"],
         storage_timezone=db_raw.get("storage_timezone", "UTC"),
         statement_timeout_ms=db_raw.get("statement_timeout_ms", 30000),
+        unified_table=db_raw.get("unified_table"),
     )
 
     sys_cfg = SystemConfig(
@@ -1,21 +1,42 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Sequence
 import pandas as pd
 
 from pa_engine.db.connection import get_sqlalchemy_engine
 from pa_engine.config.loader import build_app_config
+from pa_engine.pa.config import FX_DAY_OPEN
 
 _cfg = build_app_config()
 
 
+# Loader column -> SQL expression. Prices are sent as float8 whatever the
+# storage type, so pandas gets float64 columns instead of Decimal objects.
+M1_COLUMNS = {
+    "instrument": "instrument",
+    "open": "bid_open::float8 AS open",
+    "high": "bid_high::float8 AS high",
+    "low": "bid_low::float8 AS low",
+    "close": "bid_close::float8 AS close",
+    "norm_volume": "norm_volume::float8 AS norm_volume",
+    "data_source": "data_source",
+}
+ALL_M1_COLUMNS = tuple(M1_COLUMNS)
+
+# Common projections
+HLC_COLUMNS = ("high", "low", "close")            # swings, ATR, Donchian
+OHLC_COLUMNS = ("open", "high", "low", "close")   # order blocks, FVGs
+OHLCV_COLUMNS = (*OHLC_COLUMNS, "norm_volume")    # resampling, PA context
+
+
 def load_m1_candles(
     instrument: str,
     start_ts_utc: datetime,
     end_ts_utc: datetime,
+    columns: Optional[Sequence[str]] = None,
 ) -> pd.DataFrame:
     """
     Returns M1 candles [start_ts_utc, end_ts_utc) for a given instrument,
-    merging historical + live tables, with canonical columns:
+    one row per minute, with canonical columns:
       index: ts_utc (datetime, UTC)
       columns:
         - instrument
@@ -23,22 +44,141 @@ def load_m1_candles(
         - norm_volume
         - data_source ('historical' or 'live')
 
+    `columns` limits the result to a subset of those (e.g. HLC_COLUMNS for
+    swing detection on M1, OHLCV_COLUMNS for frames that get resampled);
+    only those are selected, decoded and transferred. An empty projection
+    raises ValueError.
+
+    Minutes present in both the historical and live tables come back once,
+    historical first. With database.unified_table set (sql/004_unified_m1.sql)
+    this is a single index range scan of the de-duplicated table; otherwise
+    both tables are merged and de-duplicated per query.
+
     Session tagging is NOT done here anymore; it is applied later in
     pa_engine.pa.features.add_core_features via infer_session()/session_for_hour.
     """
+    sql = _m1_sql(_select_list(columns))
+
+    engine = get_sqlalchemy_engine()
+    df = pd.read_sql_query(
+        sql,
+        engine,
+        params={"instrument": instrument, "start": start_ts_utc, "end": end_ts_utc},
+        parse_dates=["ts_utc"],
+    )
+
+    if df.empty:
+        return df
+
+    # Set index to ts_utc (already sorted and unique)
+    df = df.set_index("ts_utc")
+    return df
+
+
+def load_fx_daily_bars(
+    instrument: str,
+    start_ts_utc: datetime,
+    end_ts_utc: datetime,
+) -> pd.DataFrame:
+    """
+    FX-day aggregates (17:00 -> 16:59 New York, see _fx_day_start_sql) of
+    the M1 candles in [start_ts_utc, end_ts_utc), computed in the database,
+    so weeks of history cost one row per day on the wire.
+
+    Same layout as pa_engine.pa.levels.daily_levels_table (without the
+    date label): index day_start_utc; open, high, low, close, bars, volume,
+    first_ts, last_ts. Used to seed pa_engine.pa.levels.LevelsEngine.
+    """
+    m1_sql = _m1_sql(_select_list(OHLCV_COLUMNS))
+
     sql = f"""
+    WITH m1 AS ({ m1_sql.strip().rstrip(";") })
+    SELECT
+        { _fx_day_start_sql("ts_utc") } AS day_start_utc,
+        first(open, ts_utc) AS open,
+        max(high) AS high,
+        min(low) AS low,
+        last(close, ts_utc) AS close,
+        count(*) AS bars,
+        sum(norm_volume) AS volume,
+        min(ts_utc) AS first_ts,
+        max(ts_utc) AS last_ts
+    FROM m1
+    GROUP BY 1
+    ORDER BY 1;
+    """
+
+    engine = get_sqlalchemy_engine()
+    df = pd.read_sql_query(
+        sql,
+        engine,
+        params={"instrument": instrument, "start": start_ts_utc, "end": end_ts_utc},
+        parse_dates=["day_start_utc", "first_ts", "last_ts"],
+    )
+    return df.set_index("day_start_utc")
+
+
+def _fx_day_start_sql(ts_col: str) -> str:
+    """
+    SQL for the naive-UTC open of the FX day containing naive-UTC ts_col:
+    shifted so the FX_DAY_OPEN wall time becomes local midnight, truncated
+    to the day and shifted back. Same boundaries as
+    pa_engine.pa.levels.fx_day_ids, DST included.
+    """
+    hh, mm = (int(part) for part in FX_DAY_OPEN.open_local.split(":"))
+    shift = f"INTERVAL '{1440 - (hh * 60 + mm)} minutes'"
+    local = f"(({ts_col} AT TIME ZONE 'UTC') AT TIME ZONE '{FX_DAY_OPEN.tz}')"
+    return (
+        f"((date_trunc('day', {local} + {shift}) - {shift})"
+        f" AT TIME ZONE '{FX_DAY_OPEN.tz}') AT TIME ZONE 'UTC'"
+    )
+
+
+def _select_list(columns: Optional[Sequence[str]]) -> str:
+    """
+    SELECT list of a loader projection (None = every M1 column). Raises
+    ValueError for an empty projection or unknown column names.
+    """
+    columns = ALL_M1_COLUMNS if columns is None else tuple(dict.fromkeys(columns))
+    if not columns:
+        raise ValueError("Empty M1 column projection; pass columns=None to load all columns")
+    unknown = [c for c in columns if c not in M1_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown M1 columns: {unknown}")
+    return ",\n        ".join(M1_COLUMNS[c] for c in columns)
+
+
+def _m1_sql(select_list: str) -> str:
+    if _cfg.database.unified_table:
+        return _unified_sql(_cfg.database.unified_table, select_list)
+    return _merged_sql(_cfg.database.historical_table, _cfg.database.live_table, select_list)
+
+
+def _unified_sql(table: str, select_list: str) -> str:
+    return f"""
+    SELECT
+        "timestamp" AT TIME ZONE 'UTC' AS ts_utc,
+        { select_list }
+    FROM { table }
+    WHERE instrument = %(instrument)s
+      AND "timestamp" >= %(start)s
+      AND "timestamp" <  %(end)s
+    ORDER BY "timestamp";
+    """
+
+
+def _merged_sql(historical_table: str, live_table: str, select_list: str) -> str:
+    return f"""
     WITH combined AS (
         -- Historical candles (no tick volume)
         SELECT
             instrument,
-            "timestamp" AT TIME ZONE 'UTC' AS ts_utc,
-            bid_open  AS open,
-            bid_high  AS high,
-            bid_low   AS low,
-            bid_close AS close,
+            "timestamp",
+            bid_open, bid_high, bid_low, bid_close,
             volume::numeric AS norm_volume,
-            'historical'::text AS data_source
-        FROM { _cfg.database.historical_table }
+            'historical'::text AS data_source,
+            1 AS source_rank
+        FROM { historical_table }
         WHERE instrument = %(instrument)s
           AND "timestamp" >= %(start)s
           AND "timestamp" <  %(end)s
@@ -48,39 +188,19 @@ def load_m1_candles(
         -- Live candles (have tick_count)
         SELECT
             instrument,
-            "timestamp" AT TIME ZONE 'UTC' AS ts_utc,
-            bid_open  AS open,
-            bid_high  AS high,
-            bid_low   AS low,
-            bid_close AS close,
+            "timestamp",
+            bid_open, bid_high, bid_low, bid_close,
             COALESCE(tick_count::numeric, volume::numeric) AS norm_volume,
-            'live'::text AS data_source
-        FROM { _cfg.database.live_table }
+            'live'::text AS data_source,
+            2 AS source_rank
+        FROM { live_table }
         WHERE instrument = %(instrument)s
           AND "timestamp" >= %(start)s
           AND "timestamp" <  %(end)s
     )
-    SELECT
-        instrument,
-        ts_utc,
-        open, high, low, close,
-        norm_volume,
-        data_source
+    SELECT DISTINCT ON ("timestamp")
+        "timestamp" AT TIME ZONE 'UTC' AS ts_utc,
+        { select_list }
     FROM combined
-    ORDER BY ts_utc;
+    ORDER BY "timestamp", source_rank;
     """
-
-    engine = get_sqlalchemy_engine()
-    df = pd.read_sql_query(
-        sql,
-        engine,
-        params={"instrument": instrument, "start": start_ts_utc, "end": end_ts_utc},
-        parse_dates=["ts_utc"],
-    )
-
-    if df.empty:
-        return df
-
-    # Set index to ts_utc and sort
-    df = df.set_index("ts_utc").sort_index()
-    return df
@@ -1,46 +1,224 @@
 # pa_engine/db/resampler.py
 
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
-TF_RULES = {
-    "M5": "5min",
-    "M15": "15min",
-    "H1": "1h",
-}
+from pa_engine.pa.levels import fx_day_ids, fx_day_start_ns, group_ohlc
+from pa_engine.pa.sessions import utc_ns
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+NS_PER_DAY = 1440 * NS_PER_MINUTE
+NS_PER_WEEK = 7 * NS_PER_DAY
+
+_TF_RE = re.compile(r"([MHDW])(\d+)")
+_TF_UNIT_NS = {"M": NS_PER_MINUTE, "H": 60 * NS_PER_MINUTE, "D": NS_PER_DAY, "W": NS_PER_WEEK}
+
+
+@dataclass(frozen=True)
+class TFSpec:
+    """
+    Bucketing of a timeframe: bars of width_ns, restarted at every FX day
+    (period_ns = NS_PER_DAY) or FX week (W1, period_ns = NS_PER_WEEK). FX
+    days open at 17:00 New York (pa_engine.pa.levels.fx_day_ids), so they
+    are not a fixed UTC grid.
+    """
+    name: str
+    width_ns: int
+    period_ns: int
+
+
+def parse_tf(tf: str) -> TFSpec:
+    """
+    'M<n>' / 'H<n>' for any n up to a day, plus 'D1' and 'W1'.
+
+    Intraday bars are anchored to the FX day (17:00 New York): H4 bars
+    open at 22:00, 02:00, 06:00, ... UTC in winter and an hour earlier in
+    summer; a width that does not divide the FX day gives a shorter last
+    bar before the next one. D1 is the FX day, W1 the FX week (Sunday
+    17:00 New York). Widths dividing an hour (M5 / M15 / H1 ...) are the
+    same as pandas' resample().
+    """
+    m = _TF_RE.fullmatch(tf)
+    if m is None or int(m.group(2)) < 1:
+        raise ValueError(f"Unsupported TF: {tf}. Use M<n>, H<n>, D1 or W1.")
+    unit, n = m.group(1), int(m.group(2))
+    width = n * _TF_UNIT_NS[unit]
+
+    if unit == "W" and n == 1:
+        return TFSpec(tf, width, NS_PER_WEEK)
+    if width > NS_PER_DAY or unit == "W":
+        raise ValueError(f"Unsupported TF: {tf}. Bars longer than a day: only D1 and W1.")
+    return TFSpec(tf, width, NS_PER_DAY)
+
+
+def bucket_start_ns(ts_ns, spec: TFSpec):
+    """
+    Bar open (UTC epoch ns) of each timestamp; works on int64 arrays and on
+    plain ints.
+    """
+    if NS_PER_HOUR % spec.width_ns == 0:
+        # FX days open on a whole UTC hour: one UTC grid, no calendar lookup
+        return ts_ns - ts_ns % spec.width_ns
+
+    day_ids = fx_day_ids(ts_ns)
+    if spec.period_ns == NS_PER_WEEK:
+        # FX day id = close date in days since 1970-01-01 (a Thursday):
+        # back to the FX day closing on Monday
+        return fx_day_start_ns(day_ids - (day_ids + 3) % 7)
+    period_start = fx_day_start_ns(day_ids)
+    if spec.width_ns >= NS_PER_DAY:
+        # D1: the FX day itself (23 / 25 hours around DST changes)
+        return period_start
+    return period_start + (ts_ns - period_start) // spec.width_ns * spec.width_ns
+
+
+def _htf_frame(
+    buckets: np.ndarray,
+    ohlcv: Tuple[np.ndarray, ...],
+    spec: TFSpec,
+    name: Optional[str],
+    unit: str,
+    tz,
+) -> pd.DataFrame:
+    index = pd.DatetimeIndex(pd.to_datetime(buckets, unit="ns"), name=name)
+    if tz is not None:
+        index = index.tz_localize("UTC").tz_convert(tz)
+    if spec.period_ns % spec.width_ns == 0 and (np.diff(buckets) == spec.width_ns).all():
+        # Regular grid without empty bars: freq set, as pandas resample leaves it
+        index.freq = pd.tseries.frequencies.to_offset(pd.Timedelta(spec.width_ns, unit="ns"))
+    open_, high, low, close, volume = ohlcv
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "norm_volume": volume},
+        index=index.as_unit(unit),
+    )
+
 
 def resample_tf(df_m1: pd.DataFrame, tf: str) -> pd.DataFrame:
     """
-    Resample 1-minute dataframe into a higher timeframe:
-    tf = 'M5', 'M15', or 'H1'
+    Resample 1-minute dataframe into a higher timeframe (see parse_tf:
+    any 'M<n>' / 'H<n>', 'D1', 'W1').
+
+    Every bar gets an integer bucket id (its bar open in epoch ns); the
+    groups are contiguous in a sorted frame, so high / low / volume are one
+    reduceat each and open / close are taken at the group edges. Bars with
+    no M1 data do not appear.
 
     Returned dataframe has canonical schema:
-      index = ts_utc
+      index = ts_utc (bar open)
       open, high, low, close, norm_volume
     """
     if df_m1.empty:
         return df_m1.copy()
 
-    if tf not in TF_RULES:
-        raise ValueError(f"Unsupported TF: {tf}. Choose from {list(TF_RULES.keys())}.")
+    spec = parse_tf(tf)
+    df = df_m1 if df_m1.index.is_monotonic_increasing else df_m1.sort_index()
+
+    agg = group_ohlc(df, bucket_start_ns(utc_ns(df.index), spec))
+    return _htf_frame(
+        agg["id"],
+        (agg["open"], agg["high"], agg["low"], agg["close"], agg["volume"]),
+        spec,
+        df.index.name,
+        df.index.unit,
+        df.index.tz,
+    )
+
+
+class IncrementalResampler:
+    """
+    Streaming counterpart of resample_tf for one timeframe: closed HTF bars
+    are kept, the forming bar is updated in O(1) per M1 bar.
+
+    frame() gives the same dataframe as resample_tf over the M1 bars fed
+    so far (bars not newer than the last one seen are ignored);
+    include_partial=False leaves out the still forming last bar.
+    max_bars bounds the closed bars kept (oldest dropped first).
+    """
+
+    def __init__(self, tf: str, max_bars: Optional[int] = None):
+        self.tf = tf
+        self.spec = parse_tf(tf)
+        self.closed: Deque[Tuple[int, float, float, float, float, float]] = deque(maxlen=max_bars)
+        self.partial: Optional[List] = None     # [bucket_ns, open, high, low, close, volume]
+        self.last_ts_ns: Optional[int] = None
+        # Index unit / name / tz of the frames fed, reused by frame()
+        self.unit = "ns"
+        self.index_name: Optional[str] = "ts_utc"
+        self.tz = None
+
+    def update(self, ts_ns: int, open_: float, high: float, low: float, close: float, volume: float) -> bool:
+        """
+        Add one M1 bar (UTC epoch ns). Returns True if it closed the
+        previous HTF bar.
+        """
+        if self.last_ts_ns is not None and ts_ns <= self.last_ts_ns:
+            return False
+        self.last_ts_ns = ts_ns
+        bucket = int(bucket_start_ns(ts_ns, self.spec))
+
+        p = self.partial
+        if p is not None and p[0] == bucket:
+            if high > p[2]:
+                p[2] = high
+            if low < p[3]:
+                p[3] = low
+            p[4] = close
+            p[5] += volume
+            return False
 
-    rule = TF_RULES[tf]
+        closed = p is not None
+        if closed:
+            self.closed.append(tuple(p))
+        self.partial = [bucket, open_, high, low, close, volume]
+        return closed
 
-    # Resample OHLC
-    ohlc = df_m1[['open', 'high', 'low', 'close']].resample(rule).agg({
-        'open': 'first',
-        'high': 'max',
-        'low':  'min',
-        'close': 'last'
-    })
+    def update_frame(self, df_m1: pd.DataFrame) -> int:
+        """
+        Feed the M1 bars of df_m1 (sorted, canonical schema) newer than the
+        last one seen. Returns the number of HTF bars closed.
+        """
+        if df_m1.empty:
+            return 0
+        self.unit = df_m1.index.unit
+        self.index_name = df_m1.index.name
+        self.tz = df_m1.index.tz
+        ts = utc_ns(df_m1.index)
+        if self.last_ts_ns is not None:
+            start = int(np.searchsorted(ts, self.last_ts_ns, side="right"))
+            df_m1, ts = df_m1.iloc[start:], ts[start:]
 
-    # Resample volume (sum)
-    vol = df_m1['norm_volume'].resample(rule).sum()
+        n_closed = 0
+        for row in zip(
+            ts.tolist(),
+            df_m1["open"].tolist(),
+            df_m1["high"].tolist(),
+            df_m1["low"].tolist(),
+            df_m1["close"].tolist(),
+            df_m1["norm_volume"].tolist(),
+        ):
+            n_closed += self.update(*row)
+        return n_closed
 
-    # Combine
-    out = ohlc.copy()
-    out['norm_volume'] = vol
+    def drop_before(self, ts_ns: int) -> None:
+        """
+        Drop the closed bars opening before ts_ns (UTC epoch ns).
+        """
+        while self.closed and self.closed[0][0] < ts_ns:
+            self.closed.popleft()
 
-    # Drop periods where open/close are NaN (no M1 data)
-    out = out.dropna(subset=['open', 'close'])
+    def frame(self, include_partial: bool = True) -> pd.DataFrame:
+        rows = list(self.closed)
+        if include_partial and self.partial is not None:
+            rows.append(tuple(self.partial))
 
-    return out
+        buckets = np.array([r[0] for r in rows], dtype=np.int64)
+        values = np.array([r[1:] for r in rows], dtype=np.float64).reshape(-1, 5)
+        return _htf_frame(
+            buckets, tuple(values.T), self.spec, self.index_name, self.unit, self.tz
+        )
@@ -1,10 +1,11 @@
 # pa_engine/pa/config.py
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
 
-# FX Daily open time in UTC
+# FX Daily open time in UTC, winter (EST) value of FX_DAY_OPEN below; the
+# hour-only FX_SESSIONS table uses it, FX days follow FX_DAY_OPEN
 FX_DAILY_OPEN_UTC = 22  # 22:00 UTC = Sydney open → start of new Forex day
 
 
@@ -28,7 +29,8 @@ def _hour_in_range(hr: int, open_hr: int, close_hr: int) -> bool:
         return hr >= open_hr or hr < close_hr
 
 
-# Central session configuration (UTC, no DST)
+# Central session configuration (UTC, no DST). Hour-only lookups
+# (session_for_hour); frames are tagged with FX_SESSION_CALENDAR below.
 FX_SESSIONS: List[SessionDef] = [
     
     SessionDef(name="ASIA", open_utc=22, close_utc=8, priority=70),
@@ -41,15 +43,79 @@ FX_SESSIONS: List[SessionDef] = [
 ]
 
 
+@dataclass
+class ZonedSessionDef:
+    name: str
+    tz: str           # IANA zone the open is anchored to
+    open_local: str   # "HH:MM" wall time in tz; runs until the next session opens
+
+
+# FX day boundary (pa_engine.pa.sessions.FxDayCalendar): 17:00 New York,
+# i.e. 22:00 UTC in winter and 21:00 UTC in summer. Daily levels, D1 / W1
+# bars and the FX-day anchor of intraday bars all roll here.
+FX_DAY_OPEN = ZonedSessionDef(name="FX_DAY", tz="America/New_York", open_local="17:00")
+
+
+# DST-aware calendar (pa_engine.pa.sessions). Same UTC hours as FX_SESSIONS
+# while London and New York are on GMT/EST; an hour earlier in summer.
+FX_SESSION_CALENDAR: List[ZonedSessionDef] = [
+    # Opens with the FX day
+    ZonedSessionDef(name="ASIA", tz=FX_DAY_OPEN.tz, open_local=FX_DAY_OPEN.open_local),
+    ZonedSessionDef(name="LONDON", tz="Europe/London", open_local="08:00"),
+    ZonedSessionDef(name="NY_OVERLAP", tz="America/New_York", open_local="08:00"),
+    ZonedSessionDef(name="NY", tz="America/New_York", open_local="11:00"),
+]
+
+
+# Intraday reference opens (pa_engine.pa.levels): the open of the first
+# bar at or after this wall time, most recent occurrence
+REFERENCE_OPENS: List[ZonedSessionDef] = [
+    ZonedSessionDef(name="midnight_open", tz="America/New_York", open_local="00:00"),
+    ZonedSessionDef(name="ny_open", tz="America/New_York", open_local="08:30"),
+]
+
+# FX days of daily aggregates kept per instrument (covers the previous
+# calendar month)
+REFERENCE_DAYS_KEPT = 70
+
+# LevelsEngine.refresh reloads the last REFERENCE_RESEED_DAYS FX days from
+# daily aggregates every REFERENCE_RESEED_MINUTES, picking up minutes that
+# gap repair / backfill wrote after they were first folded in
+REFERENCE_RESEED_MINUTES = 60
+REFERENCE_RESEED_DAYS = 3
+
+
+# Category order of session columns; "OTHER" = hour matched by no session
+SESSION_LABELS: Tuple[str, ...] = tuple(s.name for s in FX_SESSIONS) + ("OTHER",)
+
+
+def build_session_lookup(sessions: Optional[Sequence[SessionDef]] = None) -> Tuple[str, ...]:
+    """
+    24-entry UTC hour -> session label table, with overlaps resolved by
+    'priority' (highest first) once instead of per lookup.
+    """
+    ordered = sorted(sessions or FX_SESSIONS, key=lambda s: s.priority, reverse=True)
+    table = []
+    for hr in range(24):
+        label = "OTHER"
+        for sess in ordered:
+            if _hour_in_range(hr, sess.open_utc, sess.close_utc):
+                label = sess.name
+                break
+        table.append(label)
+    return tuple(table)
+
+
+SESSION_BY_HOUR: Tuple[str, ...] = build_session_lookup()
+
+
 def session_for_hour(hr: int) -> str:
     """
     Return FX session label for a given UTC hour, using FX_SESSIONS config.
 
     Priority:
-      - We sort by 'priority' descending and return the first match.
+      - Overlapping sessions resolve to the highest 'priority' (see
+        build_session_lookup).
       - If nothing matches (shouldn't really happen), return 'OTHER'.
     """
-    for sess in sorted(FX_SESSIONS, key=lambda s: s.priority, reverse=True):
-        if _hour_in_range(hr, sess.open_utc, sess.close_utc):
-            return sess.name
-    return "OTHER"
+    return SESSION_BY_HOUR[hr]
@@ -5,23 +5,27 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Sequence
 
 import pandas as pd
 
 # DB
-from pa_engine.db.candles import load_m1_candles
+from pa_engine.db.candles import OHLCV_COLUMNS, load_fx_daily_bars, load_m1_candles
 from pa_engine.db.resampler import resample_tf
 
 # Feature engines
 from pa_engine.pa.features import (
     FeatureConfig,
     add_core_features,
+    add_core_features_batch,
     compute_daily_levels,
     compute_session_levels,
 )
+from pa_engine.pa.feature_registry import core_config_for, ensure_features
+from pa_engine.pa.levels import LevelsEngine, get_levels_engine
+from pa_engine.pa.live_features import get_live_feature_cache
 
 # Structure / Trend
 from pa_engine.pa.structure import (
@@ -29,10 +33,11 @@ from pa_engine.pa.structure import (
     label_swings,
     LabeledSwingPoint,
 )
-from pa_engine.pa.trend import TrendState, infer_trend_state
+from pa_engine.pa.trend import TREND_FEATURES, TrendState, infer_trend_state
 
 # Order Blocks
 from pa_engine.pa.order_blocks import (
+    OB_FEATURES,
     detect_order_blocks,
     score_order_blocks,
     OrderBlock,
@@ -40,12 +45,14 @@ from pa_engine.pa.order_blocks import (
 
 # FVG
 from pa_engine.pa.fvg import (
+    FVG_FEATURES,
     FairValueGap,
     detect_fvgs,
 )
 
 # Liquidity
 from pa_engine.pa.liquidity import (
+    LIQUIDITY_FEATURES,
     LiquidityLevel,
     LiquiditySweep,
     detect_equal_highs_lows,
@@ -53,6 +60,14 @@ from pa_engine.pa.liquidity import (
     detect_sweeps_of_levels,
 )
 
+# Feature columns the per-TF PA steps read ('session' labels the current
+# session in the strategy context). The builders return the full
+# add_core_features set by default; pa_features_only=True computes only
+# these (lazily via the feature registry)
+PA_FEATURES = tuple(
+    dict.fromkeys(("session",) + TREND_FEATURES + OB_FEATURES + FVG_FEATURES + LIQUIDITY_FEATURES)
+)
+
 
 # =============================================================
 # Data structures
@@ -94,6 +109,9 @@ class PAContext:
     daily_levels: dict
     session_levels: dict
 
+    # Weekly / monthly / intraday opens (LevelsEngine.reference_levels)
+    reference_levels: dict = field(default_factory=dict)
+
 
 # =============================================================
 # Internal builder for a single TF
@@ -102,7 +120,7 @@ class PAContext:
 def _build_single_tf_context(
     tf: str,
     df_tf: pd.DataFrame,
-    feature_cfg: FeatureConfig,
+    feature_cfg: Optional[FeatureConfig],
     is_m1: bool = False,
 ) -> TimeframePAContext:
     """
@@ -120,6 +138,9 @@ def _build_single_tf_context(
             liquidity_sweeps=[],
         )
 
+    # 0. features the steps below need (no-op when already present)
+    df_tf = ensure_features(df_tf, PA_FEATURES)
+
     # 1. swings
     swings = label_swings(detect_swings(df_tf, left=2, right=2))
 
@@ -169,53 +190,68 @@ def _build_single_tf_context(
 # Build multi-timeframe context from M1
 # =============================================================
 
-def build_pa_context_from_m1(
-    instrument: str,
-    df_m1: pd.DataFrame,
-    tfs: Sequence[str] = ("M1", "M5", "M15", "H1"),
-    feature_cfg: Optional[FeatureConfig] = None,
-) -> PAContext:
+def _core_cfg(feature_cfg: Optional[FeatureConfig], pa_features_only: bool) -> FeatureConfig:
+    """
+    FeatureConfig the builders compute: the given one, else the default
+    full set, or the smallest one covering PA_FEATURES when opted in.
+    """
+    if feature_cfg is not None:
+        return feature_cfg
+    return core_config_for(PA_FEATURES) if pa_features_only else FeatureConfig()
 
-    if feature_cfg is None:
-        feature_cfg = FeatureConfig(
-            atr_period=14,
-            ema_periods=(20, 50),
-            donchian_periods=(20, 50),
-        )
 
-    if df_m1.empty:
-        now_utc = datetime.now(timezone.utc)
-        return PAContext(
-            instrument=instrument,
-            asof_utc=now_utc,
-            base_tf="M1",
-            tfs=list(tfs),
-            tf_contexts={},
-            daily_levels={},
-            session_levels={},
-        )
+def _add_features(
+    df: pd.DataFrame,
+    feature_cfg: Optional[FeatureConfig],
+    pa_features_only: bool = False,
+) -> pd.DataFrame:
+    """
+    add_core_features with _core_cfg; just PA_FEATURES, computed lazily
+    via the feature registry, with pa_features_only and no FeatureConfig.
+    """
+    if feature_cfg is None and pa_features_only:
+        return ensure_features(df, PA_FEATURES)
+    return add_core_features(df, _core_cfg(feature_cfg, pa_features_only))
 
-    df_m1 = df_m1.sort_index()
 
+def _empty_pa_context(instrument: str, tfs: Sequence[str]) -> PAContext:
+    return PAContext(
+        instrument=instrument,
+        asof_utc=datetime.now(timezone.utc),
+        base_tf="M1",
+        tfs=list(tfs),
+        tf_contexts={},
+        daily_levels={},
+        session_levels={},
+    )
+
+
+def _assemble_pa_context(
+    instrument: str,
+    df_m1: pd.DataFrame,
+    tfs: Sequence[str],
+    features_by_tf: Dict[str, pd.DataFrame],
+    feature_cfg: Optional[FeatureConfig],
+    levels_engine: Optional[LevelsEngine],
+) -> PAContext:
+    """
+    PAContext from a sorted M1 frame and the featured frame of each TF.
+    Without a levels_engine, weekly / monthly levels only see df_m1.
+    """
     # === Daily + Session Levels ===
     daily_levels = compute_daily_levels(df_m1)
     session_levels = compute_session_levels(df_m1)
 
-    # === Core M1 features ===
-    df_m1_feat = add_core_features(df_m1, feature_cfg)
+    # === Reference levels (cached FX-day aggregates + this window) ===
+    engine = levels_engine if levels_engine is not None else LevelsEngine()
+    engine.update(instrument, df_m1)
+    reference_levels = engine.reference_levels(instrument, df_m1)
 
     tf_contexts: Dict[str, TimeframePAContext] = {}
-
     for tf in tfs:
-        if tf == "M1":
-            df_tf = df_m1_feat
-            tf_ctx = _build_single_tf_context(tf, df_tf, feature_cfg, is_m1=True)
-        else:
-            df_tf_raw = resample_tf(df_m1_feat, tf)
-            df_tf = add_core_features(df_tf_raw, feature_cfg)
-            tf_ctx = _build_single_tf_context(tf, df_tf, feature_cfg, is_m1=False)
-
-        tf_contexts[tf] = tf_ctx
+        tf_contexts[tf] = _build_single_tf_context(
+            tf, features_by_tf[tf], feature_cfg, is_m1=(tf == "M1")
+        )
 
     asof_utc = df_m1.index.max().to_pydatetime()
 
@@ -227,9 +263,77 @@ def build_pa_context_from_m1(
         tf_contexts=tf_contexts,
         daily_levels=daily_levels,
         session_levels=session_levels,
+        reference_levels=reference_levels,
     )
 
 
+def build_pa_context_from_m1(
+    instrument: str,
+    df_m1: pd.DataFrame,
+    tfs: Sequence[str] = ("M1", "M5", "M15", "H1"),
+    feature_cfg: Optional[FeatureConfig] = None,
+    levels_engine: Optional[LevelsEngine] = None,
+    pa_features_only: bool = False,
+) -> PAContext:
+    """
+    PAContext of a M1 frame. Each TF frame carries the add_core_features
+    columns of feature_cfg (default FeatureConfig()); pa_features_only=True
+    without a feature_cfg computes only PA_FEATURES.
+    """
+    if df_m1.empty:
+        return _empty_pa_context(instrument, tfs)
+
+    df_m1 = df_m1.sort_index()
+
+    # === Core M1 features ===
+    df_m1_feat = _add_features(df_m1, feature_cfg, pa_features_only)
+
+    features_by_tf: Dict[str, pd.DataFrame] = {}
+    for tf in tfs:
+        if tf == "M1":
+            features_by_tf[tf] = df_m1_feat
+        else:
+            features_by_tf[tf] = _add_features(resample_tf(df_m1_feat, tf), feature_cfg, pa_features_only)
+
+    return _assemble_pa_context(instrument, df_m1, tfs, features_by_tf, feature_cfg, levels_engine)
+
+
+def build_pa_contexts_from_m1(
+    frames: Dict[str, pd.DataFrame],
+    tfs: Sequence[str] = ("M1", "M5", "M15", "H1"),
+    feature_cfg: Optional[FeatureConfig] = None,
+    levels_engine: Optional[LevelsEngine] = None,
+    pa_features_only: bool = False,
+) -> Dict[str, PAContext]:
+    """
+    build_pa_context_from_m1 for a whole universe: the features of every
+    TF are computed for all instruments in one add_core_features_batch
+    call instead of one call per instrument.
+    """
+    batch_cfg = _core_cfg(feature_cfg, pa_features_only)
+
+    m1 = {inst: df.sort_index() for inst, df in frames.items() if not df.empty}
+    features: Dict[str, Dict[str, pd.DataFrame]] = {}
+    if m1:
+        features["M1"] = add_core_features_batch(m1, batch_cfg)
+        for tf in tfs:
+            if tf != "M1":
+                features[tf] = add_core_features_batch(
+                    {inst: resample_tf(df, tf) for inst, df in m1.items()}, batch_cfg
+                )
+
+    contexts: Dict[str, PAContext] = {}
+    for inst in frames:
+        if inst not in m1:
+            contexts[inst] = _empty_pa_context(inst, tfs)
+            continue
+        features_by_tf = {tf: features[tf][inst] for tf in tfs}
+        contexts[inst] = _assemble_pa_context(
+            inst, m1[inst], tfs, features_by_tf, feature_cfg, levels_engine
+        )
+    return contexts
+
+
 # =============================================================
 # Load candles from DB and build PAContext
 # =============================================================
@@ -239,20 +343,35 @@ def build_pa_context_for_instrument(
     hours_back: int = 24,
     tfs: Sequence[str] = ("M1", "M5", "M15", "H1"),
     feature_cfg: Optional[FeatureConfig] = None,
+    pa_features_only: bool = False,
 ) -> PAContext:
 
     end = datetime.now(timezone.utc)
     start = end - pd.Timedelta(hours=hours_back)
 
-    df_m1 = load_m1_candles(instrument, start, end)
+    # Only the columns the PA steps read (no per-row instrument /
+    # data_source text)
+    df_m1 = load_m1_candles(instrument, start, end, columns=OHLCV_COLUMNS)
 
-    return build_pa_context_from_m1(
-        instrument=instrument,
-        df_m1=df_m1,
-        tfs=tfs,
-        feature_cfg=feature_cfg,
+    # Weekly / monthly levels: daily aggregates are loaded on first use,
+    # after a pause longer than the window and periodically for recent days;
+    # otherwise cycles only fold in the new M1 bars
+    levels_engine = get_levels_engine()
+    levels_engine.refresh(
+        instrument, start, end, lambda s, e: load_fx_daily_bars(instrument, s, e)
     )
 
+    if df_m1.empty:
+        return _empty_pa_context(instrument, tfs)
+    df_m1 = df_m1.sort_index()
+
+    # Indicator state is kept per instrument between cycles: only the bars
+    # that are new since the previous cycle are fed to it
+    cfg = _core_cfg(feature_cfg, pa_features_only)
+    features_by_tf = get_live_feature_cache().frames(instrument, df_m1, tfs, cfg)
+
+    return _assemble_pa_context(instrument, df_m1, tfs, features_by_tf, feature_cfg, levels_engine)
+
 
 # =============================================================
 # Compact dict for LLM commentary + debug
@@ -270,6 +389,7 @@ def pa_context_to_dict(ctx: PAContext) -> dict:
         "tfs": ctx.tfs,
         "daily_levels": ctx.daily_levels,
         "session_levels": ctx.session_levels,
+        "reference_levels": ctx.reference_levels,
         "tfs_detail": {},
     }
 
@@ -0,0 +1,161 @@
+# pa_engine/pa/feature_registry.py
+#
+# Feature columns by name. PA modules declare the columns they read
+# (TREND_FEATURES, OB_FEATURES, ...); ensure_features() computes only the
+# ones a frame does not already have, so unused ATR / EMA / Donchian
+# columns are never computed or allocated. Computed columns are memoized
+# per frame, so several PA modules asking for the same column of the same
+# frame compute it once.
+
+from __future__ import annotations
+
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pa_engine.pa.features import FeatureConfig, session_labels
+from pa_engine.pa.kernels import ema, rolling_extreme, rolling_mean, true_range
+
+# fn(df, param) -> column values (param is None for plain names like "session")
+FeatureFn = Callable[[pd.DataFrame, Optional[int]], object]
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    prefix: str
+    fn: FeatureFn
+    parametric: bool = True      # name is f"{prefix}_{n}"
+
+
+_REGISTRY: Dict[str, FeatureSpec] = {}
+
+# id(frame) -> (weak ref to the frame, its index when memoized, column
+# name -> values). Entries go away with their frame.
+_MEMO: Dict[int, Tuple[weakref.ref, pd.Index, Dict[str, object]]] = {}
+
+
+def register_feature(prefix: str, parametric: bool = True):
+    """
+    Decorator: register fn as the producer of columns named
+    f"{prefix}_{n}" (or exactly `prefix` when parametric=False).
+    """
+    def deco(fn: FeatureFn) -> FeatureFn:
+        _REGISTRY[prefix] = FeatureSpec(prefix=prefix, fn=fn, parametric=parametric)
+        return fn
+    return deco
+
+
+def resolve_feature(name: str) -> Tuple[FeatureSpec, Optional[int]]:
+    """
+    Map a column name to (spec, param), e.g. "donchian_high_20" ->
+    (donchian_high spec, 20). Raises KeyError for unknown names.
+    """
+    spec = _REGISTRY.get(name)
+    if spec is not None and not spec.parametric:
+        return spec, None
+    prefix, _, param = name.rpartition("_")
+    spec = _REGISTRY.get(prefix)
+    if spec is None or not spec.parametric or not param.isdigit():
+        raise KeyError(f"No registered feature for column '{name}'")
+    return spec, int(param)
+
+
+def _frame_memo(df: pd.DataFrame) -> Dict[str, object]:
+    """
+    Memoized feature columns of this frame object. Dropped when the frame
+    is collected or gets a new index; frames are assumed not to have their
+    price columns modified in place once features were computed from them.
+    """
+    key = id(df)
+    entry = _MEMO.get(key)
+    if entry is not None and entry[0]() is df and entry[1] is df.index:
+        return entry[2]
+    columns: Dict[str, object] = {}
+    _MEMO[key] = (weakref.ref(df, lambda _, key=key: _MEMO.pop(key, None)), df.index, columns)
+    return columns
+
+
+def ensure_features(df: pd.DataFrame, names: Iterable[str]) -> pd.DataFrame:
+    """
+    Return df with every column in `names` present. Columns the frame
+    already has are reused as they are; if nothing is missing df itself is
+    returned, otherwise a copy with only the missing columns added.
+
+    Missing columns are memoized per frame: another call on the same df
+    (e.g. from a second PA module that was handed the original frame)
+    reuses them instead of recomputing.
+    """
+    missing: List[str] = [n for n in dict.fromkeys(names) if n not in df.columns]
+    if not missing or df.empty:
+        return df
+
+    memo = _frame_memo(df)
+    out = df.copy()
+    for name in missing:
+        if name not in memo:
+            spec, param = resolve_feature(name)
+            memo[name] = spec.fn(df, param)
+        out[name] = memo[name]
+    return out
+
+
+def core_config_for(names: Iterable[str]) -> FeatureConfig:
+    """
+    Smallest FeatureConfig whose add_core_features output covers `names`
+    (for the batched path, which computes a whole FeatureConfig at once).
+    """
+    atr: List[int] = []
+    emas: List[int] = []
+    donchian: List[int] = []
+    for name in names:
+        spec, param = resolve_feature(name)
+        if spec.prefix == "atr":
+            atr.append(param)
+        elif spec.prefix == "ema":
+            emas.append(param)
+        elif spec.prefix in ("donchian_high", "donchian_low"):
+            donchian.append(param)
+        elif spec.prefix != "session":
+            raise KeyError(f"'{name}' is not an add_core_features column")
+    if len(set(atr)) > 1:
+        raise ValueError(f"FeatureConfig holds a single ATR period, got {sorted(set(atr))}")
+    return FeatureConfig(
+        atr_period=atr[0] if atr else None,
+        ema_periods=tuple(dict.fromkeys(emas)),
+        donchian_periods=tuple(dict.fromkeys(donchian)),
+    )
+
+
+def _prices(df: pd.DataFrame, col: str) -> np.ndarray:
+    return np.ascontiguousarray(df[col].to_numpy(dtype=np.float64))
+
+
+# ---------- Built-in features (same values as add_core_features) ----------
+
+@register_feature("session", parametric=False)
+def _session(df: pd.DataFrame, _: Optional[int]) -> pd.Categorical:
+    return session_labels(df.index)
+
+
+@register_feature("atr")
+def _atr(df: pd.DataFrame, period: Optional[int]) -> np.ndarray:
+    tr = true_range(_prices(df, "high"), _prices(df, "low"), _prices(df, "close"))
+    return rolling_mean(tr, period, np.empty(len(df)))
+
+
+@register_feature("ema")
+def _ema(df: pd.DataFrame, span: Optional[int]) -> np.ndarray:
+    return ema(_prices(df, "close"), span, np.empty(len(df)))
+
+
+@register_feature("donchian_high")
+def _donchian_high(df: pd.DataFrame, window: Optional[int]) -> np.ndarray:
+    return rolling_extreme(_prices(df, "high"), window, np.empty(len(df)), is_max=True)
+
+
+@register_feature("donchian_low")
+def _donchian_low(df: pd.DataFrame, window: Optional[int]) -> np.ndarray:
+    return rolling_extreme(_prices(df, "low"), window, np.empty(len(df)), is_max=False)
@@ -2,12 +2,22 @@
 
 from __future__ import annotations
 
+import math
+from collections import deque
 from dataclasses import dataclass
 from datetime import date
 from typing import Dict, Any
-from pa_engine.pa.config import FX_DAILY_OPEN_UTC,session_for_hour
+from pa_engine.pa.kernels import compute_core_features, compute_core_features_batch
+from pa_engine.pa.levels import (
+    daily_levels_table,
+    fx_day_ids,
+    fx_day_start_ns,
+    session_levels_table,
+)
+from pa_engine.pa.sessions import get_session_calendar, utc_ns
 
 
+import numpy as np
 import pandas as pd
 
 
@@ -19,7 +29,7 @@ class FeatureConfig:
       index = ts_utc (datetime)
       columns = open, high, low, close, norm_volume
     """
-    atr_period: int = 14
+    atr_period: int | None = 14
     ema_periods: tuple[int, ...] = (20, 50)
     donchian_periods: tuple[int, ...] = (20, 50)
 
@@ -37,39 +47,95 @@ def add_core_features(
       - df.index is datetime (ts_utc)
       - df has columns: open, high, low, close, norm_volume
 
-    Returns a *copy* of df with extra columns:
+    Returns a *copy* of df (df itself is not modified) with extra columns:
+      - session
       - atr_{period}
       - ema_{n}
       - donchian_high_{n}, donchian_low_{n}
+
+    The indicators come from the fused NumPy kernel
+    (pa_engine.pa.kernels.compute_core_features).
     """
     if df.empty:
         return df.copy()
 
     if cfg is None:
         cfg = FeatureConfig()
-    df["session"] = df.index.map(infer_session)
+
+    names, block = compute_core_features(
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+        df["close"].to_numpy(dtype=np.float64),
+        atr_period=cfg.atr_period,
+        ema_periods=cfg.ema_periods,
+        donchian_periods=cfg.donchian_periods,
+    )
 
     out = df.copy()
+    out["session"] = session_labels(df.index)
+    for name, values in zip(names, block):
+        out[name] = values
 
-    # --- ATR ---
-    if cfg.atr_period is not None and cfg.atr_period > 1:
-        out[f"atr_{cfg.atr_period}"] = _compute_atr(out, period=cfg.atr_period)
+    return out
 
-    # --- EMAs ---
-    for n in cfg.ema_periods:
-        out[f"ema_{n}"] = out["close"].ewm(span=n, adjust=False).mean()
 
-    # --- Donchian channels ---
-    for n in cfg.donchian_periods:
-        out[f"donchian_high_{n}"] = out["high"].rolling(window=n, min_periods=1).max()
-        out[f"donchian_low_{n}"] = out["low"].rolling(window=n, min_periods=1).min()
+def add_core_features_batch(
+    frames: Dict[str, pd.DataFrame],
+    cfg: FeatureConfig | None = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    add_core_features for several instruments in one kernel call.
 
-    return out
+    The frames are aligned on the union of their indexes into
+    (instrument x time) arrays, with NaN for minutes an instrument has no
+    bar; compute_core_features_batch skips those, so each result equals
+    add_core_features(frames[inst], cfg). Returns new frames, keyed like
+    `frames`, with the same rows as the inputs.
+    """
+    if cfg is None:
+        cfg = FeatureConfig()
+
+    present = {inst: df for inst, df in frames.items() if not df.empty}
+    out: Dict[str, pd.DataFrame] = {inst: df.copy() for inst, df in frames.items() if df.empty}
+    if not present:
+        return out
+
+    union = present[next(iter(present))].index
+    for df in present.values():
+        union = union.union(df.index)
+
+    positions = {inst: union.get_indexer(df.index) for inst, df in present.items()}
+    stacked = {}
+    for col in ("high", "low", "close"):
+        arr = np.full((len(present), len(union)), np.nan)
+        for row, (inst, df) in enumerate(present.items()):
+            arr[row, positions[inst]] = df[col].to_numpy(dtype=np.float64)
+        stacked[col] = arr
+
+    names, block = compute_core_features_batch(
+        stacked["high"],
+        stacked["low"],
+        stacked["close"],
+        atr_period=cfg.atr_period,
+        ema_periods=cfg.ema_periods,
+        donchian_periods=cfg.donchian_periods,
+    )
+    sessions = session_labels(union)
+
+    for row, (inst, df) in enumerate(present.items()):
+        pos = positions[inst]
+        res = df.copy()
+        res["session"] = sessions.take(pos)
+        for k, name in enumerate(names):
+            res[name] = block[k, row, pos]
+        out[inst] = res
+
+    return {inst: out[inst] for inst in frames}
 
 
 def _compute_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """
-    Simple ATR using SMA of True Range.
+    Simple ATR using SMA of True Range (pandas reference for the kernel).
 
     True Range = max(
         high - low,
@@ -92,22 +158,249 @@ def _compute_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     return atr
 
 
-# ---------- Daily levels (prev day HL/C + curr day open) ----------
+# ---------- Streaming core features (O(1) per bar, checkpointable) ----------
+
+class StreamingATR:
+    """
+    ATR (SMA of True Range) updated one bar at a time from a running window
+    sum. Same values as _compute_atr: NaN until `period` bars were seen.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.window: deque = deque()
+        self.total = 0.0
+        self.prev_close: float | None = None
+        self.count = 0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        self.window.append(tr)
+        self.total += tr
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        self.count += 1
+        # Re-sum once per full window so add/subtract rounding cannot drift
+        if self.count % self.period == 0:
+            self.total = math.fsum(self.window)
+
+        if len(self.window) < self.period:
+            return float("nan")
+        return self.total / self.period
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "period": self.period,
+            "window": list(self.window),
+            "prev_close": self.prev_close,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "StreamingATR":
+        obj = cls(d["period"])
+        obj.window = deque(d["window"])
+        obj.total = math.fsum(obj.window)
+        obj.prev_close = d["prev_close"]
+        obj.count = d["count"]
+        return obj
+
+
+class StreamingEMA:
+    """
+    EMA seeded with the first close (ewm(span, adjust=False)); only the
+    last value is kept.
+    """
+
+    def __init__(self, span: int):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value: float | None = None
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"span": self.span, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "StreamingEMA":
+        obj = cls(d["span"])
+        obj.value = d["value"]
+        return obj
+
+
+class StreamingExtreme:
+    """
+    Rolling max (or min) of the last `window` values, partial windows at the
+    start (rolling(window, min_periods=1)). A monotonic deque of
+    (bar number, value) gives amortized O(1) updates.
+    """
 
-from pa_engine.pa.config import FX_DAILY_OPEN_UTC  # <-- add this import at top of file
+    def __init__(self, window: int, is_max: bool):
+        self.window = max(int(window), 1)
+        self.is_max = is_max
+        self.queue: deque = deque()
+        self.count = 0
+
+    def update(self, x: float) -> float:
+        q = self.queue
+        if self.is_max:
+            while q and q[-1][1] <= x:
+                q.pop()
+        else:
+            while q and q[-1][1] >= x:
+                q.pop()
+        q.append((self.count, x))
+        self.count += 1
+        if q[0][0] <= self.count - 1 - self.window:
+            q.popleft()
+        return q[0][1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window": self.window,
+            "is_max": self.is_max,
+            "queue": [list(item) for item in self.queue],
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "StreamingExtreme":
+        obj = cls(d["window"], d["is_max"])
+        obj.queue = deque((int(i), float(v)) for i, v in d["queue"])
+        obj.count = d["count"]
+        return obj
+
+
+class StreamingCoreFeatures:
+    """
+    Incremental counterpart of add_core_features for a live loop: feed each
+    new closed bar once and get that bar's atr_* / ema_* / donchian_*
+    values, instead of recomputing the whole window every poll.
+
+    Bars at or before the last seen timestamp are ignored, so overlapping
+    polls are safe. to_dict() is a JSON-serializable checkpoint;
+    from_dict() resumes from it.
+    """
+
+    def __init__(self, cfg: FeatureConfig | None = None):
+        self.cfg = cfg or FeatureConfig()
+        self.atr = (
+            StreamingATR(self.cfg.atr_period)
+            if self.cfg.atr_period is not None and self.cfg.atr_period > 1
+            else None
+        )
+        self.emas = {n: StreamingEMA(n) for n in self.cfg.ema_periods}
+        self.donchian = {
+            n: (StreamingExtreme(n, is_max=True), StreamingExtreme(n, is_max=False))
+            for n in self.cfg.donchian_periods
+        }
+        self.last_ts: pd.Timestamp | None = None
+
+    def update(self, ts: pd.Timestamp, high: float, low: float, close: float) -> Dict[str, float] | None:
+        """
+        Add one bar. Returns its feature values, or None if the bar is not
+        newer than the last one seen.
+        """
+        ts = pd.Timestamp(ts)
+        if self.last_ts is not None and ts <= self.last_ts:
+            return None
+        high, low, close = float(high), float(low), float(close)
+
+        values: Dict[str, float] = {}
+        if self.atr is not None:
+            values[f"atr_{self.atr.period}"] = self.atr.update(high, low, close)
+        for n, e in self.emas.items():
+            values[f"ema_{n}"] = e.update(close)
+        for n, (hi, lo) in self.donchian.items():
+            values[f"donchian_high_{n}"] = hi.update(high)
+            values[f"donchian_low_{n}"] = lo.update(low)
+
+        self.last_ts = ts
+        return values
+
+    def update_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feed every new bar of a candle dataframe (index = ts_utc, sorted).
+        Returns the feature rows of the bars actually consumed.
+        """
+        if self.last_ts is not None:
+            df = df[df.index > self.last_ts]
+        rows = []
+        for ts, high, low, close in zip(
+            df.index, df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy()
+        ):
+            rows.append(self.update(ts, high, low, close))
+        return pd.DataFrame(rows, index=df.index[: len(rows)])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cfg": {
+                "atr_period": self.cfg.atr_period,
+                "ema_periods": list(self.cfg.ema_periods),
+                "donchian_periods": list(self.cfg.donchian_periods),
+            },
+            "last_ts": self.last_ts.isoformat() if self.last_ts is not None else None,
+            "atr": self.atr.to_dict() if self.atr is not None else None,
+            "emas": [e.to_dict() for e in self.emas.values()],
+            "donchian": [[hi.to_dict(), lo.to_dict()] for hi, lo in self.donchian.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "StreamingCoreFeatures":
+        cfg = FeatureConfig(
+            atr_period=d["cfg"]["atr_period"],
+            ema_periods=tuple(d["cfg"]["ema_periods"]),
+            donchian_periods=tuple(d["cfg"]["donchian_periods"]),
+        )
+        obj = cls(cfg)
+        if d["atr"] is not None:
+            obj.atr = StreamingATR.from_dict(d["atr"])
+        obj.emas = {e["span"]: StreamingEMA.from_dict(e) for e in d["emas"]}
+        obj.donchian = {
+            hi["window"]: (StreamingExtreme.from_dict(hi), StreamingExtreme.from_dict(lo))
+            for hi, lo in d["donchian"]
+        }
+        obj.last_ts = pd.Timestamp(d["last_ts"]) if d["last_ts"] is not None else None
+        return obj
+
+
+# ---------- Daily levels (prev day HL/C + curr day open) ----------
 
 def infer_session(ts: pd.Timestamp) -> str:
     """
-    Map a UTC timestamp to a session label, using central config.
+    Map a UTC timestamp to a session label, using the DST-aware session
+    calendar (FX_SESSION_CALENDAR).
     """
-    hr = ts.hour  # UTC hour
-    return session_for_hour(hr)
+    return get_session_calendar().label(ts)
+
+
+def session_labels(index: pd.DatetimeIndex) -> pd.Categorical:
+    """
+    Vectorized infer_session for a whole UTC index: a searchsorted over the
+    precomputed session opens, returned as a categorical (int8 codes, no
+    per-row strings).
+    """
+    return get_session_calendar().labels(index)
 
 
 def compute_daily_levels(df_m1: pd.DataFrame) -> Dict[str, Any]:
     """
     Compute FX daily levels using the correct FX session boundary:
-        Daily FX Candle = 22:00 UTC → 21:59 UTC next day
+        Daily FX Candle = 17:00 New York → 16:59 next day
+        (22:00 → 21:59 UTC in winter, 21:00 → 20:59 UTC in summer)
+
+    Previous and current FX day rows of daily_levels_table(); dates are
+    "close date" labels (TradingView-style) = start + 1 day.
     """
 
     result: Dict[str, Any] = {}
@@ -115,71 +408,38 @@ def compute_daily_levels(df_m1: pd.DataFrame) -> Dict[str, Any]:
     if df_m1.empty:
         return result
 
-    df = df_m1.copy().sort_index()
-    last_ts = df.index.max()  # latest M1 candle timestamp
-
-    # ---------------------------------------------
-    # Determine FX daily start for "current" day
-    # ---------------------------------------------
-    # If current time >= 22:00 UTC → today's FX day started at 22:00 same day
-    # Else → FX day started yesterday 22:00 UTC
-    # Example:
-    #   2025-11-21 03:00 UTC --> FX day start = 2025-11-20 22:00 UTC
-    #   2025-11-21 23:00 UTC --> FX day start = 2025-11-21 22:00 UTC
-    # ---------------------------------------------
-
-    if last_ts.hour >= FX_DAILY_OPEN_UTC:
-        current_day_start = last_ts.replace(
-            hour=FX_DAILY_OPEN_UTC, minute=0, second=0, microsecond=0
-        )
-    else:
-        prev = last_ts - pd.Timedelta(days=1)
-        current_day_start = prev.replace(
-            hour=FX_DAILY_OPEN_UTC, minute=0, second=0, microsecond=0
-        )
-
-    # Previous FX day start
-    prev_day_start = current_day_start - pd.Timedelta(days=1)
+    df = df_m1 if df_m1.index.is_monotonic_increasing else df_m1.sort_index()
 
-    # Candle ranges:
-    # prev_day = [prev_day_start, current_day_start - 1s]
-    # curr_day = [current_day_start, current_day_start + 24h - 1s]
-    prev_day_end = current_day_start - pd.Timedelta(seconds=1)
-    current_day_end = current_day_start + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    # Only the last two FX days are needed: slice before aggregating
+    last_day = fx_day_ids(utc_ns(df.index[-1:]))[0]
+    # FX days are 23 / 25 hours around DST changes: bounds from the calendar
+    prev_start_ns, _, next_start_ns = fx_day_start_ns(last_day + np.arange(-1, 2))
+    first_row = np.searchsorted(utc_ns(df.index), prev_start_ns)
+    days = daily_levels_table(df.iloc[first_row:])
+    prev_day_start = pd.Timestamp(int(prev_start_ns), unit="ns")
+    current_day_end = pd.Timestamp(int(next_start_ns), unit="ns") - pd.Timedelta(seconds=1)
 
-    # Slice DF
-    df_prev = df[(df.index >= prev_day_start) & (df.index <= prev_day_end)]
-    df_curr = df[(df.index >= current_day_start) & (df.index <= current_day_end)]
-
-    # -------------------------
-    # Build output dictionary
-    # -------------------------
     result["prev_day"] = None
     result["current_day"] = None
 
-    # ------ Previous Day (prev_day_start → current_day_start - 1s) ------
-    # Label dates as "close date" (TradingView-style) = start + 1 day
-    prev_label_date = (prev_day_start + pd.Timedelta(days=1)).date().isoformat()
-    curr_label_date = (current_day_start + pd.Timedelta(days=1)).date().isoformat()
-
-    # Previous day
-    if not df_prev.empty:
+    # Previous day (only if the FX day right before has bars)
+    if prev_day_start in days.index:
+        prev = days.loc[prev_day_start]
         result["prev_day"] = {
-            "date": prev_label_date,
-            "open": float(df_prev.iloc[0]["open"]),
-            "close": float(df_prev.iloc[-1]["close"]),
-            "high": float(df_prev["high"].max()),
-            "low": float(df_prev["low"].min()),
+            "date": prev["date"].date().isoformat(),
+            "open": float(prev["open"]),
+            "close": float(prev["close"]),
+            "high": float(prev["high"]),
+            "low": float(prev["low"]),
         }
 
     # Current day
-    if not df_curr.empty:
-        result["current_day"] = {
-            "date": curr_label_date,
-            "open": float(df_curr.iloc[0]["open"]),
-            "incomplete_day": df_curr.index.max() < current_day_end,
-        }
-
+    curr = days.iloc[-1]
+    result["current_day"] = {
+        "date": curr["date"].date().isoformat(),
+        "open": float(curr["open"]),
+        "incomplete_day": curr["last_ts"] < current_day_end,
+    }
 
     return result
 
@@ -189,42 +449,36 @@ def compute_session_levels(df_m1: pd.DataFrame) -> Dict[str, Any]:
     """
     Compute intraday session highs/lows for the *latest calendar day* in the data.
 
-    Uses session labels from infer_session() / session_for_hour():
+    Uses session labels from the session calendar (session_levels_table),
+    merging every occurrence of a session within that UTC day:
         SYDNEY, ASIA, LONDON, NEW_YORK, LONDON_NY_OVERLAP
     """
     result: Dict[str, Any] = {}
     if df_m1.empty:
         return result
 
-    df = df_m1.copy().sort_index()
-
-    # Ensure we have a 'session' column
-    if "session" not in df.columns:
-        df["session"] = df.index.map(infer_session)
+    df = df_m1 if df_m1.index.is_monotonic_increasing else df_m1.sort_index()
 
     # Use latest calendar date in the data (UTC) for session levels
-    dates = df.index.date
-    unique_dates = sorted(set(dates))
-    if not unique_dates:
-        return result
+    curr_day = df.index[-1].normalize()
+    df_curr = df.iloc[df.index.searchsorted(curr_day):]
 
-    curr_day = unique_dates[-1]
-    df_curr = df[df.index.date == curr_day]
-    if df_curr.empty:
-        return result
+    table = session_levels_table(df_curr)
+    per_session = table.groupby("session", observed=True).agg(
+        high=("high", "max"), low=("low", "min")
+    )
 
     sessions_info: Dict[str, Dict[str, float]] = {}
     for sess in ["ASIA", "LONDON", "NEW_YORK", "NY_OVERLAP"]:
-        sub = df_curr[df_curr["session"] == sess]
-        if sub.empty:
+        if sess not in per_session.index:
             continue
         sessions_info[sess] = {
-            "high": float(sub["high"].max()),
-            "low": float(sub["low"].min()),
+            "high": float(per_session.loc[sess, "high"]),
+            "low": float(per_session.loc[sess, "low"]),
         }
 
     if sessions_info:
-        result["date"] = curr_day.isoformat()
+        result["date"] = curr_day.date().isoformat()
         result["sessions"] = sessions_info
 
     return result
@@ -49,6 +49,10 @@ class FairValueGap:
     filled_ts: Optional[pd.Timestamp] = None
 
 
+# Feature columns read by detect_fvgs (default atr_col)
+FVG_FEATURES = ("atr_14",)
+
+
 def _get_atr_value(df: pd.DataFrame, idx: int, atr_col: str) -> Optional[float]:
     if atr_col in df.columns:
         try:
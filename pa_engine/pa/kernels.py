@@ -0,0 +1,251 @@
+# pa_engine/pa/kernels.py
+#
+# Fused NumPy kernel for the core per-TF features (ATR, EMAs, Donchian).
+# Works on raw float64 arrays (one series, or instrument x time) and writes
+# every output into one preallocated block; add_core_features and
+# add_core_features_batch wrap it.
+
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Longest EMA block; shorter for fast EMAs so that (1 - alpha) ** -k stays
+# below EMA_MAX_SCALE. Leaves ~n / block sequential steps.
+EMA_BLOCK = 256
+EMA_MAX_SCALE = 1e150
+
+# Above this many bars per row, a 2-D batch is computed row by row: the
+# 2-D kernels save per-call overhead on short series but lose to cache
+# misses on long ones (6 x 24h M1 is about break-even).
+BATCH_ROW_LOOP_BARS = 1440
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    max(high - low, |high - prev_close|, |low - prev_close|) along the last
+    axis; the first bar (no previous close) is high - low.
+    """
+    tr = high - low
+    if tr.shape[-1] > 1:
+        prev_close = close[..., :-1]
+        np.maximum(tr[..., 1:], np.abs(high[..., 1:] - prev_close), out=tr[..., 1:])
+        np.maximum(tr[..., 1:], np.abs(low[..., 1:] - prev_close), out=tr[..., 1:])
+    return tr
+
+
+def rolling_mean(x: np.ndarray, period: int, out: np.ndarray) -> np.ndarray:
+    """
+    Mean of the last `period` values along the last axis; NaN until a full
+    window exists (pandas rolling(period, min_periods=period).mean()).
+    """
+    out[...] = np.nan
+    if period < 1 or x.shape[-1] < period:
+        return out
+    csum = np.cumsum(x, axis=-1)
+    out[..., period - 1] = csum[..., period - 1]
+    out[..., period:] = csum[..., period:] - csum[..., :-period]
+    out[..., period - 1:] /= period
+    return out
+
+
+def ema(x: np.ndarray, span: int, out: np.ndarray) -> np.ndarray:
+    """
+    EMA along the last axis with alpha = 2 / (span + 1), seeded with the
+    first value (pandas ewm(span, adjust=False).mean() for NaN-free input).
+
+    The recurrence is solved in blocks of up to EMA_BLOCK bars: inside a
+    block y[j] = d**j * cumsum(alpha * x[k] * d**-k) + d**(j+1) * carry,
+    with d = 1 - alpha, so only one Python step per block remains (shared
+    by all rows of a 2-D input).
+    """
+    n = x.shape[-1]
+    if n == 0:
+        return out
+    if span <= 1:
+        out[...] = x                      # alpha = 1: no smoothing
+        return out
+    alpha = 2.0 / (span + 1.0)
+    d = 1.0 - alpha
+    block = int(min(EMA_BLOCK, np.log(EMA_MAX_SCALE) / -np.log(d)))
+
+    lead = x.shape[:-1]
+    n_blocks = -(-n // block)
+    padded = np.zeros(lead + (n_blocks * block,))
+    padded[..., :n] = x
+    blocks = padded.reshape(lead + (n_blocks, block))
+
+    j = np.arange(block)
+    d_pow = d ** j                        # d**j
+    local = np.cumsum(blocks * (alpha / d_pow), axis=-1)
+    local *= d_pow
+    carry_w = d * d_pow                   # d**(j+1)
+
+    # y[-1] = x[0] makes y[0] = alpha*x0 + d*x0 = x0
+    d_block = d ** block
+    carries = np.empty(lead + (n_blocks,))
+    if not lead:
+        # Scalar loop: much cheaper per step than 0-d array arithmetic
+        carry = float(x[0])
+        last_local = local[:, -1].tolist()
+        for b in range(n_blocks):
+            carries[b] = carry
+            carry = last_local[b] + d_block * carry
+    else:
+        carry = x[..., 0].copy()
+        last_local = local[..., -1]
+        for b in range(n_blocks):
+            carries[..., b] = carry
+            carry = last_local[..., b] + d_block * carry
+
+    local += carries[..., None] * carry_w
+    out[...] = local.reshape(lead + (-1,))[..., :n]
+    return out
+
+
+def rolling_extreme(x: np.ndarray, window: int, out: np.ndarray, is_max: bool) -> np.ndarray:
+    """
+    Rolling max (or min) over the last `window` values along the last axis,
+    partial windows at the start (pandas rolling(window, min_periods=1)).
+    O(n) via per-block prefix / suffix extremes (van Herk / Gil-Werman).
+    """
+    n = x.shape[-1]
+    if n == 0:
+        return out
+    acc = np.maximum.accumulate if is_max else np.minimum.accumulate
+    pick = np.maximum if is_max else np.minimum
+    fill = -np.inf if is_max else np.inf
+
+    lead = x.shape[:-1]
+    w = max(int(window), 1)
+    n_blocks = -(-n // w)
+    padded = np.full(lead + (n_blocks * w,), fill)
+    padded[..., :n] = x
+    blocks = padded.reshape(lead + (n_blocks, w))
+
+    prefix = acc(blocks, axis=-1).reshape(lead + (-1,))
+    suffix = acc(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(lead + (-1,))
+
+    head = min(w - 1, n)
+    out[..., :head] = prefix[..., :head]  # window still growing: all of x[:i+1]
+    if n > head:
+        # window [i - w + 1, i] = suffix of one block + prefix of the next
+        pick(suffix[..., : n - head], prefix[..., head:n], out=out[..., head:])
+    return out
+
+
+def core_feature_names(
+    atr_period: int | None,
+    ema_periods: Sequence[int],
+    donchian_periods: Sequence[int],
+) -> List[str]:
+    names: List[str] = []
+    if atr_period is not None and atr_period > 1:
+        names.append(f"atr_{atr_period}")
+    names.extend(f"ema_{n}" for n in ema_periods)
+    for n in donchian_periods:
+        names.extend((f"donchian_high_{n}", f"donchian_low_{n}"))
+    return names
+
+
+def compute_core_features(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    atr_period: int | None = 14,
+    ema_periods: Sequence[int] = (20, 50),
+    donchian_periods: Sequence[int] = (20, 50),
+    out: np.ndarray | None = None,
+) -> Tuple[List[str], np.ndarray]:
+    """
+    All core features in one call: returns (column names, block) where
+    block[k] is the column names[k], float64, one value per bar. Inputs may
+    also be 2-D (instrument x time); block is then (names, instrument, time).
+    `out`, if given, is used as the block.
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+
+    names = core_feature_names(atr_period, ema_periods, donchian_periods)
+    block = np.empty((len(names),) + close.shape) if out is None else out
+    k = 0
+
+    if atr_period is not None and atr_period > 1:
+        rolling_mean(true_range(high, low, close), atr_period, block[k])
+        k += 1
+    for n in ema_periods:
+        ema(close, n, block[k])
+        k += 1
+    for n in donchian_periods:
+        rolling_extreme(high, n, block[k], is_max=True)
+        rolling_extreme(low, n, block[k + 1], is_max=False)
+        k += 2
+    return names, block
+
+
+def compute_core_features_batch(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    atr_period: int | None = 14,
+    ema_periods: Sequence[int] = (20, 50),
+    donchian_periods: Sequence[int] = (20, 50),
+) -> Tuple[List[str], np.ndarray]:
+    """
+    compute_core_features for aligned (instrument, time) arrays where a
+    missing bar is NaN. Every row gets the values it would get from its own
+    bars alone (missing minutes are skipped, not filled) and NaN where it
+    has no bar. Returns (names, block) with block (names, instrument, time).
+
+    Short rows run through the 2-D kernels at once: each row's bars are
+    packed to the front, the padding after them holds the row's last price,
+    and since every feature is causal the padding never reaches a real
+    bar's value. Rows longer than BATCH_ROW_LOOP_BARS run one at a time.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    missing = np.isnan(high) | np.isnan(low) | np.isnan(close)
+
+    if close.shape[1] > BATCH_ROW_LOOP_BARS:
+        names = core_feature_names(atr_period, ema_periods, donchian_periods)
+        out = np.empty((len(names),) + close.shape)
+        for row in range(close.shape[0]):
+            keep = ~missing[row]
+            if keep.all():
+                compute_core_features(
+                    high[row], low[row], close[row],
+                    atr_period, ema_periods, donchian_periods, out=out[:, row],
+                )
+                continue
+            out[:, row] = np.nan
+            _, out[:, row, keep] = compute_core_features(
+                high[row, keep], low[row, keep], close[row, keep],
+                atr_period, ema_periods, donchian_periods,
+            )
+        return names, out
+
+    if not missing.any():
+        return compute_core_features(high, low, close, atr_period, ema_periods, donchian_periods)
+
+    # Stable: present bars first, in time order
+    order = np.argsort(missing, axis=1, kind="stable")
+    counts = (~missing).sum(axis=1)
+    pad = np.arange(high.shape[1])[None, :] >= counts[:, None]
+    last = np.maximum(counts - 1, 0)[:, None]
+
+    packed = []
+    for arr in (high, low, close):
+        p = np.take_along_axis(arr, order, axis=1)
+        p = np.where(pad, np.take_along_axis(p, last, axis=1), p)
+        packed.append(np.nan_to_num(p))   # rows with no bars at all
+    names, block = compute_core_features(*packed, atr_period, ema_periods, donchian_periods)
+
+    out = np.empty_like(block)
+    for k in range(len(names)):
+        np.put_along_axis(out[k], order, block[k], axis=1)
+    out[:, missing] = np.nan
+    return names, out
+
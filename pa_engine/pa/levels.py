@@ -0,0 +1,417 @@
+# pa_engine/pa/levels.py
+#
+# Daily and session OHLC tables over any amount of M1 history. Every bar
+# gets an FX-day id (17:00 New York boundary) and a session-occurrence id once;
+# the groups are contiguous in a sorted frame, so open/high/low/close come
+# from one reduceat per column instead of a mask per day / session.
+# LevelsEngine keeps the FX-day rows per instrument and derives weekly /
+# monthly levels from them.
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pa_engine.pa.config import (
+    REFERENCE_DAYS_KEPT,
+    REFERENCE_OPENS,
+    REFERENCE_RESEED_DAYS,
+    REFERENCE_RESEED_MINUTES,
+    ZonedSessionDef,
+)
+from pa_engine.pa.sessions import (
+    SESSION_DTYPE,
+    SessionCalendar,
+    get_fx_day_calendar,
+    get_session_calendar,
+    utc_ns,
+)
+
+
+def fx_day_ids(ts_ns: np.ndarray) -> np.ndarray:
+    """
+    FX-day number per UTC epoch-ns value: the FX day opening at 17:00 New
+    York on D (22:00 UTC in winter, 21:00 in summer, same boundary as the
+    ASIA session) closes on D + 1 and gets id (D + 1) - 1970-01-01 in days.
+    """
+    return get_fx_day_calendar().day_ids(ts_ns)
+
+
+def fx_day_start_ns(day_ids: np.ndarray) -> np.ndarray:
+    """
+    UTC epoch-ns of the 17:00 New York open of each FX day id.
+    """
+    return get_fx_day_calendar().day_starts(day_ids)
+
+
+def group_ohlc(df: pd.DataFrame, group_ids: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    open/high/low/close, bars, first_ts/last_ts (and volume when the frame
+    has norm_volume) per run of equal ids in a time-sorted frame. Also
+    returns "id", the group id of each run.
+    """
+    n = len(df)
+    starts = np.flatnonzero(np.r_[True, group_ids[1:] != group_ids[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    ts = utc_ns(df.index)
+
+    out = {
+        "id": group_ids[starts],
+        "open": df["open"].to_numpy(dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(dtype=np.float64), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(dtype=np.float64), starts),
+        "close": df["close"].to_numpy(dtype=np.float64)[ends],
+        "bars": ends - starts + 1,
+        "first_ts": ts[starts],
+        "last_ts": ts[ends],
+    }
+    if "norm_volume" in df.columns:
+        out["volume"] = np.add.reduceat(df["norm_volume"].to_numpy(dtype=np.float64), starts)
+    return out
+
+
+def _sorted(df_m1: pd.DataFrame) -> pd.DataFrame:
+    return df_m1 if df_m1.index.is_monotonic_increasing else df_m1.sort_index()
+
+
+def _ohlc_columns(agg: Dict[str, np.ndarray]) -> Dict[str, object]:
+    cols: Dict[str, object] = {k: agg[k] for k in ("open", "high", "low", "close", "bars")}
+    if "volume" in agg:
+        cols["volume"] = agg["volume"]
+    cols["first_ts"] = pd.to_datetime(agg["first_ts"], unit="ns")
+    cols["last_ts"] = pd.to_datetime(agg["last_ts"], unit="ns")
+    return cols
+
+
+def daily_levels_table(df_m1: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per FX day (17:00 -> 16:59 New York) present in df_m1.
+
+    Index: day_start_utc (naive UTC open, 22:00 in winter and 21:00 in
+    summer). Columns: date (close date,
+    TradingView-style label = start + 1 day), open, high, low, close, bars,
+    volume (if norm_volume exists), first_ts, last_ts.
+    """
+    cols = ["date", "open", "high", "low", "close", "bars", "first_ts", "last_ts"]
+    if df_m1.empty:
+        return pd.DataFrame(columns=cols, index=pd.DatetimeIndex([], name="day_start_utc"))
+
+    df = _sorted(df_m1)
+    agg = group_ohlc(df, fx_day_ids(utc_ns(df.index)))
+
+    start = pd.to_datetime(fx_day_start_ns(agg["id"]), unit="ns")
+    return pd.DataFrame(
+        {"date": (start + pd.Timedelta(days=1)).normalize(), **_ohlc_columns(agg)},
+        index=pd.DatetimeIndex(start, name="day_start_utc"),
+    )
+
+
+def session_levels_table(
+    df_m1: pd.DataFrame,
+    calendar: Optional[SessionCalendar] = None,
+) -> pd.DataFrame:
+    """
+    One row per session occurrence (DST-aware, from the session calendar)
+    with bars in df_m1.
+
+    Columns: session (categorical), open_utc / close_utc (session window),
+    fx_day_start_utc (FX day the session opens in), open, high, low, close,
+    bars, volume (if norm_volume exists), first_ts, last_ts.
+    """
+    cols = [
+        "session", "open_utc", "close_utc", "fx_day_start_utc",
+        "open", "high", "low", "close", "bars", "first_ts", "last_ts",
+    ]
+    if df_m1.empty:
+        return pd.DataFrame(columns=cols)
+
+    cal = calendar or get_session_calendar()
+    df = _sorted(df_m1)
+    positions, cal_open_ns, cal_codes = cal.lookup(utc_ns(df.index))
+    agg = group_ohlc(df, positions)
+
+    pos = agg["id"]
+    open_ns = cal_open_ns[pos]
+    return pd.DataFrame(
+        {
+            "session": pd.Categorical.from_codes(cal_codes[pos], dtype=SESSION_DTYPE),
+            "open_utc": pd.to_datetime(open_ns, unit="ns"),
+            "close_utc": pd.to_datetime(cal_open_ns[pos + 1], unit="ns"),
+            "fx_day_start_utc": pd.to_datetime(fx_day_start_ns(fx_day_ids(open_ns)), unit="ns"),
+            **_ohlc_columns(agg),
+        }
+    )
+
+
+# ---------- Reference levels: weekly / monthly / intraday opens ----------
+
+def _naive_utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert("UTC").tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def _fx_day_start(ts: pd.Timestamp, days_back: int = 0) -> pd.Timestamp:
+    """
+    Open of the FX day containing ts, or of the one `days_back` FX days
+    earlier (days are 23 / 25 hours around DST changes).
+    """
+    day_id = fx_day_ids(np.array([ts.value]))[0] - days_back
+    return pd.Timestamp(int(fx_day_start_ns(day_id)), unit="ns")
+
+
+def _merge_days(cached: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Append new FX-day rows to cached ones; a first new row for the cached
+    last day (bars after the watermark) is folded into it.
+    """
+    if new.index[0] != cached.index[-1]:
+        return pd.concat([cached, new])
+
+    last, first = cached.iloc[-1], new.iloc[0]
+    row = last.copy()
+    row["high"] = max(last["high"], first["high"])
+    row["low"] = min(last["low"], first["low"])
+    row["close"] = first["close"]
+    row["bars"] = last["bars"] + first["bars"]
+    if "volume" in row.index and "volume" in first.index:
+        row["volume"] = last["volume"] + first["volume"]
+    row["last_ts"] = first["last_ts"]
+    merged = pd.concat([cached.iloc[:-1], row.to_frame().T, new.iloc[1:]])
+    merged.index.name = cached.index.name
+    return merged.astype(cached.dtypes.to_dict())
+
+
+def _period_levels(days: pd.DataFrame, key: pd.Series) -> Tuple[Optional[dict], Optional[dict]]:
+    """
+    (current, previous) OHLC over groups of FX days sharing `key`.
+    """
+    grouped = days.groupby(key.to_numpy(), sort=True).agg(
+        open=("open", "first"),
+        high=("high", "max"),
+        low=("low", "min"),
+        close=("close", "last"),
+        days=("open", "size"),
+    )
+
+    def _row(i: int, with_close: bool) -> dict:
+        r = grouped.iloc[i]
+        d = {
+            "start": grouped.index[i].date().isoformat(),
+            "open": float(r["open"]),
+            "high": float(r["high"]),
+            "low": float(r["low"]),
+            "days": int(r["days"]),
+        }
+        if with_close:
+            d["close"] = float(r["close"])
+        return d
+
+    current = _row(-1, with_close=False)
+    previous = _row(-2, with_close=True) if len(grouped) > 1 else None
+    return current, previous
+
+
+def intraday_opens(
+    df_m1: pd.DataFrame,
+    opens: Sequence[ZonedSessionDef] = REFERENCE_OPENS,
+) -> Dict[str, Optional[dict]]:
+    """
+    For each reference open: the most recent occurrence of its wall time
+    at or before the last bar, and the open of the first bar from there
+    ({"ts", "price"}), or None when the frame has no bar after it.
+    """
+    result: Dict[str, Optional[dict]] = {}
+    if df_m1.empty:
+        return result
+
+    df = _sorted(df_m1)
+    ts = utc_ns(df.index)
+    last = pd.Timestamp(ts[-1], unit="ns")
+    for ref in opens:
+        hh, mm = (int(part) for part in ref.open_local.split(":"))
+        local_day = last.tz_localize("UTC").tz_convert(ref.tz).tz_localize(None).normalize()
+        anchor = None
+        for day in (local_day, local_day - pd.Timedelta(days=1)):
+            candidate = (day + pd.Timedelta(hours=hh, minutes=mm)).tz_localize(
+                ref.tz, ambiguous=True, nonexistent="shift_forward"
+            ).tz_convert("UTC").tz_localize(None)
+            if candidate <= last:
+                anchor = candidate
+                break
+
+        row = int(np.searchsorted(ts, anchor.value)) if anchor is not None else len(ts)
+        if row >= len(ts):
+            result[ref.name] = None
+            continue
+        result[ref.name] = {
+            "ts": pd.Timestamp(ts[row], unit="ns").isoformat(),
+            "price": float(df["open"].iloc[row]),
+        }
+    return result
+
+
+def session_opens(df_m1: pd.DataFrame) -> Dict[str, dict]:
+    """
+    Most recent occurrence of each session within the last day of df_m1:
+    {"session_open_utc", "ts" (first bar), "price" (its open)}.
+    """
+    if df_m1.empty:
+        return {}
+    df = _sorted(df_m1)
+    df = df.iloc[df.index.searchsorted(df.index[-1] - pd.Timedelta(days=1), side="right"):]
+
+    table = session_levels_table(df)
+    latest = table.groupby("session", observed=True).tail(1)
+    return {
+        str(r.session): {
+            "session_open_utc": r.open_utc.isoformat(),
+            "ts": r.first_ts.isoformat(),
+            "price": float(r.open),
+        }
+        for r in latest.itertuples()
+    }
+
+
+# fn(start_utc, end_utc) -> FX-day aggregates (e.g. load_fx_daily_bars)
+DaysLoader = Callable[[pd.Timestamp, pd.Timestamp], pd.DataFrame]
+
+
+class LevelsEngine:
+    """
+    Per-instrument cache of FX-day aggregates (daily_levels_table rows)
+    from which weekly / monthly levels are derived.
+
+    seed() takes already aggregated days (e.g. pa_engine.db.candles.
+    load_fx_daily_bars), so weeks of history never have to be loaded as M1;
+    update() folds in only the M1 bars newer than the cached last_ts.
+    refresh() (live path) reloads days the cache cannot be trusted for
+    before each window is folded in.
+    """
+
+    def __init__(
+        self,
+        days_kept: int = REFERENCE_DAYS_KEPT,
+        opens: Sequence[ZonedSessionDef] = REFERENCE_OPENS,
+        reseed_minutes: float = REFERENCE_RESEED_MINUTES,
+        reseed_days: int = REFERENCE_RESEED_DAYS,
+    ):
+        self.days_kept = days_kept
+        self.opens = list(opens)
+        self.reseed_every = pd.Timedelta(minutes=reseed_minutes)
+        self.reseed_days = reseed_days
+        self._days: Dict[str, pd.DataFrame] = {}
+        # End of the M1 window last folded in, and of the last reload
+        self._covered_to: Dict[str, pd.Timestamp] = {}
+        self._reloaded_at: Dict[str, pd.Timestamp] = {}
+
+    def has(self, instrument: str) -> bool:
+        return instrument in self._days
+
+    def days(self, instrument: str) -> pd.DataFrame:
+        return self._days.get(instrument, daily_levels_table(pd.DataFrame()))
+
+    def seed(self, instrument: str, days: pd.DataFrame) -> None:
+        """
+        Replace the cache with FX-day aggregates (index day_start_utc;
+        open/high/low/close/bars/first_ts/last_ts, optional volume).
+        """
+        days = days.sort_index()
+        days = days.assign(date=(days.index + pd.Timedelta(days=1)).normalize())
+        self._days[instrument] = days.iloc[-self.days_kept:]
+
+    def refresh(
+        self,
+        instrument: str,
+        window_start,
+        window_end,
+        load_days: DaysLoader,
+    ) -> None:
+        """
+        Prepare the cache for update() with the M1 window
+        [window_start, window_end). Days are reloaded with load_days(start,
+        window_start) and replace the cached ones from `start` on when:
+
+        - the instrument is not cached yet (days_kept days of history);
+        - the cache ends before window_start (the loop paused longer than
+          the window): from the FX day the cache ends in;
+        - reseed_every has passed since the last reload: the last
+          reseed_days FX days, so late writes (gap repair, backfill) show up.
+        """
+        start, end = _naive_utc(window_start), _naive_utc(window_end)
+        cached = self._days.get(instrument)
+
+        reload_from: Optional[pd.Timestamp] = None
+        if cached is None:
+            reload_from = start - pd.Timedelta(days=self.days_kept)
+        else:
+            covered = self._covered_to.get(instrument)
+            if covered is None and not cached.empty:
+                covered = cached["last_ts"].iloc[-1]
+            if covered is not None and covered < start:
+                reload_from = _fx_day_start(covered)
+            last_reload = self._reloaded_at.get(instrument)
+            if last_reload is None or end - last_reload >= self.reseed_every:
+                recent = _fx_day_start(start, self.reseed_days)
+                reload_from = recent if reload_from is None else min(reload_from, recent)
+
+        if reload_from is not None:
+            kept = cached[cached.index < reload_from] if cached is not None else None
+            loaded = load_days(reload_from.tz_localize("UTC"), start.tz_localize("UTC"))
+            parts = [d for d in (kept, loaded) if d is not None and not d.empty]
+            if parts:
+                self.seed(instrument, pd.concat(parts) if len(parts) > 1 else parts[0])
+            else:
+                self._days[instrument] = daily_levels_table(pd.DataFrame())
+            self._reloaded_at[instrument] = end
+        self._covered_to[instrument] = end
+
+    def update(self, instrument: str, df_m1: pd.DataFrame) -> pd.DataFrame:
+        cached = self._days.get(instrument)
+        df = _sorted(df_m1)
+        if cached is not None and not cached.empty and not df.empty:
+            last_ns = pd.Timestamp(cached["last_ts"].iloc[-1]).value
+            df = df.iloc[int(np.searchsorted(utc_ns(df.index), last_ns, side="right")):]
+
+        new = daily_levels_table(df)
+        if cached is None or cached.empty:
+            days = new
+        elif new.empty:
+            days = cached
+        else:
+            days = _merge_days(cached, new)
+        self._days[instrument] = days.iloc[-self.days_kept:]
+        return self._days[instrument]
+
+    def reference_levels(self, instrument: str, df_m1: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        week / prev_week (FX weeks, Monday close-date labels), month /
+        prev_month from the cached days; intraday opens (REFERENCE_OPENS)
+        and latest session opens from df_m1 when given.
+        """
+        result: Dict[str, Any] = {}
+        days = self._days.get(instrument)
+        if days is not None and not days.empty:
+            dates = pd.DatetimeIndex(days["date"])
+            week = dates - pd.to_timedelta(dates.weekday, unit="D")
+            month = dates.to_period("M").start_time
+            result["week"], result["prev_week"] = _period_levels(days, pd.Series(week))
+            result["month"], result["prev_month"] = _period_levels(days, pd.Series(month))
+        if df_m1 is not None and not df_m1.empty:
+            result.update(intraday_opens(df_m1, self.opens))
+            result["session_opens"] = session_opens(df_m1)
+        return result
+
+
+_engine: Optional[LevelsEngine] = None
+
+
+def get_levels_engine() -> LevelsEngine:
+    """
+    Shared engine for the live path, created on first use.
+    """
+    global _engine
+    if _engine is None:
+        _engine = LevelsEngine()
+    return _engine
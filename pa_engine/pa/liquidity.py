@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import warnings
 from dataclasses import dataclass
 from enum import Enum
 from typing import List, Optional, Sequence, Tuple
 
 import pandas as pd
 
+from pa_engine.pa.levels import session_levels_table
+from pa_engine.pa.sessions import utc_ns
 from pa_engine.pa.structure import LabeledSwingPoint
 
 
@@ -53,6 +56,10 @@ class LiquiditySweep:
     score: float = 0.0
 
 
+# Feature columns read here: atr_14 for sweep scoring (the Asia range comes
+# from the session calendar)
+LIQUIDITY_FEATURES = ("atr_14",)
+
 
 # ----------------------------------------------------------------------
 # 1) Equal High/Low Liquidity from swings
@@ -130,54 +137,55 @@ def detect_equal_highs_lows(
 
 def detect_asia_range_liquidity(
     df_m1: pd.DataFrame,
-    session_col: str = "session",
+    session_col: Optional[str] = None,
     asia_label: str = "ASIA",
 ) -> List[LiquidityLevel]:
     """
     Detect Asia session high/low as liquidity levels.
-    Assumes df_m1 is M1 data for (at most) a couple of days and has a
-    'session' column (from infer_session).
-
-    We take the latest calendar date in df_m1 and restrict to that date
-    where session == asia_label.
-    """
-    if df_m1.empty or session_col not in df_m1.columns:
-        return []
 
-    df = df_m1.copy().sort_index()
-    dates = df.index.date
-    unique_dates = sorted(set(dates))
-    if not unique_dates:
-        return []
+    ASIA opens in the evening UTC (17:00 New York) and closes at the London
+    open, so it always spans two UTC dates. The latest ASIA occurrence with
+    bars in df_m1 is selected from the DST-aware session calendar
+    (session_levels_table), not by UTC date.
 
-    curr_day = unique_dates[-1]
-    df_curr = df[df.index.date == curr_day]
-    if df_curr.empty:
+    session_col is deprecated and ignored: no session column is read.
+    """
+    if session_col is not None:
+        warnings.warn(
+            "detect_asia_range_liquidity(session_col=...) is ignored: the Asia "
+            "session comes from the session calendar",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+    if df_m1.empty:
         return []
 
-    df_asia = df_curr[df_curr[session_col] == asia_label]
-    if df_asia.empty:
+    df = df_m1 if df_m1.index.is_monotonic_increasing else df_m1.sort_index()
+    table = session_levels_table(df)
+    asia = table[table["session"] == asia_label]
+    if asia.empty:
         return []
+    latest = asia.iloc[-1]
 
-    # High and low of the Asia session for that day
-    asia_high_price = float(df_asia["high"].max())
-    asia_low_price = float(df_asia["low"].min())
+    ts = utc_ns(df.index)
+    in_session = (ts >= latest["open_utc"].value) & (ts < latest["close_utc"].value)
+    df_asia = df[in_session]
 
-    # Use first and last timestamps as references
+    # Timestamps of the bars that printed the high and low
     ts_high = df_asia["high"].idxmax()
     ts_low = df_asia["low"].idxmin()
 
     levels: List[LiquidityLevel] = [
         LiquidityLevel(
             ts=ts_high,
-            price=asia_high_price,
+            price=float(latest["high"]),
             type=LiquidityType.ASIA_HIGH,
             touches=1,
             swing_indices=[],
         ),
         LiquidityLevel(
             ts=ts_low,
-            price=asia_low_price,
+            price=float(latest["low"]),
             type=LiquidityType.ASIA_LOW,
             touches=1,
             swing_indices=[],
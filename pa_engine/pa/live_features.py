@@ -0,0 +1,170 @@
+# pa_engine/pa/live_features.py
+#
+# Indicator state carried across cycles of the live context loop
+# (build_pa_context_for_instrument). Each cycle reloads the same rolling M1
+# window, so instead of resampling it and recomputing the features of the
+# whole window, only the M1 bars that are new since the previous cycle are
+# fed to an IncrementalResampler per TF and to a StreamingCoreFeatures per
+# TF; the rows of the other bars are reused.
+
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pa_engine.db.resampler import IncrementalResampler, bucket_start_ns
+from pa_engine.pa.features import FeatureConfig, StreamingCoreFeatures, session_labels
+from pa_engine.pa.sessions import utc_ns
+
+
+@dataclass
+class _FeatureStream:
+    state: StreamingCoreFeatures
+    rows: pd.DataFrame      # feature values of the closed bars fed, index = bar open
+
+    def feed(self, bars: pd.DataFrame) -> None:
+        """
+        Feed the bars of `bars` newer than the last one seen; afterwards
+        `rows` lines up with `bars`.
+        """
+        new_rows = self.state.update_frame(bars)
+        if len(new_rows):
+            rows = pd.concat([self.rows, new_rows]) if len(self.rows) else new_rows
+        else:
+            rows = self.rows
+        self.rows = rows.iloc[len(rows) - len(bars):]
+
+
+@dataclass
+class _InstrumentState:
+    cfg: FeatureConfig
+    seen: pd.DatetimeIndex                  # M1 window of the previous call
+    streams: Dict[str, _FeatureStream] = field(default_factory=dict)
+    resamplers: Dict[str, IncrementalResampler] = field(default_factory=dict)
+
+
+def _new_stream(cfg: FeatureConfig, index: pd.DatetimeIndex) -> _FeatureStream:
+    return _FeatureStream(StreamingCoreFeatures(cfg), pd.DataFrame(index=index[:0]))
+
+
+def _extends(seen: pd.DatetimeIndex, index: pd.DatetimeIndex) -> bool:
+    """
+    True if the bars of `seen` from index[0] on are exactly the first bars
+    of `index`, i.e. the reloaded window only added bars after them.
+    """
+    seen_ns = utc_ns(seen)
+    ns = utc_ns(index)
+    kept = seen_ns[np.searchsorted(seen_ns, ns[0]):]
+    return 0 < len(kept) <= len(ns) and np.array_equal(kept, ns[: len(kept)])
+
+
+def _with_features(bars: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    bars plus session and the feature columns of `rows` (same length), in
+    add_core_features column order.
+    """
+    out = bars.copy()
+    out["session"] = session_labels(bars.index)
+    for name in rows.columns:
+        out[name] = rows[name].to_numpy()
+    return out
+
+
+class LiveFeatureCache:
+    """
+    Streaming resamplers and features per instrument for the live loop.
+
+    frames() returns, for each TF, the candles of the window with the
+    add_core_features columns of `cfg`. Only the M1 bars newer than the
+    previous call are fed: to the M1 StreamingCoreFeatures and to an
+    IncrementalResampler per higher TF, whose closed bars feed that TF's
+    StreamingCoreFeatures. The forming HTF bar is computed on a copy of the
+    state, so the next call updates it again.
+
+    Everything is rebuilt from the window (same frames as resample_tf +
+    add_core_features) when the config changes or when the window no longer
+    extends the M1 bars already fed: a hole filled by gap repair, a window
+    starting earlier, or a pause longer than the window.
+
+    Between rebuilds the first HTF bar of the window is complete rather
+    than cut at the window start, the EMAs keep their seed from the first
+    window, so they carry more history than add_core_features over the
+    current window alone, and ATR / Donchian are already warm at the start
+    of the window; past its first `period` bars they are the same.
+    """
+
+    def __init__(self):
+        self._states: Dict[str, _InstrumentState] = {}
+
+    def frames(
+        self,
+        instrument: str,
+        df_m1: pd.DataFrame,
+        tfs: Sequence[str],
+        cfg: FeatureConfig,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Featured frame of each TF for a sorted, non-empty M1 window.
+        """
+        st = self._states.get(instrument)
+        if st is None or st.cfg != cfg or not _extends(st.seen, df_m1.index):
+            st = self._states[instrument] = _InstrumentState(cfg, df_m1.index)
+        st.seen = df_m1.index
+
+        out: Dict[str, pd.DataFrame] = {}
+        for tf in tfs:
+            # A TF first asked for after the state was built starts from
+            # the window
+            stream = st.streams.get(tf)
+            if stream is None:
+                stream = st.streams[tf] = _new_stream(cfg, df_m1.index)
+            if tf == "M1":
+                stream.feed(df_m1)
+                out[tf] = _with_features(df_m1, stream.rows)
+            else:
+                out[tf] = self._htf_frame(st, tf, stream, df_m1)
+        return out
+
+    def reset(self, instrument: Optional[str] = None) -> None:
+        if instrument is None:
+            self._states.clear()
+        else:
+            self._states.pop(instrument, None)
+
+    def _htf_frame(
+        self, st: _InstrumentState, tf: str, stream: _FeatureStream, df_m1: pd.DataFrame
+    ) -> pd.DataFrame:
+        res = st.resamplers.get(tf)
+        if res is None:
+            res = st.resamplers[tf] = IncrementalResampler(tf)
+
+        res.update_frame(df_m1)
+        res.drop_before(bucket_start_ns(int(utc_ns(df_m1.index[:1])[0]), res.spec))
+        bars = res.frame()
+        closed = bars.iloc[:-1]
+
+        stream.feed(closed)
+        _, _, high, low, close, _ = res.partial
+        forming = pd.DataFrame(
+            [copy.deepcopy(stream.state).update(bars.index[-1], high, low, close)],
+            index=bars.index[-1:],
+        )
+        rows = pd.concat([stream.rows, forming]) if len(stream.rows) else forming
+        return _with_features(bars, rows)
+
+
+_cache: LiveFeatureCache | None = None
+
+
+def get_live_feature_cache() -> LiveFeatureCache:
+    """
+    Shared cache for the live path, created on first use.
+    """
+    global _cache
+    if _cache is None:
+        _cache = LiveFeatureCache()
+    return _cache
@@ -268,6 +268,10 @@ def _clip_score(x: float, lo: float = 0.0, hi: float = 100.0) -> float:
     return max(lo, min(hi, x))
 
 
+# Feature columns read by score_order_block(s) (default atr_col)
+OB_FEATURES = ("atr_14",)
+
+
 def score_order_block(
     df: pd.DataFrame,
     ob: OrderBlock,
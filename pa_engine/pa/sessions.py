@@ -0,0 +1,252 @@
+# pa_engine/pa/sessions.py
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pa_engine.pa.config import FX_DAY_OPEN, FX_SESSION_CALENDAR, SESSION_LABELS, ZonedSessionDef
+
+SESSION_DTYPE = pd.CategoricalDtype(SESSION_LABELS)
+
+# Years precomputed ahead of the current one
+YEARS_AHEAD = 5
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+class SessionCalendar:
+    """
+    Session open instants (UTC epoch ns) for every day of a year range,
+    computed once per session from its IANA zone, so DST is applied per
+    date. Each session lasts until the next open in time order.
+
+    Tagging a timestamp is a searchsorted over the open instants: no
+    per-row timezone conversion. The range grows automatically when asked
+    about timestamps outside it.
+    """
+
+    def __init__(
+        self,
+        sessions: Sequence[ZonedSessionDef] = FX_SESSION_CALENDAR,
+        first_year: int = 2000,
+        last_year: Optional[int] = None,
+    ):
+        self.sessions = list(sessions)
+        unknown = [s.name for s in self.sessions if s.name not in SESSION_LABELS]
+        if unknown:
+            raise ValueError(f"Sessions not in SESSION_LABELS: {unknown}")
+        if last_year is None:
+            last_year = datetime.now(timezone.utc).year + YEARS_AHEAD
+        self._build(first_year, last_year)
+
+    def _build(self, first_year: int, last_year: int) -> None:
+        # One extra day each side so the first / last instants are covered
+        days = pd.date_range(f"{first_year - 1}-12-31", f"{last_year + 1}-01-01", freq="D")
+
+        starts = []
+        codes = []
+        for sess in self.sessions:
+            hh, mm = (int(part) for part in sess.open_local.split(":"))
+            local = days + pd.Timedelta(hours=hh, minutes=mm)
+            utc = local.tz_localize(sess.tz, ambiguous=True, nonexistent="shift_forward")
+            starts.append(utc.tz_convert("UTC").as_unit("ns").asi8)
+            codes.append(np.full(len(days), SESSION_LABELS.index(sess.name), dtype=np.int8))
+
+        all_starts = np.concatenate(starts)
+        order = np.argsort(all_starts, kind="stable")
+        # One assignment: concurrent readers (shared calendar) always see
+        # open instants and codes of the same build
+        self._table = (all_starts[order], np.concatenate(codes)[order])
+        self.first_year = first_year
+        self.last_year = last_year
+
+    @property
+    def open_ns(self) -> np.ndarray:
+        return self._table[0]
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._table[1]
+
+    def _covering(self, ts_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (open_ns, codes) of a build covering ts_ns, rebuilt if needed.
+        Positions are only meaningful against the arrays they came from.
+        """
+        table = self._table
+        if ts_ns.size == 0:
+            return table
+        lo, hi = int(ts_ns.min()), int(ts_ns.max())
+        if lo >= table[0][0] and hi < table[0][-1]:
+            return table
+        self._build(
+            min(self.first_year, pd.Timestamp(lo).year),
+            max(self.last_year, pd.Timestamp(hi).year),
+        )
+        return self._table
+
+    # ------------------------------------------------------------------
+    # Tagging
+    # ------------------------------------------------------------------
+    def lookup(self, ts_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (positions, open_ns, codes): position of the session occurrence
+        containing each UTC epoch-ns value (same position = same session
+        instance) within the returned open_ns / codes arrays.
+        """
+        ts_ns = np.asarray(ts_ns, dtype=np.int64)
+        open_ns, codes = self._covering(ts_ns)
+        return np.searchsorted(open_ns, ts_ns, side="right") - 1, open_ns, codes
+
+    def positions_for(self, ts_ns: np.ndarray) -> np.ndarray:
+        """
+        Position in open_ns / codes of the session occurrence containing
+        each UTC epoch-ns value. Use lookup() to index the arrays.
+        """
+        return self.lookup(ts_ns)[0]
+
+    def codes_for(self, ts_ns: np.ndarray) -> np.ndarray:
+        """
+        Session code (index into SESSION_LABELS) per UTC epoch-ns value.
+        """
+        pos, _, codes = self.lookup(ts_ns)
+        return codes[pos]
+
+    def labels(self, index: pd.DatetimeIndex) -> pd.Categorical:
+        """
+        Session per timestamp of a UTC index (naive = UTC) as a categorical.
+        """
+        return pd.Categorical.from_codes(self.codes_for(utc_ns(index)), dtype=SESSION_DTYPE)
+
+    def label(self, ts: pd.Timestamp) -> str:
+        return SESSION_LABELS[int(self.codes_for(utc_ns(pd.DatetimeIndex([ts])))[0])]
+
+    # ------------------------------------------------------------------
+    # Boundaries
+    # ------------------------------------------------------------------
+    def windows(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        Sessions overlapping [start, end): one row per session occurrence
+        with naive-UTC open_utc / close_utc (close = next session's open).
+        """
+        bounds = utc_ns(pd.DatetimeIndex([start, end]))
+        open_ns, codes = self._covering(bounds)
+        i = max(int(np.searchsorted(open_ns, bounds[0], side="right")) - 1, 0)
+        j = int(np.searchsorted(open_ns, bounds[1], side="left"))
+        opens = open_ns[i:j]
+        closes = open_ns[i + 1:j + 1]
+        return pd.DataFrame(
+            {
+                "session": pd.Categorical.from_codes(codes[i:j], dtype=SESSION_DTYPE),
+                "open_utc": pd.to_datetime(opens, unit="ns"),
+                "close_utc": pd.to_datetime(closes, unit="ns"),
+            }
+        )
+
+
+class FxDayCalendar:
+    """
+    FX-day opens (UTC epoch ns) for every day of a year range, from the
+    FX_DAY_OPEN wall time in its IANA zone: 17:00 New York is 22:00 UTC in
+    winter and 21:00 UTC in summer.
+
+    FX days are numbered by their close date: the day opening on local date
+    D gets id (D + 1) - 1970-01-01 in days. Like SessionCalendar, ids are a
+    searchsorted over the open instants and the range grows on demand.
+    """
+
+    def __init__(
+        self,
+        open_def: ZonedSessionDef = FX_DAY_OPEN,
+        first_year: int = 2000,
+        last_year: Optional[int] = None,
+    ):
+        self.open_def = open_def
+        if last_year is None:
+            last_year = datetime.now(timezone.utc).year + YEARS_AHEAD
+        self._build(first_year, last_year)
+
+    def _build(self, first_year: int, last_year: int) -> None:
+        days = pd.date_range(f"{first_year - 1}-12-31", f"{last_year + 1}-01-01", freq="D")
+        hh, mm = (int(part) for part in self.open_def.open_local.split(":"))
+        local = days + pd.Timedelta(hours=hh, minutes=mm)
+        utc = local.tz_localize(self.open_def.tz, ambiguous=True, nonexistent="shift_forward")
+        first_id = int(days[0].value // NS_PER_DAY) + 1
+        # One assignment, as in SessionCalendar._build
+        self._table = (utc.tz_convert("UTC").as_unit("ns").asi8, first_id)
+        self.first_year = first_year
+        self.last_year = last_year
+
+    def _covering(self, ts_ns: np.ndarray) -> Tuple[np.ndarray, int]:
+        table = self._table
+        if ts_ns.size == 0:
+            return table
+        lo, hi = int(ts_ns.min()), int(ts_ns.max())
+        if lo >= table[0][0] and hi < table[0][-1]:
+            return table
+        self._build(
+            min(self.first_year, pd.Timestamp(lo).year),
+            max(self.last_year, pd.Timestamp(hi).year),
+        )
+        return self._table
+
+    def day_ids(self, ts_ns) -> np.ndarray:
+        """
+        FX-day id per UTC epoch-ns value.
+        """
+        ts_ns = np.asarray(ts_ns, dtype=np.int64)
+        open_ns, first_id = self._covering(ts_ns)
+        return np.searchsorted(open_ns, ts_ns, side="right") - 1 + first_id
+
+    def day_starts(self, day_ids) -> np.ndarray:
+        """
+        UTC epoch-ns open of each FX-day id.
+        """
+        day_ids = np.asarray(day_ids, dtype=np.int64)
+        # Noon UTC of the open date lies inside the covered range iff the
+        # open does
+        open_ns, first_id = self._covering((day_ids - 1) * NS_PER_DAY + NS_PER_DAY // 2)
+        return open_ns[day_ids - first_id]
+
+
+_NS_PER_UNIT = {"s": 1_000_000_000, "ms": 1_000_000, "us": 1_000, "ns": 1}
+
+
+def utc_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """
+    UTC epoch-ns of a DatetimeIndex (naive = UTC). Scales the int64 values
+    directly; as_unit("ns") is much slower on large non-ns indexes.
+    """
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.asi8 * _NS_PER_UNIT[index.unit]
+
+
+_calendar: Optional[SessionCalendar] = None
+
+
+def get_session_calendar() -> SessionCalendar:
+    """
+    Shared calendar for FX_SESSION_CALENDAR, built on first use.
+    """
+    global _calendar
+    if _calendar is None:
+        _calendar = SessionCalendar()
+    return _calendar
+
+
+_fx_days: Optional[FxDayCalendar] = None
+
+
+def get_fx_day_calendar() -> FxDayCalendar:
+    """
+    Shared calendar for FX_DAY_OPEN, built on first use.
+    """
+    global _fx_days
+    if _fx_days is None:
+        _fx_days = FxDayCalendar()
+    return _fx_days
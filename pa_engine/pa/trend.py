@@ -25,6 +25,10 @@ class TrendState:
     tf: Optional[str] = None  # e.g. 'M15','H1'
 
 
+# Feature columns read by infer_trend_state (default ema_col)
+TREND_FEATURES = ("ema_50",)
+
+
 def infer_trend_state(
     df: pd.DataFrame,
     swings: List[LabeledSwingPoint],
@@ -0,0 +1,34 @@
+-- Raw MT5 quote ticks (bid/ask) for tick ingestion mode.
+-- Written in bulk with COPY by TimescaleRepo.insert_ticks; true bid/ask M1
+-- bars are derived from these and written to live_market_data_m1.
+
+CREATE TABLE IF NOT EXISTS live_ticks (
+    instrument      VARCHAR(20)       NOT NULL,
+    "timestamp"     TIMESTAMPTZ       NOT NULL,   -- true UTC, millisecond precision
+    bid             DOUBLE PRECISION  NOT NULL,
+    ask             DOUBLE PRECISION  NOT NULL,
+    last            DOUBLE PRECISION,
+    volume          DOUBLE PRECISION,
+    flags           INTEGER,
+    account_id      VARCHAR(64),
+    received_at     TIMESTAMPTZ       NOT NULL DEFAULT NOW()
+);
+
+-- Six symbols at peak (XAUUSD / BTCUSD bursts) stay well under ~30M rows/day;
+-- daily chunks keep the uncompressed working set small.
+SELECT create_hypertable(
+    'live_ticks', 'timestamp',
+    chunk_time_interval => INTERVAL '1 day',
+    if_not_exists => TRUE
+);
+
+CREATE INDEX IF NOT EXISTS idx_live_ticks_inst_ts
+ON live_ticks (instrument, "timestamp" DESC);
+
+ALTER TABLE live_ticks SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'instrument',
+    timescaledb.compress_orderby   = '"timestamp" DESC'
+);
+
+SELECT add_compression_policy('live_ticks', INTERVAL '2 days', if_not_exists => TRUE);
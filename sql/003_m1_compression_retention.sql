@@ -0,0 +1,95 @@
+-- Native compression for the M1 hypertables and retention for the live one.
+--
+-- Segmenting by instrument keeps each instrument's rows together, so the
+-- per-instrument range scans of load_m1_candles / find_m1_gaps only
+-- decompress the segments they need; ordering by "timestamp" matches their
+-- ORDER BY. The NUMERIC(18,8) price columns compress far better than row
+-- storage.
+--
+-- The ages below are the defaults from settings.yaml (maintenance:). After
+-- changing them there, re-apply with:
+--   python -m src.maintenance --apply-policies
+
+-- ------------------------------------------------------------------
+-- Compression
+-- ------------------------------------------------------------------
+ALTER TABLE live_market_data_m1 SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'instrument',
+    timescaledb.compress_orderby   = '"timestamp"'
+);
+
+ALTER TABLE market_data_m1 SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'instrument',
+    timescaledb.compress_orderby   = '"timestamp"'
+);
+
+-- Live chunks stay uncompressed longer than gap_repair.lookback_days, so
+-- repaired minutes land in row storage.
+SELECT add_compression_policy('live_market_data_m1', INTERVAL '21 days', if_not_exists => TRUE);
+SELECT add_compression_policy('market_data_m1', INTERVAL '30 days', if_not_exists => TRUE);
+
+-- ------------------------------------------------------------------
+-- Live retention: drop old live chunks only once historical covers them
+-- ------------------------------------------------------------------
+-- Walks live chunks older than config.retain_after from the oldest up and
+-- stops at the first chunk holding a row with no (instrument, "timestamp")
+-- match in the historical table; everything before it is dropped with
+-- drop_chunks. A minute that only exists in live is never deleted.
+CREATE OR REPLACE PROCEDURE prune_live_m1(job_id INT, config JSONB)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    live_table    REGCLASS    := COALESCE(config->>'live_table', 'live_market_data_m1')::regclass;
+    hist_table    REGCLASS    := COALESCE(config->>'historical_table', 'market_data_m1')::regclass;
+    older_than    TIMESTAMPTZ := now() - COALESCE(config->>'retain_after', '60 days')::interval;
+    covered_until TIMESTAMPTZ;
+    uncovered     BOOLEAN;
+    c             RECORD;
+BEGIN
+    FOR c IN
+        SELECT ch.range_start, ch.range_end
+        FROM timescaledb_information.chunks ch
+        WHERE format('%I.%I', ch.hypertable_schema, ch.hypertable_name)::regclass = live_table
+          AND ch.range_end <= older_than
+        ORDER BY ch.range_start
+    LOOP
+        EXECUTE format(
+            'SELECT EXISTS (
+                 SELECT 1 FROM %s l
+                 WHERE l."timestamp" >= $1 AND l."timestamp" < $2
+                   AND NOT EXISTS (
+                       SELECT 1 FROM %s h
+                       WHERE h.instrument = l.instrument AND h."timestamp" = l."timestamp"
+                   )
+             )',
+            live_table, hist_table
+        )
+        INTO uncovered
+        USING c.range_start, c.range_end;
+
+        EXIT WHEN uncovered;
+        covered_until := c.range_end;
+    END LOOP;
+
+    IF covered_until IS NOT NULL THEN
+        PERFORM drop_chunks(live_table, older_than => covered_until);
+        RAISE NOTICE 'prune_live_m1: dropped % chunks before %', live_table, covered_until;
+    END IF;
+END
+$$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'prune_live_m1'
+    ) THEN
+        PERFORM add_job(
+            'prune_live_m1',
+            INTERVAL '1 day',
+            config => '{"retain_after": "60 days"}'::jsonb
+        );
+    END IF;
+END
+$$;
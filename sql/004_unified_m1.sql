@@ -0,0 +1,121 @@
+-- One row per (instrument, minute) across historical + live M1.
+--
+-- market_data_m1 and live_market_data_m1 overlap (the streamer keeps
+-- writing minutes that later arrive in a historical load), so a UNION ALL
+-- returns those minutes twice. This table is maintained by row triggers on
+-- both sources and keeps, per minute, the row of the highest-precedence
+-- source:
+--     1 = historical (validated loads)   2 = live (streamer)
+-- A lower rank replaces a higher one; a live row never overwrites a
+-- historical one. pa_engine.db.candles.load_m1_candles reads it when
+-- database.unified_table is set in settings.yaml.
+
+CREATE TABLE IF NOT EXISTS market_data_m1_unified (
+    instrument      VARCHAR(20)     NOT NULL,
+    "timestamp"     TIMESTAMPTZ     NOT NULL,
+    bid_open        NUMERIC(18, 8)  NOT NULL,
+    bid_high        NUMERIC(18, 8)  NOT NULL,
+    bid_low         NUMERIC(18, 8)  NOT NULL,
+    bid_close       NUMERIC(18, 8)  NOT NULL,
+    ask_open        NUMERIC(18, 8),
+    ask_high        NUMERIC(18, 8),
+    ask_low         NUMERIC(18, 8),
+    ask_close       NUMERIC(18, 8),
+    norm_volume     NUMERIC(15, 2),               -- live: tick_count, else volume
+    data_source     VARCHAR(16)     NOT NULL,     -- 'historical' | 'live'
+    source_rank     SMALLINT        NOT NULL,
+    PRIMARY KEY (instrument, "timestamp")
+);
+
+SELECT create_hypertable(
+    'market_data_m1_unified', 'timestamp',
+    chunk_time_interval => INTERVAL '7 days',
+    if_not_exists => TRUE
+);
+
+-- ------------------------------------------------------------------
+-- Maintenance triggers
+-- ------------------------------------------------------------------
+-- TG_ARGV[0] = data_source, TG_ARGV[1] = source_rank
+CREATE OR REPLACE FUNCTION m1_unified_upsert() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    src  TEXT     := TG_ARGV[0];
+    rnk  SMALLINT := TG_ARGV[1]::smallint;
+    vol  NUMERIC;
+BEGIN
+    IF src = 'live' THEN
+        vol := COALESCE(NEW.tick_count::numeric, NEW.volume::numeric);
+    ELSE
+        vol := NEW.volume::numeric;
+    END IF;
+
+    INSERT INTO market_data_m1_unified AS u (
+        instrument, "timestamp",
+        bid_open, bid_high, bid_low, bid_close,
+        ask_open, ask_high, ask_low, ask_close,
+        norm_volume, data_source, source_rank
+    )
+    VALUES (
+        NEW.instrument, NEW."timestamp",
+        NEW.bid_open, NEW.bid_high, NEW.bid_low, NEW.bid_close,
+        NEW.ask_open, NEW.ask_high, NEW.ask_low, NEW.ask_close,
+        vol, src, rnk
+    )
+    ON CONFLICT (instrument, "timestamp") DO UPDATE SET
+        bid_open    = EXCLUDED.bid_open,
+        bid_high    = EXCLUDED.bid_high,
+        bid_low     = EXCLUDED.bid_low,
+        bid_close   = EXCLUDED.bid_close,
+        ask_open    = EXCLUDED.ask_open,
+        ask_high    = EXCLUDED.ask_high,
+        ask_low     = EXCLUDED.ask_low,
+        ask_close   = EXCLUDED.ask_close,
+        norm_volume = EXCLUDED.norm_volume,
+        data_source = EXCLUDED.data_source,
+        source_rank = EXCLUDED.source_rank
+    WHERE EXCLUDED.source_rank <= u.source_rank;
+
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_m1_unified_historical ON market_data_m1;
+CREATE TRIGGER trg_m1_unified_historical
+AFTER INSERT OR UPDATE ON market_data_m1
+FOR EACH ROW EXECUTE FUNCTION m1_unified_upsert('historical', '1');
+
+DROP TRIGGER IF EXISTS trg_m1_unified_live ON live_market_data_m1;
+CREATE TRIGGER trg_m1_unified_live
+AFTER INSERT OR UPDATE ON live_market_data_m1
+FOR EACH ROW EXECUTE FUNCTION m1_unified_upsert('live', '2');
+
+-- ------------------------------------------------------------------
+-- Initial fill (historical first, then live minutes it does not have)
+-- ------------------------------------------------------------------
+INSERT INTO market_data_m1_unified
+SELECT
+    instrument, "timestamp",
+    bid_open, bid_high, bid_low, bid_close,
+    ask_open, ask_high, ask_low, ask_close,
+    volume::numeric, 'historical', 1
+FROM market_data_m1
+ON CONFLICT (instrument, "timestamp") DO NOTHING;
+
+INSERT INTO market_data_m1_unified
+SELECT
+    instrument, "timestamp",
+    bid_open, bid_high, bid_low, bid_close,
+    ask_open, ask_high, ask_low, ask_close,
+    COALESCE(tick_count::numeric, volume::numeric), 'live', 2
+FROM live_market_data_m1
+ON CONFLICT (instrument, "timestamp") DO NOTHING;
+
+ALTER TABLE market_data_m1_unified SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'instrument',
+    timescaledb.compress_orderby   = '"timestamp"'
+);
+
+SELECT add_compression_policy('market_data_m1_unified', INTERVAL '30 days', if_not_exists => TRUE);
@@ -0,0 +1,37 @@
+-- Store the PA-facing candle source (market_data_m1_unified) as float8.
+--
+-- NUMERIC(18,8) is exact but slow: every aggregate runs in software
+-- arithmetic and every value reaches Python as a Decimal, so pandas ends up
+-- with object columns. Broker prices have at most 5-6 decimals, well inside
+-- float8's 15-16 significant digits, so nothing observable is lost. The
+-- source tables keep NUMERIC; the trigger from 004 casts on insert.
+--
+-- Column types cannot change while compression is enabled, so this
+-- decompresses, alters and re-enables compression. Run it in a quiet
+-- window; it rewrites the table once.
+
+SELECT remove_compression_policy('market_data_m1_unified', if_exists => TRUE);
+
+SELECT decompress_chunk(c, if_compressed => TRUE)
+FROM show_chunks('market_data_m1_unified') c;
+
+ALTER TABLE market_data_m1_unified SET (timescaledb.compress = FALSE);
+
+ALTER TABLE market_data_m1_unified
+    ALTER COLUMN bid_open    TYPE DOUBLE PRECISION,
+    ALTER COLUMN bid_high    TYPE DOUBLE PRECISION,
+    ALTER COLUMN bid_low     TYPE DOUBLE PRECISION,
+    ALTER COLUMN bid_close   TYPE DOUBLE PRECISION,
+    ALTER COLUMN ask_open    TYPE DOUBLE PRECISION,
+    ALTER COLUMN ask_high    TYPE DOUBLE PRECISION,
+    ALTER COLUMN ask_low     TYPE DOUBLE PRECISION,
+    ALTER COLUMN ask_close   TYPE DOUBLE PRECISION,
+    ALTER COLUMN norm_volume TYPE DOUBLE PRECISION;
+
+ALTER TABLE market_data_m1_unified SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'instrument',
+    timescaledb.compress_orderby   = '"timestamp"'
+);
+
+SELECT add_compression_policy('market_data_m1_unified', INTERVAL '30 days', if_not_exists => TRUE);
@@ -0,0 +1,33 @@
+# src/backoff.py
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Backoff:
+    """
+    Exponential backoff with jitter.
+
+    The n-th consecutive failure waits base * 2**(n-1), capped at
+    max_seconds, then scaled by a random factor in [1 - jitter, 1] so that
+    instruments / workers failing together don't retry in lockstep.
+    """
+    base_seconds: float = 1.0
+    max_seconds: float = 60.0
+    jitter: float = 0.5
+    failures: int = 0
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def next_delay(self) -> float:
+        """
+        Record a failure and return how long to wait before retrying.
+        """
+        self.failures += 1
+        delay = min(self.base_seconds * 2 ** (self.failures - 1), self.max_seconds)
+        return delay * (1.0 - self.jitter * self.rng.random())
+
+    def reset(self) -> None:
+        self.failures = 0
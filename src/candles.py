@@ -0,0 +1,262 @@
+# src/candles.py
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1_000_000_000
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_ns(ts: datetime) -> int:
+    """
+    Convert a datetime to int64 epoch nanoseconds (naive values are taken as UTC).
+    """
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH_UTC) // timedelta(microseconds=1) * 1000
+
+
+@dataclass(slots=True)
+class Candle:
+    """
+    Internal candle representation. timestamp_utc is ALWAYS true UTC.
+    Slotted: no per-instance __dict__, which matters for large backfills.
+    """
+    instrument: str
+    timestamp_utc: datetime
+    bid_open: float
+    bid_high: float
+    bid_low: float
+    bid_close: float
+    ask_open: Optional[float]
+    ask_high: Optional[float]
+    ask_low: Optional[float]
+    ask_close: Optional[float]
+    volume: int
+    tick_count: int
+
+
+@dataclass(slots=True)
+class CandleBatch:
+    """
+    Struct-of-arrays candles for ONE instrument, sorted by time.
+
+    ts_ns is true UTC as int64 epoch nanoseconds; prices are float64 and
+    volume / tick_count are int64. This is what the MT5 client produces and
+    what TimescaleRepo.insert_candles consumes without building per-row
+    Candle objects.
+    """
+    instrument: str
+    ts_ns: np.ndarray
+    bid_open: np.ndarray
+    bid_high: np.ndarray
+    bid_low: np.ndarray
+    bid_close: np.ndarray
+    ask_open: np.ndarray
+    ask_high: np.ndarray
+    ask_low: np.ndarray
+    ask_close: np.ndarray
+    volume: np.ndarray
+    tick_count: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.ts_ns.shape[0])
+
+    @classmethod
+    def empty(cls, instrument: str) -> "CandleBatch":
+        f = np.empty(0, dtype=np.float64)
+        i = np.empty(0, dtype=np.int64)
+        return cls(instrument, i, f, f, f, f, f, f, f, f, i, i)
+
+    @classmethod
+    def from_candles(cls, instrument: str, candles: Sequence[Candle]) -> "CandleBatch":
+        """
+        Build a batch from Candle objects (all for `instrument`).
+        Missing ask prices are stored as NaN.
+        """
+        if not candles:
+            return cls.empty(instrument)
+
+        def _f(attr: str) -> np.ndarray:
+            return np.array(
+                [np.nan if getattr(c, attr) is None else getattr(c, attr) for c in candles],
+                dtype=np.float64,
+            )
+
+        ts_ns = np.array([to_epoch_ns(c.timestamp_utc) for c in candles], dtype=np.int64)
+        return cls(
+            instrument=instrument,
+            ts_ns=ts_ns,
+            bid_open=_f("bid_open"),
+            bid_high=_f("bid_high"),
+            bid_low=_f("bid_low"),
+            bid_close=_f("bid_close"),
+            ask_open=_f("ask_open"),
+            ask_high=_f("ask_high"),
+            ask_low=_f("ask_low"),
+            ask_close=_f("ask_close"),
+            volume=np.array([c.volume for c in candles], dtype=np.int64),
+            tick_count=np.array([c.tick_count for c in candles], dtype=np.int64),
+        )
+
+    # ------------------------------------------------------------------ #
+    # Vectorized timestamp filters                                       #
+    # ------------------------------------------------------------------ #
+    def select(self, mask: Union[np.ndarray, slice]) -> "CandleBatch":
+        """
+        Return a new batch with the rows where `mask` is True, or the rows
+        in a slice (views, no copy).
+        """
+        if isinstance(mask, np.ndarray) and mask.all():
+            return self
+        return CandleBatch(
+            instrument=self.instrument,
+            ts_ns=self.ts_ns[mask],
+            bid_open=self.bid_open[mask],
+            bid_high=self.bid_high[mask],
+            bid_low=self.bid_low[mask],
+            bid_close=self.bid_close[mask],
+            ask_open=self.ask_open[mask],
+            ask_high=self.ask_high[mask],
+            ask_low=self.ask_low[mask],
+            ask_close=self.ask_close[mask],
+            volume=self.volume[mask],
+            tick_count=self.tick_count[mask],
+        )
+
+    def before(self, ts: datetime) -> "CandleBatch":
+        """Rows with timestamp_utc < ts."""
+        return self.select(self.ts_ns < to_epoch_ns(ts))
+
+    def after(self, ts: datetime) -> "CandleBatch":
+        """Rows with timestamp_utc > ts."""
+        return self.select(self.ts_ns > to_epoch_ns(ts))
+
+    def since(self, ts: datetime) -> "CandleBatch":
+        """Rows with timestamp_utc >= ts."""
+        return self.select(self.ts_ns >= to_epoch_ns(ts))
+
+    def between(self, start: datetime, end: datetime) -> "CandleBatch":
+        """Rows with start <= timestamp_utc < end."""
+        return self.select((self.ts_ns >= to_epoch_ns(start)) & (self.ts_ns < to_epoch_ns(end)))
+
+    @property
+    def first_timestamp_utc(self) -> Optional[datetime]:
+        if len(self) == 0:
+            return None
+        return from_epoch_ns(int(self.ts_ns[0]))
+
+    @property
+    def last_timestamp_utc(self) -> Optional[datetime]:
+        if len(self) == 0:
+            return None
+        return from_epoch_ns(int(self.ts_ns[-1]))
+
+    def to_candles(self) -> List[Candle]:
+        """
+        Materialize Candle objects (only for callers that still need them).
+        """
+        cols = zip(
+            self.ts_ns.tolist(),
+            self.bid_open.tolist(),
+            self.bid_high.tolist(),
+            self.bid_low.tolist(),
+            self.bid_close.tolist(),
+            self.ask_open.tolist(),
+            self.ask_high.tolist(),
+            self.ask_low.tolist(),
+            self.ask_close.tolist(),
+            self.volume.tolist(),
+            self.tick_count.tolist(),
+        )
+        return [
+            Candle(
+                instrument=self.instrument,
+                timestamp_utc=from_epoch_ns(t),
+                bid_open=bo,
+                bid_high=bh,
+                bid_low=bl,
+                bid_close=bc,
+                ask_open=ao,
+                ask_high=ah,
+                ask_low=al,
+                ask_close=ac,
+                volume=v,
+                tick_count=tc,
+            )
+            for t, bo, bh, bl, bc, ao, ah, al, ac, v, tc in cols
+        ]
+
+
+def from_epoch_ns(ns: int) -> datetime:
+    return _EPOCH_UTC + timedelta(microseconds=ns // 1000)
+
+
+def batch_from_mt5_rates(symbol: str, rates, server_offset_seconds: int) -> CandleBatch:
+    """
+    Convert an MT5 rates structured array into a CandleBatch in one shot.
+
+    rates['time'] encodes SERVER time as epoch (UTC+offset), so true UTC is
+    simply `time - server_offset_seconds`, done on the whole int64 column.
+    Volume uses real_volume when present, else tick_volume, else 0;
+    tick_count uses tick_volume when present, else volume.
+    """
+    if rates is None or len(rates) == 0:
+        return CandleBatch.empty(symbol)
+
+    field_names = rates.dtype.names or ()
+
+    epoch = rates["time"].astype(np.int64)
+    ts_ns = (epoch - np.int64(server_offset_seconds)) * NS_PER_SECOND
+
+    if "real_volume" in field_names:
+        volume = rates["real_volume"].astype(np.int64)
+    elif "tick_volume" in field_names:
+        volume = rates["tick_volume"].astype(np.int64)
+    else:
+        volume = np.zeros(len(rates), dtype=np.int64)
+
+    if "tick_volume" in field_names:
+        tick_count = rates["tick_volume"].astype(np.int64)
+    else:
+        tick_count = volume.copy()
+
+    bid_open = rates["open"].astype(np.float64)
+    bid_high = rates["high"].astype(np.float64)
+    bid_low = rates["low"].astype(np.float64)
+    bid_close = rates["close"].astype(np.float64)
+
+    # MT5 is normally ordered already; only pay for a sort when it isn't.
+    if ts_ns.shape[0] > 1 and np.any(ts_ns[1:] < ts_ns[:-1]):
+        order = np.argsort(ts_ns, kind="stable")
+        ts_ns = ts_ns[order]
+        bid_open, bid_high = bid_open[order], bid_high[order]
+        bid_low, bid_close = bid_low[order], bid_close[order]
+        volume, tick_count = volume[order], tick_count[order]
+
+    # Right now MT5 only gives us one OHLC stream (effectively BID for FX).
+    # ASK mirrors BID; the arrays are shared since batches are read-only.
+    batch = CandleBatch(
+        instrument=symbol,
+        ts_ns=ts_ns,
+        bid_open=bid_open,
+        bid_high=bid_high,
+        bid_low=bid_low,
+        bid_close=bid_close,
+        ask_open=bid_open,
+        ask_high=bid_high,
+        ask_low=bid_low,
+        ask_close=bid_close,
+        volume=volume,
+        tick_count=tick_count,
+    )
+    logger.debug("Built CandleBatch of %d rows for %s", len(batch), symbol)
+    return batch
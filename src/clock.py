@@ -0,0 +1,64 @@
+# src/clock.py
+
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+
+class Clock(ABC):
+    """
+    Source of "now" and of waiting for the streamer. The live service uses
+    the system clock; the simulator and replay substitute their own so the
+    same poll / filter / write code runs against simulated or recorded time.
+    """
+
+    @abstractmethod
+    def now_utc(self) -> datetime:
+        ...
+
+    @abstractmethod
+    def sleep(self, seconds: float) -> None:
+        ...
+
+    def monotonic(self) -> float:
+        """
+        Seconds on a clock that never goes backwards, for retry deadlines.
+        Simulated clocks count their own time.
+        """
+        return self.now_utc().timestamp()
+
+
+class SystemClock(Clock):
+    def now_utc(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(max(seconds, 0))
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class ReplayClock(Clock):
+    """
+    Clock driven by the replayed data: the replay sets it to each step's
+    close time. sleep() moves it forward without waiting, and time never
+    goes backwards.
+    """
+
+    def __init__(self, start_utc: Optional[datetime] = None):
+        self._now = start_utc or datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    def now_utc(self) -> datetime:
+        return self._now
+
+    def set(self, ts_utc: datetime) -> None:
+        if ts_utc > self._now:
+            self._now = ts_utc
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            self._now += timedelta(seconds=seconds)
@@ -3,9 +3,9 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 import yaml
 
@@ -28,6 +28,67 @@ class BrokerTimezoneConfig:
     iana_name: str | None = None
 
 
+@dataclass
+class GapRepairConfig:
+    enabled: bool = False
+    interval_minutes: int = 15
+    lookback_days: int = 14
+    min_missing_minutes: int = 1
+    always_open_instruments: List[str] = field(default_factory=list)
+    # Gaps MT5 had no bars for are skipped for this long, then retried
+    unfillable_retry_hours: float = 24.0
+    max_unfillable_gaps: int = 10_000
+
+
+@dataclass
+class SpoolConfig:
+    enabled: bool = False
+    directory: str = "spool"              # per-job subdirectory is created inside
+    segment_max_records: int = 100_000
+    flush_interval_seconds: float = 5.0
+    flush_max_records: int = 5000
+
+
+@dataclass
+class RetryConfig:
+    # MT5: per-instrument fetch errors and terminal reconnects
+    mt5_base_seconds: float = 5.0
+    mt5_max_seconds: float = 300.0
+    # DB: watermark reads, writer/spool flush retries
+    db_base_seconds: float = 1.0
+    db_max_seconds: float = 60.0
+    jitter: float = 0.5                   # delay scaled by a random [1 - jitter, 1]
+
+
+@dataclass
+class MetricsConfig:
+    enabled: bool = False                 # HTTP endpoint; timings are always recorded
+    host: str = "127.0.0.1"
+    port: int = 9108                      # give each job its own port under --supervise
+    log_every_n_cycles: int = 10          # 0 disables the periodic log summary
+
+
+@dataclass
+class SupervisorConfig:
+    jobs: List[str] = field(default_factory=list)   # empty -> every enabled job
+    shared_queue_max_batches: int = 256
+    health_interval_seconds: int = 30
+    stale_heartbeat_seconds: int = 300
+    restart_backoff_seconds: float = 10.0
+    restart_backoff_max_seconds: float = 300.0
+    # Worker waits this long for the shared writer to confirm a DB commit
+    commit_ack_timeout_seconds: float = 120.0
+
+
+@dataclass
+class MaintenanceConfig:
+    # Postgres interval strings (sql/003_m1_compression_retention.sql)
+    live_compress_after: str = "21 days"          # keep > gap_repair.lookback_days
+    historical_compress_after: str = "30 days"
+    live_retention_after: str = "60 days"          # only chunks covered by historical
+    retention_schedule_interval: str = "1 day"
+
+
 @dataclass
 class StreamingJobConfig:
     name: str
@@ -38,6 +99,17 @@ class StreamingJobConfig:
     poll_interval_seconds: int
     lookback_minutes_on_each_poll: int
     max_backfill_hours_on_startup: int
+    backfill_page_bars: int = 1440
+    ingestion_mode: str = "bars"       # "bars" (MT5 M1 rates) or "ticks"
+    tick_page_seconds: int = 600
+    tick_backfill_minutes: int = 60
+    flush_batch_size: int = 100         # rows coalesced per bulk write
+    write_queue_max_batches: int = 64   # bounded MT5 -> writer queue
+    gap_repair: GapRepairConfig = field(default_factory=GapRepairConfig)
+    spool: SpoolConfig = field(default_factory=SpoolConfig)
+    retry: RetryConfig = field(default_factory=RetryConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    enabled: bool = True
 
 
 @dataclass
@@ -53,6 +125,8 @@ class DatabaseConfig:
     password: str
     default_data_quality_score: int
     statement_timeout_ms: int
+    tick_table: str = "live_ticks"
+    unified_table: Optional[str] = None   # sql/004_unified_m1.sql
 
 
 @dataclass
@@ -70,6 +144,8 @@ class Settings:
     brokers: Dict[str, Dict[str, Any]]
     streaming_defaults: Dict[str, Any]
     streaming_jobs: Dict[str, StreamingJobConfig]
+    supervisor: SupervisorConfig = field(default_factory=SupervisorConfig)
+    maintenance: MaintenanceConfig = field(default_factory=MaintenanceConfig)
 
 
 def _load_env() -> None:
@@ -86,6 +162,13 @@ def _read_yaml() -> Dict[str, Any]:
         return yaml.safe_load(f)
 
 
+def list_job_names() -> List[str]:
+    """
+    Names of the streaming jobs in settings.yaml, in file order.
+    """
+    return list(_read_yaml()["streaming"]["jobs"])
+
+
 def load_settings(job_name: str) -> Settings:
     """
     Load full settings + resolve database credentials + pick a streaming job.
@@ -114,6 +197,8 @@ def load_settings(job_name: str) -> Settings:
         password=os.getenv(db_raw.get("password_env", "DB_PASSWORD")),
         default_data_quality_score=db_raw["default_data_quality_score"],
         statement_timeout_ms=db_raw.get("statement_timeout_ms", 30000),
+        tick_table=db_raw.get("tick_table", "live_ticks"),
+        unified_table=db_raw.get("unified_table"),
     )
 
     brokers = raw["brokers"]
@@ -126,6 +211,10 @@ def load_settings(job_name: str) -> Settings:
     # Build StreamingJobConfig objects for all jobs; we’ll still keep them all
     jobs: Dict[str, StreamingJobConfig] = {}
     for name, j in all_jobs_raw.items():
+        gap_raw = {**streaming_defaults.get("gap_repair", {}), **j.get("gap_repair", {})}
+        spool_raw = {**streaming_defaults.get("spool", {}), **j.get("spool", {})}
+        retry_raw = {**streaming_defaults.get("retry", {}), **j.get("retry", {})}
+        metrics_raw = {**streaming_defaults.get("metrics", {}), **j.get("metrics", {})}
         jobs[name] = StreamingJobConfig(
             name=name,
             broker_key=j["broker_key"],
@@ -143,6 +232,31 @@ def load_settings(job_name: str) -> Settings:
                 "max_backfill_hours_on_startup",
                 streaming_defaults["max_backfill_hours_on_startup"],
             ),
+            backfill_page_bars=j.get(
+                "backfill_page_bars",
+                streaming_defaults.get("backfill_page_bars", 1440),
+            ),
+            ingestion_mode=j.get(
+                "ingestion_mode", streaming_defaults.get("ingestion_mode", "bars")
+            ),
+            tick_page_seconds=j.get(
+                "tick_page_seconds", streaming_defaults.get("tick_page_seconds", 600)
+            ),
+            tick_backfill_minutes=j.get(
+                "tick_backfill_minutes", streaming_defaults.get("tick_backfill_minutes", 60)
+            ),
+            flush_batch_size=j.get(
+                "flush_batch_size", streaming_defaults.get("flush_batch_size", 100)
+            ),
+            write_queue_max_batches=j.get(
+                "write_queue_max_batches",
+                streaming_defaults.get("write_queue_max_batches", 64),
+            ),
+            gap_repair=GapRepairConfig(**gap_raw),
+            spool=SpoolConfig(**spool_raw),
+            retry=RetryConfig(**retry_raw),
+            metrics=MetricsConfig(**metrics_raw),
+            enabled=j.get("enabled", True),
         )
 
     return Settings(
@@ -151,4 +265,6 @@ def load_settings(job_name: str) -> Settings:
         brokers=brokers,
         streaming_defaults=streaming_defaults,
         streaming_jobs=jobs,
+        supervisor=SupervisorConfig(**raw.get("supervisor", {})),
+        maintenance=MaintenanceConfig(**raw.get("maintenance", {})),
     )
@@ -0,0 +1,91 @@
+# src/gaps.py
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Sequence, Tuple
+
+# FX weekend closure in UTC. Brokers close around Fri 21:00/22:00 and reopen
+# around Sun 21:00/22:00 depending on DST, so we take the widest window:
+# anything missing inside it is expected, not a gap.
+FX_WEEKEND_CLOSE_UTC = (4, 21)   # (weekday Mon=0, hour): Friday 21:00
+FX_WEEKEND_OPEN_UTC = (6, 23)    # Sunday 23:00
+
+
+@dataclass
+class GapRange:
+    """
+    A hole in M1 data: minutes in [start_utc, end_utc) are missing.
+    """
+    instrument: str
+    start_utc: datetime
+    end_utc: datetime
+
+    @property
+    def missing_minutes(self) -> int:
+        return int((self.end_utc - self.start_utc).total_seconds() // 60)
+
+
+def _weekend_window_containing_or_after(ts: datetime) -> Tuple[datetime, datetime]:
+    """
+    Return the (close, open) weekend window that contains ts, or the next one.
+    """
+    close_wd, close_hr = FX_WEEKEND_CLOSE_UTC
+    open_wd, open_hr = FX_WEEKEND_OPEN_UTC
+
+    day0 = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    close = day0 + timedelta(days=(close_wd - ts.weekday()) % 7, hours=close_hr)
+    # Step back a week if ts is inside the window that closed earlier
+    if close > ts:
+        prev_close = close - timedelta(days=7)
+        prev_open = prev_close + timedelta(
+            days=(open_wd - close_wd) % 7, hours=open_hr - close_hr
+        )
+        if prev_close <= ts < prev_open:
+            return prev_close, prev_open
+    open_ = close + timedelta(days=(open_wd - close_wd) % 7, hours=open_hr - close_hr)
+    return close, open_
+
+
+def trading_subranges(start_utc: datetime, end_utc: datetime) -> List[Tuple[datetime, datetime]]:
+    """
+    Split [start_utc, end_utc) into the parts that fall outside FX weekend closure.
+    """
+    out: List[Tuple[datetime, datetime]] = []
+    cursor = start_utc
+    while cursor < end_utc:
+        close, open_ = _weekend_window_containing_or_after(cursor)
+        if close <= cursor:
+            # Inside the weekend: jump to the reopen
+            cursor = open_
+            continue
+        piece_end = min(close, end_utc)
+        out.append((cursor, piece_end))
+        cursor = open_
+    return out
+
+
+def exclude_market_closure(
+    gaps: Iterable[GapRange],
+    always_open_instruments: Sequence[str] = (),
+    min_missing_minutes: int = 1,
+) -> List[GapRange]:
+    """
+    Remove FX weekend closure from raw gaps (except for instruments that
+    trade through the weekend, e.g. BTCUSD) and drop pieces that end up
+    shorter than min_missing_minutes.
+    """
+    always_open = set(always_open_instruments)
+    out: List[GapRange] = []
+    for gap in gaps:
+        if gap.instrument in always_open:
+            pieces = [(gap.start_utc, gap.end_utc)]
+        else:
+            pieces = trading_subranges(gap.start_utc, gap.end_utc)
+
+        for start, end in pieces:
+            piece = GapRange(gap.instrument, start, end)
+            if piece.missing_minutes >= min_missing_minutes:
+                out.append(piece)
+    return out
@@ -4,10 +4,13 @@ from __future__ import annotations
 
 import argparse
 import logging
+from datetime import datetime, timezone
 from logging.config import dictConfig
 from pathlib import Path
 
+from .clock import ReplayClock
 from .streamer_service import StreamerService
+from .supervisor import StreamerSupervisor
 from .config_loader import _read_yaml
 
 
@@ -56,19 +59,114 @@ def setup_logging():
     dictConfig(config)
 
 
+def _parse_utc(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def run_replay(args) -> None:
+    # Imported here so the live streamer never loads pandas
+    from .replay import ReplayRunner
+
+    if not args.start or not args.end:
+        raise SystemExit("--replay needs --start and --end")
+    start_utc = _parse_utc(args.start)
+    end_utc = _parse_utc(args.end)
+
+    clock = ReplayClock(start_utc)
+    service = StreamerService(
+        job_name=args.job,
+        db_write=None if args.replay_persist else (lambda batches: None),
+        clock=clock,
+        use_spool=False,
+    )
+    runner = ReplayRunner(
+        service,
+        clock,
+        start_utc,
+        end_utc,
+        instruments=args.instrument,
+        step_minutes=args.replay_step_minutes,
+        pa_every_minutes=args.replay_pa_every,
+        speed=args.replay_speed,
+    )
+    report = runner.run()
+    for line in runner.summary_lines(report):
+        print(line)
+
+
 def main():
     print(">>> main() started")  # hard print, before logging
 
     parser = argparse.ArgumentParser(description="FX M1 MT5 streaming service")
     parser.add_argument(
         "--job",
-        required=True,
-        help="Name of streaming job defined in config/settings.yaml (e.g. 'ict_stream_m1')",
+        action="append",
+        help="Name of streaming job defined in config/settings.yaml (e.g. 'ict_stream_m1'). "
+        "Repeat with --supervise to pick several jobs.",
+    )
+    parser.add_argument(
+        "--supervise",
+        action="store_true",
+        help="Run several jobs (--job ..., else supervisor.jobs / all enabled jobs) "
+        "in worker processes with one shared DB writer",
+    )
+    parser.add_argument(
+        "--scan-gaps",
+        action="store_true",
+        help="List missing M1 ranges for the job's instruments and exit",
+    )
+    parser.add_argument(
+        "--repair-gaps",
+        action="store_true",
+        help="Connect to MT5, backfill missing M1 ranges once and exit",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Stream market_data_m1 bars for --start/--end through the ingestion, "
+        "PA context and strategy path on a replay clock, then print throughput "
+        "and latency",
+    )
+    parser.add_argument("--start", help="Replay start (ISO date/time, UTC)")
+    parser.add_argument("--end", help="Replay end, exclusive (ISO date/time, UTC)")
+    parser.add_argument(
+        "--instrument",
+        action="append",
+        help="Replay only these instruments (default: the job's instruments)",
+    )
+    parser.add_argument("--replay-step-minutes", type=int, default=1)
+    parser.add_argument(
+        "--replay-pa-every",
+        type=int,
+        default=5,
+        help="Build PA + strategy context every N replayed minutes (0 = ingestion only)",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=0.0,
+        help="Market minutes per real minute (0 = as fast as possible)",
+    )
+    parser.add_argument(
+        "--replay-persist",
+        action="store_true",
+        help="Really insert replayed bars into the live table (default: dry run)",
     )
     args = parser.parse_args()
 
     setup_logging()
     logger = logging.getLogger(__name__)
+
+    if args.supervise:
+        StreamerSupervisor(args.job or []).run_forever()
+        return
+
+    if not args.job or len(args.job) > 1:
+        parser.error("exactly one --job is required (use --supervise for several)")
+    args.job = args.job[0]
     logger.info("Starting streaming service with job '%s'...", args.job)
 
     cfg = _read_yaml()
@@ -82,7 +180,32 @@ def main():
 
     logger.debug("Job config: %s", job_cfg)
 
+    if args.replay:
+        run_replay(args)
+        return
+
     service = StreamerService(job_name=args.job)
+
+    if args.scan_gaps:
+        gaps = service.scan_gaps()
+        for gap in gaps:
+            print(
+                f"{gap.instrument:8s} {gap.start_utc.isoformat()} -> "
+                f"{gap.end_utc.isoformat()}  ({gap.missing_minutes} min)"
+            )
+        print(f"{len(gaps)} gaps")
+        return
+
+    if args.repair_gaps:
+        service.mt5_client.connect()
+        try:
+            inserted = service.repair_gaps()
+            service.flush()
+        finally:
+            service.mt5_client.shutdown()
+        logger.info("Gap repair inserted %d candles", inserted)
+        return
+
     service.run_forever()
 
 
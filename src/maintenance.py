@@ -0,0 +1,76 @@
+# src/maintenance.py
+#
+# Storage maintenance for the M1 hypertables (see
+# sql/003_m1_compression_retention.sql):
+#   python -m src.maintenance                    # compression report
+#   python -m src.maintenance --apply-policies   # ages from settings.yaml
+#   python -m src.maintenance --prune-live       # run live retention now
+
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import List, Sequence
+
+from .config_loader import list_job_names, load_settings
+from .timescale_repo import CompressionStats, TimescaleRepo
+
+logger = logging.getLogger(__name__)
+
+
+def _mb(n_bytes: int) -> str:
+    return f"{n_bytes / 1024 / 1024:,.1f} MB"
+
+
+def format_compression_report(stats: Sequence[CompressionStats]) -> List[str]:
+    lines = [
+        f"{'table':24s} {'chunks':>12s} {'before':>12s} {'after':>12s} {'ratio':>7s} {'on disk':>12s}"
+    ]
+    for s in stats:
+        ratio = f"{s.ratio:.1f}x" if s.ratio else "-"
+        lines.append(
+            f"{s.table:24s} {s.compressed_chunks:>5d}/{s.total_chunks:<6d} "
+            f"{_mb(s.before_bytes):>12s} {_mb(s.after_bytes):>12s} {ratio:>7s} {_mb(s.total_bytes):>12s}"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TimescaleDB compression / retention maintenance")
+    parser.add_argument(
+        "--apply-policies",
+        action="store_true",
+        help="Re-install compression policies and the live retention job with the "
+        "ages in settings.yaml (maintenance:)",
+    )
+    parser.add_argument(
+        "--prune-live",
+        action="store_true",
+        help="Drop live chunks older than live_retention_after that historical covers",
+    )
+    args = parser.parse_args()
+
+    # Local import: main.py pulls in the MT5 streamer
+    from .main import setup_logging
+
+    setup_logging()
+
+    # load_settings needs a job name; any job gives the shared sections
+    settings = load_settings(list_job_names()[0])
+    repo = TimescaleRepo(settings.db)
+
+    if args.apply_policies:
+        repo.apply_storage_policies(settings.maintenance)
+    if args.prune_live:
+        repo.prune_live_m1(settings.maintenance.live_retention_after)
+
+    tables = [settings.db.live_table, settings.db.historical_table]
+    if settings.db.unified_table:
+        tables.append(settings.db.unified_table)
+    stats = [repo.compression_stats(table) for table in tables]
+    for line in format_compression_report(stats):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
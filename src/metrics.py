@@ -0,0 +1,238 @@
+# src/metrics.py
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-ms conversions up to multi-minute MT5 stalls / backfills
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+# Close-to-commit latency: a bar closes, then waits for the next poll
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0, 45.0, 60.0, 90.0, 120.0, 300.0, 900.0, 3600.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf"
+    return repr(float(v))
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram (Prometheus semantics) for one label set.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot: +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q-quantile (max if in +Inf).
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+
+class Metrics:
+    """
+    Thread-safe in-process registry of counters and histograms keyed by
+    metric name + labels, rendered in Prometheus text exposition format.
+    """
+
+    def __init__(self, prefix: str = "fx_streamer"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Sequence[float]] = None) -> None:
+        self._help[name] = help_text
+        if buckets is not None:
+            self._buckets[name] = buckets
+
+    # ---------------- recording ---------------- #
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """
+        Observe the wall time of the block in seconds (also on error).
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def total(self, name: str) -> float:
+        """
+        Sum of a counter over all label sets.
+        """
+        with self._lock:
+            return sum(self._counters.get(name, {}).values())
+
+    # ---------------- export ---------------- #
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                full = f"{self.prefix}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{full}{_format_labels(key)} {_format_value(value)}")
+
+            for name in sorted(self._histograms):
+                full = f"{self.prefix}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    bounds = list(hist.buckets) + [math.inf]
+                    for bound, n in zip(bounds, hist.counts):
+                        cumulative += n
+                        le = (("le", _format_value(bound)),)
+                        lines.append(f"{full}_bucket{_format_labels(key, le)} {cumulative}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {_format_value(hist.sum)}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self, group_by: str = "stage") -> List[str]:
+        """
+        One log line per `group_by` label value, merging other labels:
+        count, mean, ~p95 and max for histograms; totals for counters.
+        """
+        out: List[str] = []
+        with self._lock:
+            for name in sorted(self._histograms):
+                merged: Dict[str, Histogram] = {}
+                for key, hist in self._histograms[name].items():
+                    group = dict(key).get(group_by, "")
+                    m = merged.get(group)
+                    if m is None:
+                        m = merged[group] = Histogram(hist.buckets)
+                    m.counts = [a + b for a, b in zip(m.counts, hist.counts)]
+                    m.sum += hist.sum
+                    m.count += hist.count
+                    m.max = max(m.max, hist.max)
+                for group, m in sorted(merged.items()):
+                    if m.count == 0:
+                        continue
+                    label = f"{name}[{group}]" if group else name
+                    out.append(
+                        f"{label}: n={m.count} mean={m.sum / m.count * 1000:.1f}ms "
+                        f"p95<={m.quantile(0.95) * 1000:.1f}ms max={m.max * 1000:.1f}ms"
+                    )
+            for name in sorted(self._counters):
+                total = sum(self._counters[name].values())
+                out.append(f"{name}: {total:g}")
+        return out
+
+
+class MetricsServer:
+    """
+    Serve GET /metrics (Prometheus text format) from a daemon thread.
+    """
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = 9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        if self._server is not None:
+            return
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                logger.debug("metrics %s - " + fmt, self.address_string(), *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True
+        )
+        thread.start()
+        logger.info("Metrics endpoint on http://%s:%d/metrics", self.host, self.port)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
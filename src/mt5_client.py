@@ -1,11 +1,21 @@
 from __future__ import annotations
 
 import logging
+import threading
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
-import MetaTrader5 as mt5
+try:
+    import MetaTrader5 as mt5
+except ImportError:  # Linux / CI: only the simulator (src.mt5_sim) is available
+    mt5 = None
+
+from . import mt5_sim
+from .candles import Candle, CandleBatch, batch_from_mt5_rates
+from .metrics import Metrics
+from .ticks import TickBatch, batch_from_mt5_ticks
 
 logger = logging.getLogger(__name__)
 
@@ -27,41 +37,69 @@ class MT5BrokerConfig:
     password: str
     server: str
     utc_offset_hours: Optional[int] = None
+    # terminal64.exe to attach to; required to run several brokers side by
+    # side (one terminal per process). None -> default installed terminal.
+    terminal_path: Optional[str] = None
 
 
-@dataclass
-class Candle:
+# The simulator uses the same constant values as MetaTrader5
+_tf_api = mt5 if mt5 is not None else mt5_sim
+TIMEFRAME_MAP = {
+    "M1": _tf_api.TIMEFRAME_M1,
+    "M5": _tf_api.TIMEFRAME_M5,
+    "M15": _tf_api.TIMEFRAME_M15,
+    "H1": _tf_api.TIMEFRAME_H1,
+}
+
+TIMEFRAME_SECONDS = {
+    "M1": 60,
+    "M5": 5 * 60,
+    "M15": 15 * 60,
+    "H1": 60 * 60,
+}
+
+
+class MT5Error(RuntimeError):
     """
-    Internal candle representation. timestamp_utc is ALWAYS true UTC.
+    An MT5 data call returned None (request failed or terminal gone).
+    `code` / `message` are mt5.last_error() at the time of the call.
     """
-    instrument: str
-    timestamp_utc: datetime
-    bid_open: float
-    bid_high: float
-    bid_low: float
-    bid_close: float
-    ask_open: Optional[float]
-    ask_high: Optional[float]
-    ask_low: Optional[float]
-    ask_close: Optional[float]
-    volume: int
-    tick_count: int
 
+    def __init__(self, call: str, symbol: str, err, detail: str = ""):
+        self.call = call
+        self.symbol = symbol
+        self.code, self.message = err if isinstance(err, tuple) else (None, str(err))
+        super().__init__(f"{call} failed for {symbol}{detail}: {err}")
 
-TIMEFRAME_MAP = {
-    "M1": mt5.TIMEFRAME_M1,
-    "M5": mt5.TIMEFRAME_M5,
-    "M15": mt5.TIMEFRAME_M15,
-    "H1": mt5.TIMEFRAME_H1,
-}
+
+def _as_utc(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
 
 
 class MT5Client:
-    def __init__(self, cfg: MT5BrokerConfig):
+    def __init__(self, cfg: MT5BrokerConfig, api=None):
+        """
+        api: object exposing the MetaTrader5 module API (e.g. a
+        mt5_sim.SimulatedMT5); defaults to the real MetaTrader5 package.
+        """
+        if api is None:
+            if mt5 is None:
+                raise RuntimeError(
+                    "MetaTrader5 is not installed; use a simulator broker (type: mt5_sim)"
+                )
+            api = mt5
+        self._mt5 = api
         self.cfg = cfg
         # Broker/server offset vs UTC (e.g. UTC+2 -> +2h)
         offset_hours = cfg.utc_offset_hours if cfg.utc_offset_hours is not None else 0
         self.server_offset = timedelta(hours=offset_hours)
+        # The MT5 terminal connection is shared by the live poll and the
+        # background gap repair; serialize calls into it.
+        self._lock = threading.RLock()
+        # Optional stage timings (mt5_fetch / convert), set by the service
+        self.metrics: Optional[Metrics] = None
 
         logger.info(
             "MT5Client initialized for server '%s', login=%s, server UTC offset=%+d h",
@@ -75,121 +113,89 @@ class MT5Client:
     # ------------------------------------------------------------------ #
     def connect(self) -> None:
         """
-        Initialize MetaTrader 5 against the default installed terminal and log in.
+        Initialize MetaTrader 5 against the configured (or default) terminal and log in.
         """
-        logger.info("Initializing MT5 using default terminal...")
-        if not mt5.initialize():
-            err = mt5.last_error()
+        if self.cfg.terminal_path:
+            logger.info("Initializing MT5 using terminal %s...", self.cfg.terminal_path)
+            ok = self._mt5.initialize(path=self.cfg.terminal_path)
+        else:
+            logger.info("Initializing MT5 using default terminal...")
+            ok = self._mt5.initialize()
+        if not ok:
+            err = self._mt5.last_error()
             logger.error("MT5 initialize failed: %s", err)
             raise RuntimeError(f"MT5 initialize failed: {err}")
 
         logger.info("Logging in to server '%s' with login=%s", self.cfg.server, self.cfg.login)
-        authorized = mt5.login(self.cfg.login, password=self.cfg.password, server=self.cfg.server)
+        authorized = self._mt5.login(self.cfg.login, password=self.cfg.password, server=self.cfg.server)
         if not authorized:
-            err = mt5.last_error()
+            err = self._mt5.last_error()
             logger.error("MT5 login failed: %s", err)
             raise RuntimeError(f"MT5 login failed: {err}")
 
         logger.info("Connected to MT5: login=%s server=%s", self.cfg.login, self.cfg.server)
 
+    def is_connected(self) -> bool:
+        """
+        True if the terminal is up and connected to the trade server.
+        """
+        with self._lock:
+            info = self._mt5.terminal_info()
+        return info is not None and bool(info.connected)
+
     def shutdown(self) -> None:
         logger.info("Shutting down MT5 connection...")
-        mt5.shutdown()
+        self._mt5.shutdown()
         logger.info("MT5 connection shutdown")
 
+    def _timed(self, stage: str, symbol: str):
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.timer("stage_seconds", stage=stage, instrument=symbol)
+
     # ------------------------------------------------------------------ #
     # Core candle conversion                                             #
     # ------------------------------------------------------------------ #
-    def _build_candles_from_rates(self, symbol: str, rates) -> List[Candle]:
+    def _build_candle_batch_from_rates(self, symbol: str, rates) -> CandleBatch:
         """
-        Convert MT5 structured array to our Candle list with **true UTC** timestamps.
+        Convert MT5 structured array to a CandleBatch with **true UTC** timestamps.
 
         MT5 behaviour (from your tests):
           - rates['time'] encodes SERVER time as epoch (UTC+offset).
-        So:
-          1) server_time_utc_like = utcfromtimestamp(epoch)
-          2) true_utc = server_time_utc_like - server_offset
-        """
-        if rates is None or len(rates) == 0:
-            return []
-
-        field_names = rates.dtype.names or ()
-        has_real_volume = "real_volume" in field_names
-        has_tick_volume = "tick_volume" in field_names
-
-        candles: List[Candle] = []
-        for r in rates:
-            epoch = int(r["time"])
-
-            # Step 1: interpret epoch as "server time but labelled as UTC"
-            server_utc_like = datetime.utcfromtimestamp(epoch).replace(tzinfo=timezone.utc)
-
-            # Step 2: subtract broker offset to get true UTC
-            ts_utc = server_utc_like - self.server_offset
-
-            bid_open = float(r["open"])
-            bid_high = float(r["high"])
-            bid_low = float(r["low"])
-            bid_close = float(r["close"])
-
-            # Right now MT5 only gives us one OHLC stream.
-            # For FX this is effectively BID. We mirror it to ASK for now;
-            # you can later model spreads explicitly if needed.
-            ask_open = bid_open
-            ask_high = bid_high
-            ask_low = bid_low
-            ask_close = bid_close
-
-            if has_real_volume:
-                volume = int(r["real_volume"])
-            elif has_tick_volume:
-                volume = int(r["tick_volume"])
-            else:
-                volume = 0
-
-            if has_tick_volume:
-                tick_count = int(r["tick_volume"])
-            else:
-                tick_count = volume
-
-            candles.append(
-                Candle(
-                    instrument=symbol,
-                    timestamp_utc=ts_utc,
-                    bid_open=bid_open,
-                    bid_high=bid_high,
-                    bid_low=bid_low,
-                    bid_close=bid_close,
-                    ask_open=ask_open,
-                    ask_high=ask_high,
-                    ask_low=ask_low,
-                    ask_close=ask_close,
-                    volume=volume,
-                    tick_count=tick_count,
-                )
-            )
+        So true_utc = epoch - server_offset, applied to the whole column at once.
+        """
+        offset_seconds = int(self.server_offset.total_seconds())
+        return batch_from_mt5_rates(symbol, rates, offset_seconds)
 
-        candles.sort(key=lambda c: c.timestamp_utc)
+    def _build_candles_from_rates(self, symbol: str, rates) -> List[Candle]:
+        """
+        Convert MT5 structured array to our Candle list with **true UTC** timestamps.
+        Thin wrapper over the columnar conversion for callers that need objects.
+        """
+        candles = self._build_candle_batch_from_rates(symbol, rates).to_candles()
         logger.debug("Built %d Candle objects for %s", len(candles), symbol)
         return candles
 
     # ------------------------------------------------------------------ #
     # Live-friendly retrieval: last N candles                            #
     # ------------------------------------------------------------------ #
-    def copy_rates_recent(
+    def copy_rates_recent_batch(
         self,
         symbol: str,
         timeframe: str,
         limit: int,
-    ) -> List[Candle]:
+    ) -> CandleBatch:
         """
         Fetch the most recent `limit` candles for `symbol` / `timeframe` using
         mt5.copy_rates_from_pos, which is position-based and avoids any timezone
         windowing issues.
 
-        The latest MT5 candle will ALWAYS appear in this list. After conversion
-        with _build_candles_from_rates and DB dedup on timestamp_utc, the latest
-        MT5 candle will be the latest row in the DB (in true UTC).
+        The latest MT5 candle will ALWAYS appear in this batch. After conversion
+        and DB dedup on timestamp_utc, the latest MT5 candle will be the latest
+        row in the DB (in true UTC).
+
+        Raises MT5Error when MT5 returns None; an empty array (nothing
+        there) is an empty batch.
         """
         if timeframe not in TIMEFRAME_MAP:
             raise ValueError(f"Unsupported timeframe: {timeframe}")
@@ -197,19 +203,118 @@ class MT5Client:
 
         logger.debug("Requesting last %d candles for %s (%s)", limit, symbol, timeframe)
 
-        rates = mt5.copy_rates_from_pos(symbol, tf, 0, limit)
+        with self._timed("mt5_fetch", symbol), self._lock:
+            rates = self._mt5.copy_rates_from_pos(symbol, tf, 0, limit)
+            err = self._mt5.last_error() if rates is None else None
         if rates is None:
-            err = mt5.last_error()
-            logger.warning("copy_rates_from_pos returned None for %s: %s", symbol, err)
-            return []
+            raise MT5Error("copy_rates_from_pos", symbol, err)
 
         if len(rates) == 0:
             logger.debug("copy_rates_from_pos returned empty array for %s", symbol)
-            return []
+            return CandleBatch.empty(symbol)
+
+        with self._timed("convert", symbol):
+            return self._build_candle_batch_from_rates(symbol, rates)
+
+    def copy_rates_recent(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+    ) -> List[Candle]:
+        """
+        Same as copy_rates_recent_batch, materialized as Candle objects.
+        """
+        return self.copy_rates_recent_batch(symbol, timeframe, limit).to_candles()
 
-        return self._build_candles_from_rates(symbol, rates)
+    # ------------------------------------------------------------------ #
+    # Historical range retrieval (server-offset aware, paged)            #
+    # ------------------------------------------------------------------ #
+    def _to_server_epoch(self, ts_utc: datetime) -> int:
+        """
+        Inverse of the rates conversion: MT5 expects range bounds in SERVER
+        time encoded as epoch, so add the broker offset to true UTC.
+        """
+        return int((_as_utc(ts_utc) + self.server_offset).timestamp())
+
+    def copy_rates_range_batch(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_utc: datetime,
+        end_utc: datetime,
+    ) -> CandleBatch:
+        """
+        Fetch candles with start_utc <= timestamp_utc < end_utc via
+        mt5.copy_rates_range. Bounds are translated to server time; MT5's
+        range is inclusive on both ends, so the result is trimmed to the
+        half-open UTC window. Raises MT5Error when MT5 returns None.
+        """
+        if timeframe not in TIMEFRAME_MAP:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        tf = TIMEFRAME_MAP[timeframe]
+
+        start_utc = _as_utc(start_utc)
+        end_utc = _as_utc(end_utc)
+        if end_utc <= start_utc:
+            return CandleBatch.empty(symbol)
+
+        date_from = self._to_server_epoch(start_utc)
+        date_to = self._to_server_epoch(end_utc) - 1
+
+        with self._timed("mt5_fetch", symbol), self._lock:
+            rates = self._mt5.copy_rates_range(symbol, tf, date_from, date_to)
+            err = self._mt5.last_error() if rates is None else None
+        if rates is None:
+            raise MT5Error(
+                "copy_rates_range",
+                symbol,
+                err,
+                f" [{start_utc.isoformat()}, {end_utc.isoformat()})",
+            )
+
+        with self._timed("convert", symbol):
+            batch = self._build_candle_batch_from_rates(symbol, rates)
+            return batch.between(start_utc, end_utc)
+
+    def iter_rates_range(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_utc: datetime,
+        end_utc: datetime,
+        page_bars: int = 1440,
+    ) -> Iterator[CandleBatch]:
+        """
+        Yield [start_utc, end_utc) as consecutive CandleBatch pages of at most
+        `page_bars` bars each, oldest first. Each page is a separate MT5 call,
+        so callers can persist a page before the next one is fetched and a
+        multi-week range never sits in memory at once. Empty pages (weekends,
+        holidays) are skipped.
+        """
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        if page_bars <= 0:
+            raise ValueError("page_bars must be positive")
+
+        page_span = timedelta(seconds=TIMEFRAME_SECONDS[timeframe] * page_bars)
+        page_start = _as_utc(start_utc)
+        end_utc = _as_utc(end_utc)
+
+        while page_start < end_utc:
+            page_end = min(page_start + page_span, end_utc)
+            batch = self.copy_rates_range_batch(symbol, timeframe, page_start, page_end)
+            logger.debug(
+                "Range page %s [%s, %s): %d bars",
+                symbol,
+                page_start.isoformat(),
+                page_end.isoformat(),
+                len(batch),
+            )
+            if len(batch) > 0:
+                yield batch
+            page_start = page_end
 
-    # Optional range API, built on top of recent + UTC filtering
     def copy_rates_range(
         self,
         symbol: str,
@@ -218,21 +323,73 @@ class MT5Client:
         end_utc: datetime,
     ) -> List[Candle]:
         """
-        Range wrapper implemented via over-fetching with copy_rates_recent and
-        filtering by UTC. Currently not used by the streaming service.
+        Same as copy_rates_range_batch, materialized as Candle objects.
         """
-        if start_utc.tzinfo is None:
-            start_utc = start_utc.replace(tzinfo=timezone.utc)
-        else:
-            start_utc = start_utc.astimezone(timezone.utc)
+        return self.copy_rates_range_batch(symbol, timeframe, start_utc, end_utc).to_candles()
 
-        if end_utc.tzinfo is None:
-            end_utc = end_utc.replace(tzinfo=timezone.utc)
-        else:
-            end_utc = end_utc.astimezone(timezone.utc)
+    # ------------------------------------------------------------------ #
+    # Tick retrieval                                                     #
+    # ------------------------------------------------------------------ #
+    def copy_ticks_range_batch(
+        self,
+        symbol: str,
+        start_utc: datetime,
+        end_utc: datetime,
+    ) -> TickBatch:
+        """
+        Fetch bid/ask quote ticks (COPY_TICKS_INFO) with
+        start_utc <= ts < end_utc via mt5.copy_ticks_range. MT5 takes
+        whole-second server-time bounds, so the result is trimmed to the
+        exact millisecond window here. Raises MT5Error when MT5 returns None.
+        """
+        start_utc = _as_utc(start_utc)
+        end_utc = _as_utc(end_utc)
+        if end_utc <= start_utc:
+            return TickBatch.empty(symbol)
+
+        date_from = self._to_server_epoch(start_utc)
+        date_to = self._to_server_epoch(end_utc)
+
+        with self._timed("mt5_fetch", symbol), self._lock:
+            ticks = self._mt5.copy_ticks_range(symbol, date_from, date_to, self._mt5.COPY_TICKS_INFO)
+            err = self._mt5.last_error() if ticks is None else None
+        if ticks is None:
+            raise MT5Error(
+                "copy_ticks_range",
+                symbol,
+                err,
+                f" [{start_utc.isoformat()}, {end_utc.isoformat()})",
+            )
 
-        seconds = (end_utc - start_utc).total_seconds()
-        approx_bars = max(1, int(seconds // 60) + 5)
+        offset_seconds = int(self.server_offset.total_seconds())
+        with self._timed("convert", symbol):
+            batch = batch_from_mt5_ticks(symbol, ticks, offset_seconds)
+            start_ms = int(start_utc.timestamp() * 1000)
+            end_ms = int(end_utc.timestamp() * 1000)
+            return batch.select((batch.ts_ms >= start_ms) & (batch.ts_ms < end_ms))
 
-        raw = self.copy_rates_recent(symbol, timeframe, approx_bars)
-        return [c for c in raw if start_utc <= c.timestamp_utc < end_utc]
+    def iter_ticks_range(
+        self,
+        symbol: str,
+        start_utc: datetime,
+        end_utc: datetime,
+        page_seconds: int = 600,
+    ) -> Iterator[TickBatch]:
+        """
+        Yield ticks in [start_utc, end_utc) as pages of `page_seconds` each,
+        oldest first, so catching up after downtime on busy symbols (XAUUSD,
+        BTCUSD) never materializes hours of ticks at once.
+        """
+        if page_seconds <= 0:
+            raise ValueError("page_seconds must be positive")
+
+        page_span = timedelta(seconds=page_seconds)
+        page_start = _as_utc(start_utc)
+        end_utc = _as_utc(end_utc)
+
+        while page_start < end_utc:
+            page_end = min(page_start + page_span, end_utc)
+            batch = self.copy_ticks_range_batch(symbol, page_start, page_end)
+            if len(batch) > 0:
+                yield batch
+            page_start = page_end
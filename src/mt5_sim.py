@@ -0,0 +1,499 @@
+# src/mt5_sim.py
+#
+# Deterministic stand-in for the MetaTrader5 module, selected per broker with
+# `type: "mt5_sim"` in settings.yaml. Serves M1 bars from market_data_m1 CSV
+# exports or a seeded random walk on a clock that can run faster than real
+# time, so the streamer can be load-tested on Linux without a terminal.
+
+from __future__ import annotations
+
+import csv
+import glob
+import logging
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .clock import Clock
+from .gaps import FX_WEEKEND_CLOSE_UTC, FX_WEEKEND_OPEN_UTC
+
+logger = logging.getLogger(__name__)
+
+# Same values as the MetaTrader5 package
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_H1 = 16385
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+_TF_MINUTES = {TIMEFRAME_M1: 1, TIMEFRAME_M5: 5, TIMEFRAME_M15: 15, TIMEFRAME_H1: 60}
+
+# MT5's copy_rates_* / copy_ticks_* layouts
+RATES_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("tick_volume", "<u8"),
+    ("spread", "<i4"),
+    ("real_volume", "<u8"),
+])
+TICKS_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("last", "<f8"),
+    ("volume", "<u8"),
+    ("time_msc", "<i8"),
+    ("flags", "<u4"),
+    ("volume_real", "<f8"),
+])
+_TICK_FLAG_BID_ASK = 2 | 4
+
+DEFAULT_START_PRICES = {
+    "EURUSD": 1.08,
+    "GBPUSD": 1.27,
+    "USDJPY": 150.0,
+    "GBPJPY": 190.0,
+    "XAUUSD": 2000.0,
+    "BTCUSD": 60000.0,
+}
+
+MINUTES_PER_DAY = 1440
+
+
+@dataclass
+class M1Bars:
+    """
+    Bid M1 bars for one symbol; `minute` is the UTC epoch minute of the open.
+    """
+    minute: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    spread: np.ndarray      # ask - bid, price units
+
+    def __len__(self) -> int:
+        return int(self.minute.shape[0])
+
+    def select(self, mask) -> "M1Bars":
+        return M1Bars(*(getattr(self, f)[mask] for f in self.__dataclass_fields__))
+
+    @classmethod
+    def empty(cls) -> "M1Bars":
+        f = np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int64), f, f, f, f, np.empty(0, dtype=np.int64), f)
+
+
+def fx_weekend_mask(minute: np.ndarray) -> np.ndarray:
+    """
+    True for epoch minutes inside the FX weekend closure (Fri 21:00 -> Sun 23:00 UTC).
+    """
+    # 1970-01-01 was a Thursday (weekday 3)
+    week_minute = (minute + 3 * MINUTES_PER_DAY) % (7 * MINUTES_PER_DAY)
+    close = FX_WEEKEND_CLOSE_UTC[0] * MINUTES_PER_DAY + FX_WEEKEND_CLOSE_UTC[1] * 60
+    open_ = FX_WEEKEND_OPEN_UTC[0] * MINUTES_PER_DAY + FX_WEEKEND_OPEN_UTC[1] * 60
+    return (week_minute >= close) & (week_minute < open_)
+
+
+class SimClock(Clock):
+    """
+    Simulated wall clock: starts at start_utc and runs `speedup` times
+    faster than real time. sleep() scales the same way; speedup 0 freezes
+    the clock (tests).
+    """
+
+    def __init__(self, start_utc: Optional[datetime] = None, speedup: float = 1.0):
+        self.start_utc = start_utc or datetime.now(timezone.utc)
+        self.speedup = speedup
+        self._t0 = time.monotonic()
+
+    def now_utc(self) -> datetime:
+        elapsed = (time.monotonic() - self._t0) * self.speedup
+        return datetime.fromtimestamp(self.start_utc.timestamp() + elapsed, tz=timezone.utc)
+
+    def sleep(self, seconds: float) -> None:
+        if self.speedup > 0:
+            time.sleep(max(seconds, 0) / self.speedup)
+
+
+# ---------------------------------------------------------------------- #
+# M1 sources                                                             #
+# ---------------------------------------------------------------------- #
+class RandomWalkSource:
+    """
+    Seeded geometric random walk, generated one UTC day at a time from
+    `anchor_utc` onwards (earlier history does not exist, like a broker's
+    history limit). The same seed always yields the same bars. FX weekend
+    minutes are not served except for always_open symbols.
+    """
+
+    def __init__(
+        self,
+        anchor_utc: datetime,
+        seed: int = 42,
+        volatility_per_minute: float = 0.0002,
+        spread_bps: float = 1.0,
+        start_prices: Optional[Dict[str, float]] = None,
+        always_open: Sequence[str] = (),
+    ):
+        self.anchor_day = int(anchor_utc.timestamp()) // 86400
+        self.seed = seed
+        self.vol = volatility_per_minute
+        self.spread_bps = spread_bps
+        self.start_prices = {**DEFAULT_START_PRICES, **(start_prices or {})}
+        self.always_open = set(always_open)
+        self._days: Dict[str, Dict[int, M1Bars]] = {}
+
+    def _generate_day(self, symbol: str, day: int, level: float) -> M1Bars:
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode()), day])
+        close = level * np.exp(np.cumsum(rng.normal(0.0, self.vol, MINUTES_PER_DAY)))
+        open_ = np.r_[level, close[:-1]]
+        wick = np.abs(rng.normal(0.0, self.vol / 2, (2, MINUTES_PER_DAY))) * close
+        return M1Bars(
+            minute=day * MINUTES_PER_DAY + np.arange(MINUTES_PER_DAY, dtype=np.int64),
+            open=open_,
+            high=np.maximum(open_, close) + wick[0],
+            low=np.minimum(open_, close) - wick[1],
+            close=close,
+            volume=rng.integers(20, 400, MINUTES_PER_DAY).astype(np.int64),
+            spread=close * self.spread_bps * 1e-4,
+        )
+
+    def _day(self, symbol: str, day: int) -> M1Bars:
+        days = self._days.setdefault(symbol, {})
+        if day in days:
+            return days[day]
+        # Walk forward from the last generated day so levels chain up
+        d = max((k for k in days if k < day), default=self.anchor_day - 1)
+        level = days[d].close[-1] if d in days else self.start_prices.get(symbol, 1.0)
+        for d in range(d + 1, day + 1):
+            days[d] = self._generate_day(symbol, d, level)
+            level = days[d].close[-1]
+        return days[day]
+
+    def bars(self, symbol: str, start_min: int, end_min: int) -> M1Bars:
+        start_min = max(start_min, self.anchor_day * MINUTES_PER_DAY)
+        if end_min <= start_min:
+            return M1Bars.empty()
+        parts = []
+        for day in range(start_min // MINUTES_PER_DAY, (end_min - 1) // MINUTES_PER_DAY + 1):
+            b = self._day(symbol, day)
+            parts.append(b.select((b.minute >= start_min) & (b.minute < end_min)))
+        out = M1Bars(*(np.concatenate([getattr(p, f) for p in parts]) for f in M1Bars.__dataclass_fields__))
+        if symbol not in self.always_open:
+            out = out.select(~fx_weekend_mask(out.minute))
+        return out
+
+
+def _parse_ts(raw: str) -> int:
+    """CSV timestamp (e.g. '2025-11-19 05:29:00.000 +0530') -> UTC epoch minute."""
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f %z", "%Y-%m-%d %H:%M:%S %z", "%Y-%m-%d %H:%M:%S%z"):
+        try:
+            return int(datetime.strptime(raw.strip(), fmt).timestamp()) // 60
+        except ValueError:
+            continue
+    ts = datetime.fromisoformat(raw.strip())
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp()) // 60
+
+
+class CsvSource:
+    """
+    Bars from market_data_m1 exports (instrument, timestamp, bid_*, ask_*,
+    volume[, spread_close]). Rows may be in any order; duplicates keep the
+    last occurrence.
+    """
+
+    def __init__(self, pattern: str):
+        rows: Dict[str, list] = {}
+        files = sorted(glob.glob(pattern))
+        if not files:
+            raise FileNotFoundError(f"No CSV files match '{pattern}'")
+        for path in files:
+            with open(path, newline="", encoding="utf-8") as f:
+                for r in csv.DictReader(f):
+                    bid_close = float(r["bid_close"])
+                    ask_close = float(r["ask_close"]) if r.get("ask_close") else bid_close
+                    spread = float(r["spread_close"]) if r.get("spread_close") else ask_close - bid_close
+                    rows.setdefault(r["instrument"], []).append((
+                        _parse_ts(r["timestamp"]),
+                        float(r["bid_open"]),
+                        float(r["bid_high"]),
+                        float(r["bid_low"]),
+                        bid_close,
+                        float(r["volume"] or 0),
+                        spread,
+                    ))
+
+        self._bars: Dict[str, M1Bars] = {}
+        for symbol, data in rows.items():
+            arr = np.array(data, dtype=np.float64)
+            minute = arr[:, 0].astype(np.int64)
+            # Sort and keep the last row per minute
+            order = np.argsort(minute, kind="stable")
+            arr, minute = arr[order], minute[order]
+            keep = np.r_[minute[1:] != minute[:-1], True]
+            arr, minute = arr[keep], minute[keep]
+            self._bars[symbol] = M1Bars(
+                minute, arr[:, 1], arr[:, 2], arr[:, 3], arr[:, 4],
+                arr[:, 5].astype(np.int64), arr[:, 6],
+            )
+        logger.info(
+            "CSV simulator source: %d files, %s",
+            len(files),
+            ", ".join(f"{s}={len(b)}" for s, b in self._bars.items()),
+        )
+
+    def first_minute(self) -> Optional[int]:
+        if not self._bars:
+            return None
+        return min(int(b.minute[0]) for b in self._bars.values())
+
+    def bars(self, symbol: str, start_min: int, end_min: int) -> M1Bars:
+        b = self._bars.get(symbol)
+        if b is None:
+            return M1Bars.empty()
+        i, j = np.searchsorted(b.minute, [start_min, end_min])
+        return b.select(slice(i, j))
+
+
+# ---------------------------------------------------------------------- #
+# Terminal                                                               #
+# ---------------------------------------------------------------------- #
+@dataclass
+class SimTerminalInfo:
+    connected: bool
+    name: str = "mt5-sim"
+
+
+class SimulatedMT5:
+    """
+    Module-like fake of the MetaTrader5 API over an M1 source.
+
+    Implements what MT5Client uses: initialize/login/shutdown, last_error,
+    terminal_info, copy_rates_from_pos, copy_rates_range, copy_ticks_range
+    and the TIMEFRAME_* / COPY_TICKS_* constants. Times are returned in
+    SERVER time (UTC + offset) like the real terminal. Bars up to and
+    including the clock's forming minute are visible; ticks are synthesized
+    per bar along open -> low/high -> close.
+    """
+
+    TIMEFRAME_M1 = TIMEFRAME_M1
+    TIMEFRAME_M5 = TIMEFRAME_M5
+    TIMEFRAME_M15 = TIMEFRAME_M15
+    TIMEFRAME_H1 = TIMEFRAME_H1
+    COPY_TICKS_ALL = COPY_TICKS_ALL
+    COPY_TICKS_INFO = COPY_TICKS_INFO
+    COPY_TICKS_TRADE = COPY_TICKS_TRADE
+
+    def __init__(
+        self,
+        source: Any,
+        clock: Clock,
+        server_offset_hours: float = 0,
+        ticks_per_bar: int = 4,
+        max_lookback_days: int = 30,
+    ):
+        self.source = source
+        self.clock = clock
+        self.offset_s = int(server_offset_hours * 3600)
+        self.ticks_per_bar = max(2, ticks_per_bar)
+        self.max_lookback_days = max_lookback_days
+        self._connected = False
+        self._last_error: Tuple[int, str] = (1, "Success")
+
+    # ---------------- session ---------------- #
+    def initialize(self, path: Optional[str] = None, **kwargs) -> bool:
+        self._connected = True
+        self._last_error = (1, "Success")
+        return True
+
+    def login(self, login: int, password: Optional[str] = None, server: Optional[str] = None, **kwargs) -> bool:
+        return self._connected
+
+    def shutdown(self) -> None:
+        self._connected = False
+
+    def last_error(self) -> Tuple[int, str]:
+        return self._last_error
+
+    def terminal_info(self) -> Optional[SimTerminalInfo]:
+        return SimTerminalInfo(connected=True) if self._connected else None
+
+    # ---------------- helpers ---------------- #
+    def _now_minute(self) -> int:
+        return int(self.clock.now_utc().timestamp()) // 60
+
+    def _to_utc_seconds(self, server_ts) -> int:
+        if isinstance(server_ts, datetime):
+            server_ts = server_ts.replace(tzinfo=timezone.utc).timestamp()
+        return int(server_ts) - self.offset_s
+
+    def _fail(self, code: int, msg: str):
+        self._last_error = (code, msg)
+        return None
+
+    def _m1(self, symbol: str, start_min: int, end_min: int) -> M1Bars:
+        # Nothing after the forming minute exists yet
+        return self.source.bars(symbol, start_min, min(end_min, self._now_minute() + 1))
+
+    @staticmethod
+    def _aggregate(bars: M1Bars, tf_minutes: int) -> M1Bars:
+        if tf_minutes == 1 or len(bars) == 0:
+            return bars
+        bucket = bars.minute // tf_minutes * tf_minutes
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        ends = np.r_[starts[1:], len(bucket)] - 1
+        return M1Bars(
+            minute=bucket[starts],
+            open=bars.open[starts],
+            high=np.maximum.reduceat(bars.high, starts),
+            low=np.minimum.reduceat(bars.low, starts),
+            close=bars.close[ends],
+            volume=np.add.reduceat(bars.volume, starts),
+            spread=bars.spread[ends],
+        )
+
+    def _to_rates(self, bars: M1Bars) -> np.ndarray:
+        rates = np.zeros(len(bars), dtype=RATES_DTYPE)
+        rates["time"] = bars.minute * 60 + self.offset_s
+        rates["open"] = bars.open
+        rates["high"] = bars.high
+        rates["low"] = bars.low
+        rates["close"] = bars.close
+        rates["tick_volume"] = bars.volume
+        return rates
+
+    # ---------------- API ---------------- #
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int):
+        if not self._connected:
+            return self._fail(-10004, "No IPC connection")
+        tf = _TF_MINUTES.get(timeframe)
+        if tf is None:
+            return self._fail(-2, "Invalid timeframe")
+
+        need = start_pos + count
+        end_min = (self._now_minute() // tf + 1) * tf
+        span = need * tf
+        while True:
+            bars = self._aggregate(self._m1(symbol, end_min - span, end_min), tf)
+            if len(bars) >= need or span >= self.max_lookback_days * MINUTES_PER_DAY:
+                break
+            # Weekends / holidays: widen the window
+            span *= 2
+        bars = bars.select(slice(max(len(bars) - need, 0), len(bars) - start_pos))
+        return self._to_rates(bars)
+
+    def copy_rates_range(self, symbol: str, timeframe: int, date_from, date_to):
+        if not self._connected:
+            return self._fail(-10004, "No IPC connection")
+        tf = _TF_MINUTES.get(timeframe)
+        if tf is None:
+            return self._fail(-2, "Invalid timeframe")
+
+        from_s = self._to_utc_seconds(date_from)
+        to_s = self._to_utc_seconds(date_to)
+        # Bars whose open time is within [from, to], both inclusive
+        start_min = -(-from_s // (60 * tf)) * tf
+        end_min = (to_s // (60 * tf) + 1) * tf
+        bars = self._aggregate(self._m1(symbol, start_min, end_min), tf)
+        return self._to_rates(bars.select(bars.minute >= start_min))
+
+    def copy_ticks_range(self, symbol: str, date_from, date_to, flags: int):
+        if not self._connected:
+            return self._fail(-10004, "No IPC connection")
+
+        from_ms = self._to_utc_seconds(date_from) * 1000
+        to_ms = self._to_utc_seconds(date_to) * 1000 + 999
+        bars = self._m1(symbol, from_ms // 60_000, to_ms // 60_000 + 1)
+
+        n, k = len(bars), self.ticks_per_bar
+        if n == 0:
+            return np.zeros(0, dtype=TICKS_DTYPE)
+        # Path open -> low -> high -> close on up bars, open -> high -> low -> close on down bars
+        up = bars.close >= bars.open
+        path = np.stack([
+            bars.open,
+            np.where(up, bars.low, bars.high),
+            np.where(up, bars.high, bars.low),
+            bars.close,
+        ], axis=1)
+        # k ticks spread evenly along the 4-point path (linear in between)
+        pos = np.linspace(0, 3, k)
+        seg = np.minimum(pos.astype(np.int64), 2)
+        frac = pos - seg
+        bid = path[:, seg] * (1 - frac) + path[:, seg + 1] * frac
+        offsets_ms = (np.arange(k) * (60_000 // k)).astype(np.int64)
+        ts_ms = (bars.minute[:, None] * 60_000 + offsets_ms[None, :]).ravel()
+
+        ticks = np.zeros(n * k, dtype=TICKS_DTYPE)
+        ticks["time_msc"] = ts_ms + self.offset_s * 1000
+        ticks["time"] = ticks["time_msc"] // 1000
+        ticks["bid"] = bid.ravel()
+        ticks["ask"] = ticks["bid"] + np.repeat(bars.spread, k)
+        ticks["flags"] = _TICK_FLAG_BID_ASK
+        ticks["volume_real"] = np.repeat(bars.volume / k, k)
+
+        now_ms = int(self.clock.now_utc().timestamp() * 1000)
+        keep = (ts_ms >= from_ms) & (ts_ms <= to_ms) & (ts_ms <= now_ms)
+        return ticks[keep]
+
+
+def build_simulator(sim_cfg: Dict[str, Any], server_offset_hours: float) -> SimulatedMT5:
+    """
+    Build a SimulatedMT5 from a broker's `simulation` block in settings.yaml.
+    """
+    source_kind = sim_cfg.get("source", "random_walk")
+    start_raw = sim_cfg.get("start_utc")
+    start_utc = None
+    if start_raw:
+        start_utc = datetime.fromisoformat(str(start_raw).replace("Z", "+00:00"))
+        if start_utc.tzinfo is None:
+            start_utc = start_utc.replace(tzinfo=timezone.utc)
+
+    if source_kind == "csv":
+        source = CsvSource(sim_cfg.get("csv_glob", "market_data_m1_*.csv"))
+        if start_utc is None:
+            # Start right after the first bar so the CSV plays forward
+            first = source.first_minute() or 0
+            start_utc = datetime.fromtimestamp((first + 1) * 60, tz=timezone.utc)
+    elif source_kind == "random_walk":
+        start_utc = start_utc or datetime.now(timezone.utc)
+        history_days = sim_cfg.get("history_days", 7)
+        source = RandomWalkSource(
+            anchor_utc=datetime.fromtimestamp(
+                start_utc.timestamp() - history_days * 86400, tz=timezone.utc
+            ),
+            seed=sim_cfg.get("seed", 42),
+            volatility_per_minute=sim_cfg.get("volatility_per_minute", 0.0002),
+            spread_bps=sim_cfg.get("spread_bps", 1.0),
+            start_prices=sim_cfg.get("start_prices"),
+            always_open=sim_cfg.get("always_open_instruments", []),
+        )
+    else:
+        raise ValueError(f"Unsupported simulation source: {source_kind}")
+
+    clock = SimClock(start_utc, speedup=float(sim_cfg.get("speedup", 1.0)))
+    logger.info(
+        "MT5 simulator: source=%s start=%s speedup=%gx",
+        source_kind,
+        start_utc.isoformat(),
+        clock.speedup,
+    )
+    return SimulatedMT5(
+        source,
+        clock,
+        server_offset_hours=server_offset_hours,
+        ticks_per_bar=sim_cfg.get("ticks_per_bar", 4),
+    )
@@ -0,0 +1,133 @@
+# src/pipeline.py
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+from .backoff import Backoff
+from .candles import CandleBatch
+
+logger = logging.getLogger(__name__)
+
+
+class CandleWriter(threading.Thread):
+    """
+    DB side of the ingestion pipeline.
+
+    Producers (the MT5 poll loop, gap repair) submit() CandleBatch objects
+    into a bounded queue. This thread drains it, coalescing batches across
+    instruments until `flush_batch_size` rows are collected (or the queue is
+    empty), and hands them to `write` as ONE call, i.e. one bulk INSERT or
+    one spool append.
+
+    When the writer lags, the queue fills and submit() blocks, so MT5
+    fetching slows down instead of buffering unbounded memory. A failed
+    write is retried with the same rows; nothing is dropped.
+
+    `inbox` may be any joinable queue (e.g. multiprocessing.JoinableQueue
+    shared by worker processes); items only need a len() in rows.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[CandleBatch]], None],
+        flush_batch_size: int = 100,
+        queue_max_batches: int = 64,
+        flush_interval_seconds: float = 1.0,
+        max_retry_seconds: float = 60.0,
+        inbox: Optional[Any] = None,
+        backoff: Optional[Backoff] = None,
+    ):
+        super().__init__(name="candle-writer", daemon=True)
+        self.write = write
+        self.flush_batch_size = max(1, flush_batch_size)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_retry_seconds = max_retry_seconds
+        # DB retry schedule, independent of the MT5 reconnect backoff
+        self.backoff = backoff or Backoff(flush_interval_seconds, max_retry_seconds)
+        self.queue = inbox if inbox is not None else queue.Queue(maxsize=queue_max_batches)
+        self.stop_event = threading.Event()
+
+    # ---------------- producer side ---------------- #
+    def submit(self, batch: CandleBatch, timeout: Optional[float] = None) -> None:
+        """
+        Enqueue a batch for writing. Blocks while the queue is full
+        (backpressure); raises queue.Full if `timeout` expires first.
+        """
+        if len(batch) == 0:
+            return
+        self.queue.put(batch, timeout=timeout)
+
+    def join_queue(self) -> None:
+        """
+        Block until every submitted batch has been written.
+        """
+        self.queue.join()
+
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+    # ---------------- consumer side ---------------- #
+    def _collect(self, first: CandleBatch) -> List[CandleBatch]:
+        batches = [first]
+        rows = len(first)
+        while rows < self.flush_batch_size:
+            try:
+                batch = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            batches.append(batch)
+            rows += len(batch)
+        return batches
+
+    def _write_with_retry(self, batches: List[CandleBatch]) -> None:
+        while True:
+            try:
+                self.write(batches)
+                self.backoff.reset()
+                return
+            except Exception as e:
+                retry_delay = self.backoff.next_delay()
+                logger.warning(
+                    "Candle write failed (%d rows, %d batches queued), retrying in %.0fs: %s",
+                    sum(len(b) for b in batches),
+                    self.queue.qsize(),
+                    retry_delay,
+                    e,
+                )
+                if self.stop_event.wait(retry_delay):
+                    raise
+
+    def flush_once(self, timeout: Optional[float] = None) -> int:
+        """
+        Write one coalesced group. Returns the number of rows written
+        (0 if nothing arrived within `timeout`).
+        """
+        try:
+            first = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return 0
+
+        batches = self._collect(first)
+        try:
+            self._write_with_retry(batches)
+        finally:
+            for _ in batches:
+                self.queue.task_done()
+        rows = sum(len(b) for b in batches)
+        logger.debug("Wrote %d rows from %d batches", rows, len(batches))
+        return rows
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                self.flush_once(timeout=self.flush_interval_seconds)
+            except Exception as e:
+                logger.error("Candle writer stopped with unwritten rows: %s", e)
+                return
+
+    def stop(self) -> None:
+        self.stop_event.set()
@@ -0,0 +1,225 @@
+# src/replay.py
+#
+# Replay recorded M1 bars from market_data_m1 through the live pipeline:
+# the same filter / writer path as a poll, then PA context and strategy
+# context on a rolling window, all on a ReplayClock. Measures throughput and
+# per-stage latency on real days without waiting for the market.
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .candles import NS_PER_SECOND, CandleBatch, from_epoch_ns
+from .clock import ReplayClock
+from .metrics import Metrics
+from .streamer_service import StreamerService
+
+logger = logging.getLogger(__name__)
+
+NS_PER_MINUTE = 60 * NS_PER_SECOND
+
+
+def batch_to_m1_frame(batch: CandleBatch) -> pd.DataFrame:
+    """
+    CandleBatch -> the frame pa_engine expects from load_m1_candles:
+    naive-UTC ts_utc index, bid OHLC as open/high/low/close, norm_volume.
+    """
+    index = pd.DatetimeIndex(batch.ts_ns.astype("datetime64[ns]"), name="ts_utc")
+    return pd.DataFrame(
+        {
+            "instrument": batch.instrument,
+            "open": batch.bid_open,
+            "high": batch.bid_high,
+            "low": batch.bid_low,
+            "close": batch.bid_close,
+            "norm_volume": batch.volume.astype(np.float64),
+            "data_source": "historical",
+        },
+        index=index,
+    )
+
+
+@dataclass
+class ReplayReport:
+    bars: int = 0
+    steps: int = 0
+    pa_runs: int = 0
+    strategy_errors: int = 0
+    wall_seconds: float = 0.0
+    per_instrument: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def bars_per_second(self) -> float:
+        return self.bars / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+class ReplayRunner:
+    """
+    Step through [start_utc, end_utc) in `step_minutes` increments (empty
+    steps, e.g. weekends, are skipped). Each step:
+
+      1) sets the ReplayClock to the step's close, so the bars of the step
+         are closed and the next one would be forming;
+      2) feeds each instrument's bars to StreamerService.ingest_batch
+         (filter + bounded writer queue, as in a live poll);
+      3) every `pa_every_minutes`, builds the PA context from the last
+         `pa_window_hours` of M1 and the strategy context from it.
+
+    `speed` 0 runs as fast as possible; otherwise a step waits
+    step_minutes * 60 / speed real seconds. Writes go wherever the service
+    sends them (pass db_write to StreamerService for a dry run).
+    close_to_commit_seconds is taken on the replay clock, so it shows how far
+    (in replayed time) the writer lags behind the feed.
+    """
+
+    def __init__(
+        self,
+        service: StreamerService,
+        clock: ReplayClock,
+        start_utc: datetime,
+        end_utc: datetime,
+        instruments: Optional[Sequence[str]] = None,
+        step_minutes: int = 1,
+        pa_every_minutes: int = 5,
+        pa_window_hours: int = 24,
+        tfs: Sequence[str] = ("M1", "M5", "M15", "H1"),
+        base_tf: str = "M5",
+        htf_tf: str = "M15",
+        speed: float = 0.0,
+    ):
+        if step_minutes < 1:
+            raise ValueError("step_minutes must be >= 1")
+        self.service = service
+        self.clock = clock
+        self.start_utc = start_utc
+        self.end_utc = end_utc
+        self.instruments = list(instruments or service.instruments)
+        self.step_minutes = step_minutes
+        self.pa_every_minutes = pa_every_minutes
+        self.pa_window_hours = pa_window_hours
+        self.tfs = tuple(tfs)
+        self.base_tf = base_tf
+        self.htf_tf = htf_tf
+        self.speed = speed
+
+        self.metrics: Metrics = service.metrics
+        self.metrics.describe(
+            "replay_step_to_strategy_seconds",
+            "Replay: bars released to strategy context built, per instrument",
+        )
+        self.metrics.describe("replay_bars_total", "Replay: bars fed to the pipeline")
+
+    # ------------------------------------------------------------------ #
+    # Loading                                                            #
+    # ------------------------------------------------------------------ #
+    def load(self) -> Dict[str, CandleBatch]:
+        bars: Dict[str, CandleBatch] = {}
+        for inst in self.instruments:
+            with self.metrics.timer("stage_seconds", stage="replay_load", instrument=inst):
+                batch = self.service.db.load_historical_m1(inst, self.start_utc, self.end_utc)
+            logger.info("[%s] Loaded %d historical bars for replay", inst, len(batch))
+            bars[inst] = batch
+        return bars
+
+    def _step_ends(self, bars: Dict[str, CandleBatch]) -> np.ndarray:
+        step_ns = self.step_minutes * NS_PER_MINUTE
+        all_ts = [b.ts_ns for b in bars.values() if len(b)]
+        if not all_ts:
+            return np.empty(0, dtype=np.int64)
+        return (np.unique(np.concatenate(all_ts) // step_ns) + 1) * step_ns
+
+    # ------------------------------------------------------------------ #
+    # PA + strategy                                                      #
+    # ------------------------------------------------------------------ #
+    def _run_strategy(self, inst: str, frame: pd.DataFrame, end_row: int, report: ReplayReport) -> None:
+        # pa_engine reads DB settings at import time: load it only when used
+        from pa_engine.pa.context import build_pa_context_from_m1
+        from pa_engine.pa.strategy_context import build_strategy_context
+
+        window_ns = self.pa_window_hours * 3600 * NS_PER_SECOND
+        ts = frame.index.asi8
+        start_row = int(np.searchsorted(ts, ts[end_row - 1] - window_ns, side="right"))
+        df_m1 = frame.iloc[start_row:end_row].copy()
+
+        with self.metrics.timer("stage_seconds", stage="pa_context", instrument=inst):
+            pa_ctx = build_pa_context_from_m1(inst, df_m1, tfs=self.tfs)
+        try:
+            with self.metrics.timer("stage_seconds", stage="strategy", instrument=inst):
+                build_strategy_context(pa_ctx, inst, base_tf=self.base_tf, htf_tf=self.htf_tf)
+        except ValueError as e:
+            # Too little data in base_tf early in the window
+            report.strategy_errors += 1
+            logger.debug("[%s] Strategy context skipped: %s", inst, e)
+        report.pa_runs += 1
+
+    # ------------------------------------------------------------------ #
+    # Main loop                                                          #
+    # ------------------------------------------------------------------ #
+    def run(self) -> ReplayReport:
+        bars = self.load()
+        frames = {inst: batch_to_m1_frame(b) for inst, b in bars.items()} if self.pa_every_minutes else {}
+        cursors = {inst: 0 for inst in bars}
+        report = ReplayReport(per_instrument={inst: 0 for inst in bars})
+        pa_every_ns = self.pa_every_minutes * NS_PER_MINUTE
+        next_pa_ns = 0
+
+        self.service.start_writer()
+        t_start = time.perf_counter()
+
+        for step_end_ns in self._step_ends(bars).tolist():
+            step_t0 = time.perf_counter()
+            self.clock.set(from_epoch_ns(step_end_ns))
+            run_pa = bool(self.pa_every_minutes) and step_end_ns >= next_pa_ns
+            if run_pa:
+                next_pa_ns = (step_end_ns // pa_every_ns + 1) * pa_every_ns
+
+            for inst, batch in bars.items():
+                i = cursors[inst]
+                j = int(np.searchsorted(batch.ts_ns, step_end_ns, side="left"))
+                if j == i:
+                    continue
+                cursors[inst] = j
+
+                with self.metrics.timer("stage_seconds", stage="ingest", instrument=inst):
+                    written = self.service.ingest_batch(batch.select(slice(i, j)))
+                report.bars += written
+                report.per_instrument[inst] += written
+                self.metrics.inc("replay_bars_total", written, instrument=inst)
+
+                if run_pa:
+                    self._run_strategy(inst, frames[inst], j, report)
+                    self.metrics.observe(
+                        "replay_step_to_strategy_seconds",
+                        time.perf_counter() - step_t0,
+                        instrument=inst,
+                    )
+
+            report.steps += 1
+            if self.speed > 0:
+                remaining = self.step_minutes * 60 / self.speed - (time.perf_counter() - step_t0)
+                if remaining > 0:
+                    time.sleep(remaining)
+
+        with self.metrics.timer("stage_seconds", stage="replay_drain", instrument="all"):
+            self.service.flush()
+        report.wall_seconds = time.perf_counter() - t_start
+        return report
+
+    def summary_lines(self, report: ReplayReport) -> List[str]:
+        span = self.end_utc - self.start_utc
+        lines = [
+            f"Replay {self.start_utc.isoformat()} -> {self.end_utc.isoformat()} "
+            f"({span / timedelta(days=1):.2f} days, {len(self.instruments)} instruments)",
+            f"  bars={report.bars} steps={report.steps} pa_runs={report.pa_runs} "
+            f"strategy_skipped={report.strategy_errors}",
+            f"  wall={report.wall_seconds:.2f}s throughput={report.bars_per_second:,.0f} bars/s",
+        ]
+        lines.extend(f"  {line}" for line in self.metrics.summary_lines())
+        return lines
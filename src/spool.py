@@ -0,0 +1,313 @@
+# src/spool.py
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backoff import Backoff
+from .candles import CandleBatch, from_epoch_ns
+
+logger = logging.getLogger(__name__)
+
+# One fixed-width little-endian record per candle (104 bytes)
+SPOOL_RECORD_DTYPE = np.dtype([
+    ("instrument", "S16"),
+    ("ts_ns", "<i8"),
+    ("bid_open", "<f8"),
+    ("bid_high", "<f8"),
+    ("bid_low", "<f8"),
+    ("bid_close", "<f8"),
+    ("ask_open", "<f8"),
+    ("ask_high", "<f8"),
+    ("ask_low", "<f8"),
+    ("ask_close", "<f8"),
+    ("volume", "<i8"),
+    ("tick_count", "<i8"),
+])
+
+_SEGMENT_SUFFIX = ".spool"
+_CHECKPOINT_FILE = "checkpoint.json"
+
+
+@dataclass(frozen=True)
+class SpoolPosition:
+    """
+    Read position: record index within a segment file.
+    """
+    segment: int
+    record: int
+
+
+def _records_from_batches(batches: Sequence[CandleBatch]) -> np.ndarray:
+    n = sum(len(b) for b in batches)
+    rec = np.empty(n, dtype=SPOOL_RECORD_DTYPE)
+    i = 0
+    for b in batches:
+        j = i + len(b)
+        rec["instrument"][i:j] = b.instrument.encode("ascii")
+        for name in SPOOL_RECORD_DTYPE.names[1:]:
+            rec[name][i:j] = getattr(b, name)
+        i = j
+    return rec
+
+
+def _batches_from_records(rec: np.ndarray) -> List[CandleBatch]:
+    """
+    Split records back into one CandleBatch per instrument (order kept).
+    """
+    out: List[CandleBatch] = []
+    for inst in dict.fromkeys(rec["instrument"].tolist()):
+        sub = rec[rec["instrument"] == inst]
+        out.append(
+            CandleBatch(
+                instrument=inst.decode("ascii"),
+                **{name: np.ascontiguousarray(sub[name]) for name in SPOOL_RECORD_DTYPE.names[1:]},
+            )
+        )
+    return out
+
+
+def _update_tail(tail: Dict[str, int], rec: np.ndarray) -> None:
+    """
+    Raise tail[instrument] to the latest ts_ns of each instrument in rec.
+    """
+    insts, inverse = np.unique(rec["instrument"], return_inverse=True)
+    latest = np.full(len(insts), np.iinfo(np.int64).min)
+    np.maximum.at(latest, inverse, rec["ts_ns"])
+    for inst, ns in zip(insts.tolist(), latest.tolist()):
+        name = inst.decode("ascii")
+        tail[name] = max(tail.get(name, ns), ns)
+
+
+class CandleSpool:
+    """
+    Local append-only write-ahead buffer for fetched candles.
+
+    Candles are appended (and fsync'ed) to numbered segment files of
+    fixed-width records before anything touches Postgres. A reader drains
+    from the checkpointed position; commit() advances the checkpoint and
+    deletes fully-drained segments. A torn record at the end of a segment
+    (crash mid-write) is ignored and truncated on the next append.
+    """
+
+    def __init__(self, directory: Path | str, segment_max_records: int = 100_000):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_records = segment_max_records
+        self._lock = threading.Lock()
+
+        segments = self._segments()
+        self._active = segments[-1] if segments else 0
+        self._pos = self._load_checkpoint() or SpoolPosition(segments[0] if segments else 0, 0)
+        # Latest spooled ts_ns per instrument: pending records are scanned
+        # once (on first use), appends keep it current afterwards
+        self._tail_ns: Optional[Dict[str, int]] = None
+
+    # ---------------- files ---------------- #
+    def _segment_path(self, seq: int) -> Path:
+        return self.dir / f"segment-{seq:012d}{_SEGMENT_SUFFIX}"
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(p.stem.split("-")[1]) for p in self.dir.glob(f"segment-*{_SEGMENT_SUFFIX}")
+        )
+
+    def _segment_len(self, seq: int) -> int:
+        path = self._segment_path(seq)
+        if not path.exists():
+            return 0
+        return path.stat().st_size // SPOOL_RECORD_DTYPE.itemsize
+
+    def _load_checkpoint(self) -> Optional[SpoolPosition]:
+        path = self.dir / _CHECKPOINT_FILE
+        if not path.exists():
+            return None
+        raw = json.loads(path.read_text())
+        return SpoolPosition(segment=raw["segment"], record=raw["record"])
+
+    def _write_checkpoint(self, pos: SpoolPosition) -> None:
+        path = self.dir / _CHECKPOINT_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"segment": pos.segment, "record": pos.record}))
+        os.replace(tmp, path)
+
+    # ---------------- writer ---------------- #
+    def append(self, batches: Sequence[CandleBatch]) -> int:
+        """
+        Durably append batches. Returns the number of records written.
+        """
+        rec = _records_from_batches([b for b in batches if len(b) > 0])
+        if rec.shape[0] == 0:
+            return 0
+
+        with self._lock:
+            written = 0
+            while written < rec.shape[0]:
+                room = self.segment_max_records - self._segment_len(self._active)
+                if room <= 0:
+                    self._active += 1
+                    continue
+                chunk = rec[written:written + room]
+                path = self._segment_path(self._active)
+                with open(path, "ab") as f:
+                    # Drop a torn tail record left by a crash mid-write
+                    size = f.tell()
+                    f.truncate(size - size % SPOOL_RECORD_DTYPE.itemsize)
+                    f.write(chunk.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                written += chunk.shape[0]
+            if self._tail_ns is not None:
+                _update_tail(self._tail_ns, rec)
+        return written
+
+    # ---------------- reader ---------------- #
+    def read_pending(self, max_records: int) -> Tuple[List[CandleBatch], SpoolPosition]:
+        """
+        Read up to max_records from the checkpoint onwards.
+        Returns (batches grouped per instrument, position after them).
+        """
+        with self._lock:
+            pos = self._pos
+            chunks: List[np.ndarray] = []
+            remaining = max_records
+            while remaining > 0:
+                seg_len = self._segment_len(pos.segment)
+                if pos.record >= seg_len:
+                    if pos.segment >= self._active:
+                        break
+                    pos = SpoolPosition(pos.segment + 1, 0)
+                    continue
+                count = min(remaining, seg_len - pos.record)
+                chunk = np.fromfile(
+                    self._segment_path(pos.segment),
+                    dtype=SPOOL_RECORD_DTYPE,
+                    count=count,
+                    offset=pos.record * SPOOL_RECORD_DTYPE.itemsize,
+                )
+                chunks.append(chunk)
+                pos = SpoolPosition(pos.segment, pos.record + count)
+                remaining -= count
+
+        if not chunks:
+            return [], pos
+        return _batches_from_records(np.concatenate(chunks)), pos
+
+    def commit(self, pos: SpoolPosition) -> None:
+        """
+        Mark everything before `pos` as persisted and delete drained segments.
+        """
+        with self._lock:
+            self._write_checkpoint(pos)
+            self._pos = pos
+            for seq in self._segments():
+                if seq < pos.segment:
+                    self._segment_path(seq).unlink(missing_ok=True)
+
+    def pending_records(self) -> int:
+        with self._lock:
+            total = 0
+            for seq in self._segments():
+                if seq < self._pos.segment:
+                    continue
+                n = self._segment_len(seq)
+                total += n - self._pos.record if seq == self._pos.segment else n
+            return max(total, 0)
+
+    def _scan_tail(self) -> Dict[str, int]:
+        tail: Dict[str, int] = {}
+        for seq in self._segments():
+            if seq < self._pos.segment:
+                continue
+            first = self._pos.record if seq == self._pos.segment else 0
+            n = self._segment_len(seq)
+            if n <= first:
+                continue
+            rec = np.memmap(self._segment_path(seq), dtype=SPOOL_RECORD_DTYPE, mode="r", shape=(n,))
+            _update_tail(tail, rec[first:])
+            del rec
+        return tail
+
+    def last_timestamps(self) -> Dict[str, datetime]:
+        """
+        Latest spooled timestamp per instrument: records pending when the
+        spool was opened, plus everything appended since. The pending
+        backlog is read once (instrument and ts_ns only), however many
+        instruments ask.
+        """
+        with self._lock:
+            if self._tail_ns is None:
+                self._tail_ns = self._scan_tail()
+            return {inst: from_epoch_ns(ns) for inst, ns in self._tail_ns.items()}
+
+
+class SpoolFlusher(threading.Thread):
+    """
+    Background thread draining a CandleSpool into the DB in bulk.
+
+    `write` receives a list of CandleBatch (several instruments) and must
+    raise on failure; nothing is committed until it returns, so a DB
+    outage just lets the spool grow until the next successful flush.
+    """
+
+    def __init__(
+        self,
+        spool: CandleSpool,
+        write: Callable[[List[CandleBatch]], None],
+        flush_interval_seconds: float = 5.0,
+        max_records: int = 5000,
+        max_retry_seconds: float = 60.0,
+        backoff: Optional[Backoff] = None,
+    ):
+        super().__init__(name="spool-flusher", daemon=True)
+        self.spool = spool
+        self.write = write
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_records = max_records
+        self.max_retry_seconds = max_retry_seconds
+        self.backoff = backoff or Backoff(flush_interval_seconds, max_retry_seconds)
+        self.stop_event = threading.Event()
+
+    def flush_once(self) -> int:
+        """
+        Drain one chunk. Returns the number of records written.
+        """
+        batches, pos = self.spool.read_pending(self.max_records)
+        if not batches:
+            return 0
+        self.write(batches)
+        self.spool.commit(pos)
+        return sum(len(b) for b in batches)
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                n = self.flush_once()
+            except Exception as e:
+                retry_delay = self.backoff.next_delay()
+                logger.warning(
+                    "Spool flush failed (%d records pending), retrying in %.0fs: %s",
+                    self.spool.pending_records(),
+                    retry_delay,
+                    e,
+                )
+                self.stop_event.wait(retry_delay)
+                continue
+
+            self.backoff.reset()
+            if n == 0:
+                self.stop_event.wait(self.flush_interval_seconds)
+            else:
+                logger.debug("Spool flushed %d records", n)
+
+    def stop(self) -> None:
+        self.stop_event.set()
@@ -3,17 +3,46 @@
 from __future__ import annotations
 
 import logging
-import time
+import os
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
+import numpy as np
+import psycopg2
+
+from .backoff import Backoff
+from .candles import CandleBatch, to_epoch_ns
+from .clock import Clock, SystemClock
 from .config_loader import load_settings, Settings
-from .mt5_client import MT5Client, MT5BrokerConfig
+from .gaps import GapRange, exclude_market_closure
+from .metrics import LATENCY_BUCKETS, Metrics, MetricsServer
+from .pipeline import CandleWriter
+from .spool import CandleSpool, SpoolFlusher
+from .ticks import MS_PER_MINUTE, ticks_to_m1_bars
+from .mt5_client import MT5Client, MT5BrokerConfig, MT5Error, TIMEFRAME_SECONDS
+from .mt5_sim import SimulatedMT5, build_simulator
 from .timescale_repo import TimescaleRepo
 
 
 class StreamerService:
-    def __init__(self, job_name: str):
+    def __init__(
+        self,
+        job_name: str,
+        db_write: Optional[Callable[[List[CandleBatch]], None]] = None,
+        clock: Optional[Clock] = None,
+        use_spool: bool = True,
+    ):
+        """
+        db_write replaces the direct bulk INSERT of candle batches, e.g. with
+        the supervisor's shared DB writer. It must return only once the rows
+        are committed: the spool checkpoint and commit metrics follow it.
+
+        clock defaults to the simulator's clock for mt5_sim brokers, else the
+        system clock. Replay passes its own clock and use_spool=False so it
+        never touches the live job's spool directory.
+        """
         # Create a logger per instance/module
         self.logger = logging.getLogger(__name__)
 
@@ -31,15 +60,27 @@ class StreamerService:
         tz_raw = broker_cfg_raw["timezone"]
         utc_offset_hours = tz_raw.get("utc_offset_hours", 0)
 
-        conn_env = broker_cfg_raw["connection_env"]
-
-        # 4) Build MT5BrokerConfig
-        broker_cfg = MT5BrokerConfig(
-            login=int(self._get_env(conn_env["login"])),
-            password=self._get_env(conn_env["password"]),
-            server=self._get_env(conn_env["server"]),
-            utc_offset_hours=utc_offset_hours,
-        )
+        # 4) Build MT5BrokerConfig (or the offline simulator)
+        self.simulator: Optional[SimulatedMT5] = None
+        if broker_cfg_raw.get("type") == "mt5_sim":
+            self.simulator = build_simulator(
+                broker_cfg_raw.get("simulation", {}), utc_offset_hours
+            )
+            broker_cfg = MT5BrokerConfig(
+                login=0,
+                password="",
+                server="simulator",
+                utc_offset_hours=utc_offset_hours,
+            )
+        else:
+            conn_env = broker_cfg_raw["connection_env"]
+            broker_cfg = MT5BrokerConfig(
+                login=int(self._get_env(conn_env["login"])),
+                password=self._get_env(conn_env["password"]),
+                server=self._get_env(conn_env["server"]),
+                utc_offset_hours=utc_offset_hours,
+                terminal_path=broker_cfg_raw.get("terminal_path"),
+            )
 
         # 5) Job-level info
         self.broker_key = job_cfg.broker_key
@@ -49,6 +90,19 @@ class StreamerService:
         self.poll_interval_seconds = job_cfg.poll_interval_seconds
         self.lookback_minutes_on_each_poll = job_cfg.lookback_minutes_on_each_poll
         self.max_backfill_hours_on_startup = job_cfg.max_backfill_hours_on_startup
+        self.backfill_page_bars = job_cfg.backfill_page_bars
+        self.gap_repair_cfg = job_cfg.gap_repair
+        self.ingestion_mode = job_cfg.ingestion_mode
+        self.tick_page_seconds = job_cfg.tick_page_seconds
+        self.tick_backfill_minutes = job_cfg.tick_backfill_minutes
+        self.flush_batch_size = job_cfg.flush_batch_size
+        self.write_queue_max_batches = job_cfg.write_queue_max_batches
+        self.retry_cfg = job_cfg.retry
+        self.metrics_cfg = job_cfg.metrics
+        if self.ingestion_mode not in ("bars", "ticks"):
+            raise ValueError(f"Unsupported ingestion_mode: {self.ingestion_mode}")
+        if self.tick_page_seconds % 60:
+            raise ValueError("tick_page_seconds must be a whole number of minutes")
 
         # 6) Account info
         account_cfg = broker_cfg_raw["accounts"][self.account_key]
@@ -63,23 +117,270 @@ class StreamerService:
             self.timeframe,
         )
 
+        self.clock: Clock = clock or (
+            self.simulator.clock if self.simulator is not None else SystemClock()
+        )
+
         # 7) DB + MT5 client
         self.db = TimescaleRepo(self.settings.db)
-        self.mt5_client = MT5Client(broker_cfg)
+        self.mt5_client = MT5Client(broker_cfg, api=self.simulator)
 
         self.system_source = self.settings.system.source_tag
         self.created_by = self.settings.system.created_by
+        self._db_write = db_write
+
+        # Health (see health_snapshot)
+        self._last_poll_utc: Optional[datetime] = None
+        self._error_count = 0
+
+        # Metrics: recorded always, served over HTTP when enabled
+        self.metrics = Metrics()
+        self.metrics.describe("stage_seconds", "Wall time per pipeline stage and instrument")
+        self.metrics.describe(
+            "close_to_commit_seconds",
+            "Newest bar close to DB commit, per written batch",
+            buckets=LATENCY_BUCKETS,
+        )
+        self.metrics.describe("rows_inserted_total", "Candles committed to the DB")
+        self.metrics.describe("errors_total", "Errors by instrument and kind (mt5/db)")
+        self.metrics.describe("poll_cycles_total", "Completed poll cycles")
+        self.mt5_client.metrics = self.metrics
+        self._metrics_server: Optional[MetricsServer] = None
+        self._cycles = 0
+
+        # Background gap repair state
+        self._stop_event = threading.Event()
+        self._gap_repair_thread: Optional[threading.Thread] = None
+        # Gaps MT5 answered with no bars for (illiquid minutes, history
+        # limits) -> when they were marked; retried once the entry expires
+        self._unfillable_gaps: Dict[Tuple[str, datetime, datetime], datetime] = {}
+
+        # Tick mode: (epoch ms of the last stored tick, ticks stored at that
+        # ms) per instrument; bursts often put several ticks in one ms
+        self._tick_watermark: Dict[str, Tuple[int, int]] = {}
+
+        # 8) Optional write-ahead spool between MT5 and the DB
+        self.spool_cfg = job_cfg.spool
+        self.spool: Optional[CandleSpool] = None
+        self._spool_flusher: Optional[SpoolFlusher] = None
+        if self.spool_cfg.enabled and use_spool:
+            self.spool = CandleSpool(
+                Path(self.spool_cfg.directory) / job_name,
+                segment_max_records=self.spool_cfg.segment_max_records,
+            )
+            self.logger.info(
+                "Spool enabled at %s (%d records pending)",
+                self.spool.dir,
+                self.spool.pending_records(),
+            )
+
+        # Latest candle per instrument that is persisted OR spooled; polls
+        # filter against this instead of asking the DB every cycle
+        self._last_ts: Dict[str, datetime] = {}
+        self._last_ts_lock = threading.Lock()
+
+        # 9) Writer thread: MT5 fetches (producers) hand batches over a
+        # bounded queue; the writer coalesces them into bulk writes
+        self.writer = CandleWriter(
+            write=self._persist_batches,
+            flush_batch_size=self.flush_batch_size,
+            queue_max_batches=self.write_queue_max_batches,
+            backoff=self._new_backoff("db"),
+        )
+
+        # 10) Error isolation: each instrument backs off on its own (MT5 and
+        # DB failures on separate schedules) while the others keep polling
+        self._inst_backoff: Dict[Tuple[str, str], Backoff] = {}
+        self._inst_retry_at: Dict[str, float] = {}
+        self._loop_backoff = {"mt5": self._new_backoff("mt5"), "db": self._new_backoff("db")}
+        self._started = False
 
     @staticmethod
     def _get_env(key: str) -> str:
-        import os
         val = os.getenv(key)
         if val is None:
             raise RuntimeError(f"Environment variable '{key}' is not set")
         return val
 
     def _now_utc(self) -> datetime:
-        return datetime.now(timezone.utc)
+        return self.clock.now_utc()
+
+    def _sleep(self, seconds: float) -> None:
+        self.clock.sleep(seconds)
+
+    # ------------------------------------------------------------------ #
+    # Watermarks + writes (spool-aware)                                  #
+    # ------------------------------------------------------------------ #
+    def _get_last_ts(self, instrument: str) -> Optional[datetime]:
+        """
+        Latest known candle for `instrument`. The DB (and the spool, whose
+        tail may not be drained yet) is consulted only until the in-memory
+        watermark is known.
+        """
+        if instrument in self._last_ts:
+            return self._last_ts[instrument]
+
+        last_ts = self.db.get_last_timestamp_utc(instrument)
+        if self.spool is not None:
+            spooled = self.spool.last_timestamps().get(instrument)
+            if spooled is not None and (last_ts is None or spooled > last_ts):
+                last_ts = spooled
+
+        if last_ts is not None:
+            self._last_ts[instrument] = last_ts
+        return last_ts
+
+    def _write_candles(self, batch: CandleBatch) -> None:
+        """
+        Hand a batch to the writer thread and advance the watermark.
+        Blocks while the write queue is full (backpressure on MT5 fetching).
+        """
+        if len(batch) == 0:
+            return
+
+        self.start_writer()
+        self.writer.submit(batch)
+
+        last = batch.last_timestamp_utc
+        with self._last_ts_lock:
+            prev = self._last_ts.get(batch.instrument)
+            if prev is None or last > prev:
+                self._last_ts[batch.instrument] = last
+
+    def _persist_batches(self, batches: List[CandleBatch]) -> None:
+        """
+        Writer-thread sink: one spool append when the spool is enabled
+        (the flusher drains it to Postgres), otherwise one bulk INSERT.
+        """
+        if self.spool is not None:
+            with self.metrics.timer("stage_seconds", stage="spool_append", instrument="all"):
+                self.spool.append(batches)
+        else:
+            self._write_batches_to_db(batches)
+
+    def _write_batches_to_db(self, batches: List[CandleBatch]) -> None:
+        with self.metrics.timer("stage_seconds", stage="db_insert", instrument="all"):
+            if self._db_write is not None:
+                self._db_write(batches)
+            else:
+                self.db.insert_candle_batches(
+                    batches,
+                    system_source=self.system_source,
+                    created_by=self.created_by,
+                    account_id=self.account_id,
+                )
+        self._record_commit(batches)
+
+    def _record_commit(self, batches: List[CandleBatch]) -> None:
+        now_ns = to_epoch_ns(self._now_utc())
+        tf_ns = TIMEFRAME_SECONDS[self.timeframe] * 1_000_000_000
+        for batch in batches:
+            if len(batch) == 0:
+                continue
+            self.metrics.inc("rows_inserted_total", len(batch), instrument=batch.instrument)
+            close_ns = int(batch.ts_ns[-1]) + tf_ns
+            self.metrics.observe(
+                "close_to_commit_seconds",
+                max(now_ns - close_ns, 0) / 1e9,
+                instrument=batch.instrument,
+            )
+
+    def start_writer(self) -> None:
+        if not self.writer.is_alive():
+            self.writer.start()
+
+    def flush(self) -> None:
+        """
+        Wait for queued candles to be written and, with the spool enabled,
+        drain it to the DB. Used by one-shot commands before exiting.
+        """
+        if self.writer.is_alive():
+            self.writer.join_queue()
+        if self.spool is not None:
+            flusher = self._spool_flusher or SpoolFlusher(
+                self.spool,
+                write=self._write_batches_to_db,
+                max_records=self.spool_cfg.flush_max_records,
+            )
+            while flusher.flush_once():
+                pass
+
+    def start_spool_flusher(self) -> None:
+        if self.spool is None:
+            return
+        if self._spool_flusher is not None and self._spool_flusher.is_alive():
+            return
+        self._spool_flusher = SpoolFlusher(
+            self.spool,
+            write=self._write_batches_to_db,
+            flush_interval_seconds=self.spool_cfg.flush_interval_seconds,
+            max_records=self.spool_cfg.flush_max_records,
+            backoff=self._new_backoff("db"),
+        )
+        self._spool_flusher.start()
+
+    # ------------------------------------------------------------------ #
+    # Error isolation + backoff                                          #
+    # ------------------------------------------------------------------ #
+    def _new_backoff(self, kind: str) -> Backoff:
+        cfg = self.retry_cfg
+        if kind == "db":
+            return Backoff(cfg.db_base_seconds, cfg.db_max_seconds, cfg.jitter)
+        return Backoff(cfg.mt5_base_seconds, cfg.mt5_max_seconds, cfg.jitter)
+
+    @staticmethod
+    def _error_kind(exc: BaseException) -> str:
+        return "db" if isinstance(exc, psycopg2.Error) else "mt5"
+
+    def _instrument_ready(self, instrument: str) -> bool:
+        return self.clock.monotonic() >= self._inst_retry_at.get(instrument, 0.0)
+
+    def _instrument_ok(self, instrument: str) -> None:
+        if self._inst_retry_at.pop(instrument, None) is not None:
+            self.logger.info("[%s] Recovered", instrument)
+        for kind in ("mt5", "db"):
+            backoff = self._inst_backoff.get((instrument, kind))
+            if backoff is not None:
+                backoff.reset()
+
+    def _instrument_failed(self, instrument: str, exc: Exception) -> None:
+        kind = self._error_kind(exc)
+        backoff = self._inst_backoff.setdefault((instrument, kind), self._new_backoff(kind))
+        delay = backoff.next_delay()
+        self._inst_retry_at[instrument] = self.clock.monotonic() + delay
+        self._error_count += 1
+        self.metrics.inc("errors_total", instrument=instrument, kind=kind)
+        self.logger.warning(
+            "[%s] %s error (%d in a row), skipping instrument for %.1fs: %s",
+            instrument,
+            kind.upper(),
+            backoff.failures,
+            delay,
+            exc,
+            exc_info=backoff.failures == 1,
+        )
+
+    def _for_each_instrument(self, action: Callable[[str], None]) -> None:
+        """
+        Run `action` per instrument, isolating failures: a failing instrument
+        is skipped until its own backoff expires, the rest carry on. If any
+        MT5 call failed and the terminal is gone, raise so run_forever
+        reconnects.
+        """
+        mt5_failed = False
+        for inst in self.instruments:
+            if not self._instrument_ready(inst):
+                continue
+            try:
+                action(inst)
+            except Exception as e:
+                self._instrument_failed(inst, e)
+                mt5_failed = mt5_failed or self._error_kind(e) == "mt5"
+            else:
+                self._instrument_ok(inst)
+
+        if mt5_failed and not self.mt5_client.is_connected():
+            raise ConnectionError("MT5 terminal is not connected")
 
     def _compute_startup_range(self, instrument: str) -> datetime:
         last_ts = self.db.get_last_timestamp_utc(instrument)
@@ -98,7 +399,7 @@ class StreamerService:
         self.logger.info("[%s] Last timestamp in DB: %s", instrument, last_ts.isoformat())
         return last_ts - timedelta(minutes=2)
     
-    def _filter_only_closed_candles(self, candles):
+    def _filter_only_closed_candles(self, batch: CandleBatch) -> CandleBatch:
         """
         Remove the currently-forming candle.
         A candle is considered CLOSED if:
@@ -107,83 +408,212 @@ class StreamerService:
         now_utc = self._now_utc()
         current_minute = now_utc.replace(second=0, microsecond=0)
 
-        return [
-            c for c in candles
-            if c.timestamp_utc < current_minute
-        ]
+        return batch.before(current_minute)
+
+
+    def backfill_range(
+        self,
+        instrument: str,
+        start_utc: datetime,
+        end_utc: datetime,
+        after_ts: Optional[datetime] = None,
+    ) -> int:
+        """
+        Backfill [start_utc, end_utc) for one instrument using MT5 range pages
+        of `backfill_page_bars` bars. Each page is inserted as soon as it
+        arrives, so long gaps are repaired without holding them in memory.
 
+        after_ts (if given) drops anything at or before it, e.g. the last
+        timestamp already in the DB. Returns the number of candles inserted.
+        """
+        inserted = 0
+        pages = self.mt5_client.iter_rates_range(
+            instrument,
+            self.timeframe,
+            start_utc,
+            end_utc,
+            page_bars=self.backfill_page_bars,
+        )
+        for page in pages:
+            with self.metrics.timer("stage_seconds", stage="filter", instrument=instrument):
+                page = self._filter_only_closed_candles(page)
+                if after_ts is not None:
+                    page = page.after(after_ts)
+            if len(page) == 0:
+                continue
+
+            self._write_candles(page)
+            inserted += len(page)
+
+        self.logger.info(
+            "[%s] Range backfill [%s, %s) inserted %d candles",
+            instrument,
+            start_utc.isoformat(),
+            end_utc.isoformat(),
+            inserted,
+        )
+        return inserted
 
     def initial_backfill(self) -> None:
         """
-        On startup, fetch a chunk of recent candles and insert only what is missing.
+        On startup, backfill only what is missing for each instrument.
 
-        We avoid time-window queries and instead ask MT5 for "last N" candles,
-        then filter them by:
-          - timestamp_utc >= now_utc - max_backfill_hours_on_startup
-          - timestamp_utc > last_ts_in_db (if exists)
+        The window is [max(now_utc - max_backfill_hours_on_startup, last_ts_in_db),
+        current minute), fetched with MT5 range pages, and rows at or before
+        last_ts_in_db are dropped.
         """
         self.logger.info("Starting initial backfill for job '%s'", self.job_name)
         now_utc = self._now_utc()
-
-        # How many M1 candles do we need to cover max_backfill_hours?
-        # 60 bars per hour * hours + some safety margin
-        bars_per_hour = 60
-        max_bars = self.max_backfill_hours_on_startup * bars_per_hour + 50
+        current_minute = now_utc.replace(second=0, microsecond=0)
 
         min_allowed_ts = now_utc - timedelta(hours=self.max_backfill_hours_on_startup)
 
-        for inst in self.instruments:
-            last_ts = self.db.get_last_timestamp_utc(inst)
+        def backfill_instrument(inst: str) -> None:
+            last_ts = self._get_last_ts(inst)
             self.logger.info(
-                "[%s] Last timestamp in DB before backfill: %s",
+                "[%s] Last known timestamp before backfill: %s",
                 inst,
                 last_ts.isoformat() if last_ts else "None",
             )
 
-            raw_candles = self.mt5_client.copy_rates_recent(inst, self.timeframe, max_bars)
-            # Remove current forming candle
-            raw_candles = self._filter_only_closed_candles(raw_candles)
+            start_utc = min_allowed_ts if last_ts is None else max(min_allowed_ts, last_ts)
+            if start_utc >= current_minute:
+                return
 
-            self.logger.info(
-                "[%s] Initial backfill fetched %d recent candles from MT5",
-                inst,
-                len(raw_candles),
-            )
+            self.backfill_range(inst, start_utc, current_minute, after_ts=last_ts)
 
-            # Filter by max_backfill window
-            filtered = [
-                c for c in raw_candles
-                if c.timestamp_utc >= min_allowed_ts
-            ]
+        self._for_each_instrument(backfill_instrument)
 
-            # Further filter out anything already in DB
-            if last_ts is not None:
-                filtered = [c for c in filtered if c.timestamp_utc > last_ts]
+    # ------------------------------------------------------------------ #
+    # Gap detection + repair                                             #
+    # ------------------------------------------------------------------ #
+    def scan_gaps(self) -> List[GapRange]:
+        """
+        List missing M1 ranges for this job's instruments over the last
+        gap_repair.lookback_days, excluding FX weekend closure.
+        """
+        cfg = self.gap_repair_cfg
+        now_utc = self._now_utc()
+        start_utc = now_utc - timedelta(days=cfg.lookback_days)
 
-            self.logger.info(
-                "[%s] After filtering, %d candles remain to insert",
-                inst,
-                len(filtered),
-            )
+        raw = self.db.find_m1_gaps(
+            self.instruments,
+            start_utc,
+            now_utc,
+            min_missing_minutes=cfg.min_missing_minutes,
+        )
+        return exclude_market_closure(
+            raw,
+            always_open_instruments=cfg.always_open_instruments,
+            min_missing_minutes=cfg.min_missing_minutes,
+        )
 
-            if not filtered:
-                continue
+    def _expire_unfillable_gaps(self, now_utc: datetime) -> None:
+        """
+        Forget unfillable marks older than unfillable_retry_hours or for
+        gaps that left the scan window, and keep at most
+        max_unfillable_gaps (oldest marks go first).
+        """
+        cfg = self.gap_repair_cfg
+        retry_after = now_utc - timedelta(hours=cfg.unfillable_retry_hours)
+        window_start = now_utc - timedelta(days=cfg.lookback_days)
+        self._unfillable_gaps = {
+            key: marked
+            for key, marked in self._unfillable_gaps.items()
+            if marked > retry_after and key[2] > window_start
+        }
+        excess = len(self._unfillable_gaps) - cfg.max_unfillable_gaps
+        if excess > 0:
+            for key in list(self._unfillable_gaps)[:excess]:
+                del self._unfillable_gaps[key]
+
+    def repair_gaps(self) -> int:
+        """
+        Scan for gaps and backfill each one from MT5 in range pages.
+        Returns the number of candles inserted.
+
+        Nothing is repaired while MT5 is disconnected. A gap is marked
+        unfillable only when MT5 answered without bars for it; a failed
+        MT5 call ends the pass and the gap is retried next time.
+        """
+        if not self.mt5_client.is_connected():
+            self.logger.info("Gap repair skipped: MT5 is not connected")
+            return 0
 
-            self.db.insert_candles(
-                filtered,
-                system_source=self.system_source,
-                created_by=self.created_by,
-                account_id=self.account_id,
+        now_utc = self._now_utc()
+        self._expire_unfillable_gaps(now_utc)
+        gaps = self.scan_gaps()
+        pending = [
+            g for g in gaps
+            if (g.instrument, g.start_utc, g.end_utc) not in self._unfillable_gaps
+        ]
+        self.logger.info(
+            "Gap scan found %d gaps (%d to repair, %d known unfillable)",
+            len(gaps),
+            len(pending),
+            len(gaps) - len(pending),
+        )
+
+        total = 0
+        for gap in pending:
+            if self._stop_event.is_set():
+                break
+            self.logger.info(
+                "[%s] Repairing gap [%s, %s) (%d min)",
+                gap.instrument,
+                gap.start_utc.isoformat(),
+                gap.end_utc.isoformat(),
+                gap.missing_minutes,
             )
+            try:
+                inserted = self.backfill_range(gap.instrument, gap.start_utc, gap.end_utc)
+            except MT5Error as e:
+                self.logger.warning("Gap repair stopped, MT5 call failed: %s", e)
+                break
+            if inserted == 0:
+                self._unfillable_gaps[(gap.instrument, gap.start_utc, gap.end_utc)] = now_utc
+            total += inserted
+        self._expire_unfillable_gaps(now_utc)
+        return total
+
+    def _gap_repair_loop(self) -> None:
+        interval_s = self.gap_repair_cfg.interval_minutes * 60
+        while not self._stop_event.is_set():
+            try:
+                self.repair_gaps()
+            except Exception as e:
+                self.logger.error("Error in gap repair: %s", e, exc_info=True)
+            self._stop_event.wait(interval_s)
 
+    def start_gap_repair(self) -> None:
+        """
+        Run gap repair in a daemon thread so it never blocks the live poll.
+        """
+        if not self.gap_repair_cfg.enabled:
+            return
+        if self._gap_repair_thread is not None and self._gap_repair_thread.is_alive():
+            return
+        self._gap_repair_thread = threading.Thread(
+            target=self._gap_repair_loop,
+            name=f"gap-repair-{self.job_name}",
+            daemon=True,
+        )
+        self._gap_repair_thread.start()
+        self.logger.info(
+            "Gap repair started (every %d min, lookback %d days)",
+            self.gap_repair_cfg.interval_minutes,
+            self.gap_repair_cfg.lookback_days,
+        )
 
     def _poll_once(self) -> None:
         """
         Periodic poll:
 
         1) For each instrument, get last N candles from MT5 (small N, e.g. lookback_minutes+5).
-        2) Filter by timestamp_utc > last_ts_in_db.
-        3) Insert whatever is new.
+        2) Filter by timestamp_utc > last known timestamp (DB or spool).
+        3) Write whatever is new (spool first when enabled).
+
+        Instruments are isolated: one failing symbol backs off on its own.
         """
         now_utc = self._now_utc()
 
@@ -191,42 +621,186 @@ class StreamerService:
         bars_per_minute = 1
         max_bars = self.lookback_minutes_on_each_poll * bars_per_minute + 5
 
-        for inst in self.instruments:
-            last_ts = self.db.get_last_timestamp_utc(inst)
-            self.logger.debug("[%s] Last timestamp in DB: %s", inst, last_ts)
+        self._for_each_instrument(lambda inst: self._poll_instrument(inst, now_utc, max_bars))
 
-            raw_candles = self.mt5_client.copy_rates_recent(inst, self.timeframe, max_bars)
+    def _select_new_candles(
+        self, raw_candles: CandleBatch, last_ts: Optional[datetime]
+    ) -> Tuple[CandleBatch, CandleBatch]:
+        """
+        Drop the forming candle, then everything at or before the watermark.
+        Returns (closed candles, new candles).
+        """
+        with self.metrics.timer("stage_seconds", stage="filter", instrument=raw_candles.instrument):
             raw_candles = self._filter_only_closed_candles(raw_candles)
 
-            self.logger.info(
-                "[%s] Poll fetched %d recent candles from MT5",
-                inst,
-                len(raw_candles),
-            )
-
             # If DB has data, keep only new candles
             if last_ts is not None:
-                new_candles = [c for c in raw_candles if c.timestamp_utc > last_ts]
+                new_candles = raw_candles.after(last_ts)
             else:
                 # If no data at all, keep all
                 new_candles = raw_candles
+        return raw_candles, new_candles
+
+    def ingest_batch(self, batch: CandleBatch) -> int:
+        """
+        Feed bars obtained elsewhere (replay) through the same filter and
+        write path as a poll. Returns the number of candles written.
+
+        Only the in-memory watermark applies: a replay starts empty rather
+        than from the live table's latest row.
+        """
+        with self._last_ts_lock:
+            last_ts = self._last_ts.get(batch.instrument)
+        _, new_candles = self._select_new_candles(batch, last_ts)
+        self._write_candles(new_candles)
+        return len(new_candles)
+
+    def _poll_instrument(self, inst: str, now_utc: datetime, max_bars: int) -> None:
+        last_ts = self._get_last_ts(inst)
+        self.logger.debug("[%s] Last known timestamp: %s", inst, last_ts)
+
+        raw_candles = self.mt5_client.copy_rates_recent_batch(inst, self.timeframe, max_bars)
+        raw_candles, new_candles = self._select_new_candles(raw_candles, last_ts)
+
+        self.logger.info(
+            "[%s] Poll fetched %d recent candles from MT5",
+            inst,
+            len(raw_candles),
+        )
+
+        self.logger.info(
+            "[%s] New candles after DB filter: %d",
+            inst,
+            len(new_candles),
+        )
+
+        if len(new_candles) == 0:
+            return
 
+        # The recent window no longer reaches back to the watermark (instrument
+        # was backing off, MT5 reconnected, market reopened): page the hole
+        # from MT5 starting at the watermark instead of leaving it to gap repair
+        tf = timedelta(seconds=TIMEFRAME_SECONDS[self.timeframe])
+        if last_ts is not None and raw_candles.first_timestamp_utc > last_ts + tf:
+            current_minute = now_utc.replace(second=0, microsecond=0)
             self.logger.info(
-                "[%s] New candles after DB filter: %d",
-                inst,
-                len(new_candles),
+                "[%s] Catching up from watermark %s", inst, last_ts.isoformat()
             )
+            self.backfill_range(inst, last_ts, current_minute, after_ts=last_ts)
+            return
 
-            if not new_candles:
-                continue
+        self._write_candles(new_candles)
 
-            self.db.insert_candles(
-                new_candles,
-                system_source=self.system_source,
-                created_by=self.created_by,
-                account_id=self.account_id,
+    # ------------------------------------------------------------------ #
+    # Tick ingestion mode                                                #
+    # ------------------------------------------------------------------ #
+    def _init_tick_watermarks(self) -> None:
+        """
+        Resume each instrument from its last stored tick, or from
+        tick_backfill_minutes ago when the tick table has none.
+        """
+        now_ms = int(self._now_utc().timestamp() * 1000)
+        for inst in self.instruments:
+            watermark = self.db.get_last_tick_watermark(inst)
+            if watermark is None:
+                watermark = (now_ms - self.tick_backfill_minutes * MS_PER_MINUTE, 0)
+            self._tick_watermark[inst] = watermark
+            self.logger.info(
+                "[%s] Tick watermark: %s (%d ticks at that ms)",
+                inst,
+                datetime.fromtimestamp(watermark[0] / 1000, tz=timezone.utc).isoformat(),
+                watermark[1],
             )
 
+    def _poll_ticks_once(self) -> None:
+        """
+        Tick poll:
+
+        1) For each instrument, page through copy_ticks_range from the start
+           of the watermark's minute to now (pages are whole minutes).
+        2) COPY ticks after the (ms, count) watermark into the tick
+           hypertable, so ticks sharing the last stored millisecond that
+           arrive in a later poll are still stored, exactly once.
+        3) Build true bid/ask M1 bars for closed minutes. The forming minute
+           is simply refetched next poll, so a restart never produces a bar
+           from only part of its ticks.
+        """
+        now_utc = self._now_utc()
+        current_minute_ms = int(now_utc.timestamp() * 1000) // MS_PER_MINUTE * MS_PER_MINUTE
+
+        self._for_each_instrument(
+            lambda inst: self._poll_ticks_instrument(inst, now_utc, current_minute_ms)
+        )
+
+    def _poll_ticks_instrument(self, inst: str, now_utc: datetime, current_minute_ms: int) -> None:
+        watermark_ms, seen_at_ms = self._tick_watermark[inst]
+        fetch_from_ms = watermark_ms // MS_PER_MINUTE * MS_PER_MINUTE
+        fetch_from = datetime.fromtimestamp(fetch_from_ms / 1000, tz=timezone.utc)
+
+        n_ticks = 0
+        n_bars = 0
+        pages = self.mt5_client.iter_ticks_range(
+            inst, fetch_from, now_utc, page_seconds=self.tick_page_seconds
+        )
+        for page in pages:
+            fresh = page.after_watermark(watermark_ms, seen_at_ms)
+            if len(fresh):
+                self.db.insert_ticks(fresh, account_id=self.account_id)
+                last_ms = int(fresh.ts_ms[-1])
+                at_last = int(np.count_nonzero(fresh.ts_ms == last_ms))
+                seen_at_ms = seen_at_ms + at_last if last_ms == watermark_ms else at_last
+                watermark_ms = last_ms
+                # Advance per page so a failure later on doesn't re-COPY these
+                self._tick_watermark[inst] = (watermark_ms, seen_at_ms)
+                n_ticks += len(fresh)
+
+            bars = ticks_to_m1_bars(page.before_ms(current_minute_ms))
+            if len(bars):
+                self._write_candles(bars)
+                n_bars += len(bars)
+
+        self.logger.info("[%s] Tick poll stored %d ticks, %d bars", inst, n_ticks, n_bars)
+
+    # ------------------------------------------------------------------ #
+    # Metrics                                                            #
+    # ------------------------------------------------------------------ #
+    def start_metrics_server(self) -> None:
+        if not self.metrics_cfg.enabled or self._metrics_server is not None:
+            return
+        server = MetricsServer(self.metrics, self.metrics_cfg.host, self.metrics_cfg.port)
+        try:
+            server.start()
+        except OSError as e:
+            # Never let a busy port stop ingestion
+            self.logger.error("Metrics endpoint not started: %s", e)
+            return
+        self._metrics_server = server
+
+    def _after_cycle(self) -> None:
+        self._cycles += 1
+        self.metrics.inc("poll_cycles_total")
+        n = self.metrics_cfg.log_every_n_cycles
+        if n and self._cycles % n == 0:
+            self.logger.info("Metrics after %d cycles:", self._cycles)
+            for line in self.metrics.summary_lines():
+                self.logger.info("  %s", line)
+
+    def health_snapshot(self) -> Dict[str, Any]:
+        """
+        Plain-dict status for heartbeats (picklable, JSON-friendly).
+        """
+        with self._last_ts_lock:
+            last_ts = {k: v.isoformat() for k, v in self._last_ts.items()}
+        return {
+            "job": self.job_name,
+            "broker": self.broker_key,
+            "pid": os.getpid(),
+            "last_poll_utc": self._last_poll_utc.isoformat() if self._last_poll_utc else None,
+            "last_candle_utc": last_ts,
+            "write_queue": self.writer.qsize(),
+            "spool_pending": self.spool.pending_records() if self.spool is not None else 0,
+            "errors": self._error_count,
+        }
 
     def run_forever(self) -> None:
         import traceback
@@ -242,19 +816,47 @@ class StreamerService:
             try:
                 self.logger.info("Connecting to MT5...")
                 self.mt5_client.connect()
-                self.logger.info("Connected to MT5. Running initial backfill...")
-                self.initial_backfill()
-                self.logger.info("Initial backfill completed. Entering polling loop.")
+                self.start_writer()
+                self.start_spool_flusher()
+                self.start_metrics_server()
+                if self.ingestion_mode == "ticks":
+                    if not self._started:
+                        self.logger.info("Connected to MT5. Loading tick watermarks...")
+                        self._init_tick_watermarks()
+                    poll = self._poll_ticks_once
+                else:
+                    if not self._started:
+                        self.logger.info("Connected to MT5. Running initial backfill...")
+                        self.initial_backfill()
+                    poll = self._poll_once
+                if self._started:
+                    # Polls catch up from the in-memory watermarks
+                    self.logger.info("Reconnected to MT5. Resuming from in-memory watermarks.")
+                self._started = True
+                self.logger.info("Startup completed. Entering polling loop.")
+                self.start_gap_repair()
 
                 while True:
-                    self._poll_once()
-                    time.sleep(self.poll_interval_seconds)
+                    with self.metrics.timer("stage_seconds", stage="poll_cycle", instrument="all"):
+                        poll()
+                    self._last_poll_utc = self._now_utc()
+                    self._after_cycle()
+                    for backoff in self._loop_backoff.values():
+                        backoff.reset()
+                    self._sleep(self.poll_interval_seconds)
 
             except Exception as e:
-                self.logger.error("Error in streaming loop: %s", e, exc_info=True)
-                try:
-                    self.mt5_client.shutdown()
-                except Exception:
-                    pass
-                self.logger.info("Sleeping 10 seconds before retrying...")
-                time.sleep(10)
+                self._error_count += 1
+                kind = self._error_kind(e)
+                self.metrics.inc("errors_total", instrument="all", kind=kind)
+                delay = self._loop_backoff[kind].next_delay()
+                self.logger.error(
+                    "%s error in streaming loop: %s", kind.upper(), e, exc_info=True
+                )
+                if kind == "mt5":
+                    try:
+                        self.mt5_client.shutdown()
+                    except Exception:
+                        pass
+                self.logger.info("Retrying in %.1f seconds...", delay)
+                self._sleep(delay)
@@ -0,0 +1,411 @@
+# src/supervisor.py
+
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .candles import CandleBatch
+from .config_loader import Settings, SupervisorConfig, list_job_names, load_settings
+from .pipeline import CandleWriter
+from .timescale_repo import TimescaleRepo
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class JobCandles:
+    """
+    A candle batch tagged with the row metadata of the job that fetched it,
+    as sent from a worker process to the shared DB writer.
+    """
+    job: str
+    account_id: str
+    system_source: str
+    created_by: str
+    batch: CandleBatch
+    # (worker pid, sequence): acknowledged back to the worker once committed
+    ticket: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+
+def write_job_candles(repo: TimescaleRepo, items: Sequence[JobCandles]) -> None:
+    """
+    Bulk insert a coalesced group from several jobs: one INSERT per distinct
+    (account_id, source, created_by) since those are per-row constants.
+    """
+    groups: Dict[Tuple[str, str, str], List[CandleBatch]] = defaultdict(list)
+    for item in items:
+        groups[(item.account_id, item.system_source, item.created_by)].append(item.batch)
+
+    for (account_id, system_source, created_by), batches in groups.items():
+        repo.insert_candle_batches(
+            batches,
+            system_source=system_source,
+            created_by=created_by,
+            account_id=account_id,
+        )
+
+
+def ack_committed(items: Sequence[JobCandles], acks: Dict[str, Any]) -> None:
+    """
+    After a successful write_job_candles: send each job the tickets of its
+    committed items (one list per job) on its ack queue.
+    """
+    tickets: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    for item in items:
+        if item.ticket is not None:
+            tickets[item.job].append(item.ticket)
+    for job, done in tickets.items():
+        ack = acks.get(job)
+        if ack is not None:
+            ack.put(done)
+
+
+class JobForwarder:
+    """
+    Worker-side db_write: send batches to the shared writer and return only
+    once it has committed them, so the worker's spool checkpoint and commit
+    metrics follow the DB commit rather than the hand-off. Raises
+    TimeoutError when no ack arrives in time; the caller then retries
+    (inserts ignore duplicate candles).
+    """
+
+    def __init__(
+        self,
+        job: str,
+        inbox: Any,
+        ack: Any,
+        row_meta: Tuple[str, str, str],
+        ack_timeout_seconds: float = 120.0,
+    ):
+        self.job = job
+        self.inbox = inbox
+        self.ack = ack
+        self.account_id, self.system_source, self.created_by = row_meta
+        self.ack_timeout_seconds = ack_timeout_seconds
+        self._seq = itertools.count()
+        self._pid = os.getpid()
+
+    def __call__(self, batches: List[CandleBatch]) -> None:
+        pending: Set[Tuple[int, int]] = set()
+        for batch in batches:
+            ticket = (self._pid, next(self._seq))
+            pending.add(ticket)
+            self.inbox.put(
+                JobCandles(
+                    job=self.job,
+                    account_id=self.account_id,
+                    system_source=self.system_source,
+                    created_by=self.created_by,
+                    batch=batch,
+                    ticket=ticket,
+                )
+            )
+
+        deadline = time.monotonic() + self.ack_timeout_seconds
+        while pending:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise queue.Empty
+                # Acks of earlier, timed-out calls are simply ignored
+                pending.difference_update(self.ack.get(timeout=remaining))
+            except queue.Empty:
+                raise TimeoutError(
+                    f"{len(pending)} of {len(batches)} batches not committed by the "
+                    f"shared writer within {self.ack_timeout_seconds:.0f}s"
+                ) from None
+
+
+def resolve_jobs(settings: Settings, requested: Sequence[str] = ()) -> List[str]:
+    """
+    Jobs to supervise: explicit names, else supervisor.jobs, else every
+    enabled job in settings.yaml.
+    """
+    names = list(requested) or list(settings.supervisor.jobs)
+    if not names:
+        names = [name for name, job in settings.streaming_jobs.items() if job.enabled]
+
+    unknown = [n for n in names if n not in settings.streaming_jobs]
+    if unknown:
+        raise ValueError(f"Streaming jobs not found in settings.yaml: {', '.join(unknown)}")
+    if not names:
+        raise ValueError("No enabled streaming jobs to supervise")
+    return names
+
+
+# ---------------------------------------------------------------------- #
+# Worker process                                                         #
+# ---------------------------------------------------------------------- #
+def _worker_main(
+    job_name: str,
+    inbox: Any,
+    ack: Any,
+    health: Any,
+    health_interval_seconds: float,
+    ack_timeout_seconds: float,
+) -> None:
+    """
+    Entry point of one worker process: a full StreamerService with its own
+    MT5 terminal session. Candle writes go to the shared writer's queue
+    (blocking when it is full) and wait for its commit ack; heartbeats go
+    to the health queue.
+    """
+    # Imported here so the supervisor process never loads MetaTrader5
+    from .main import setup_logging
+    from .streamer_service import StreamerService
+
+    setup_logging()
+    log = logging.getLogger(f"{__name__}.{job_name}")
+
+    forward: Optional[JobForwarder] = None
+
+    def db_write(batches: List[CandleBatch]) -> None:
+        forward(batches)
+
+    service = StreamerService(job_name, db_write=db_write)
+    forward = JobForwarder(
+        job_name,
+        inbox,
+        ack,
+        (service.account_id, service.system_source, service.created_by),
+        ack_timeout_seconds,
+    )
+
+    def heartbeat() -> None:
+        while True:
+            try:
+                health.put_nowait(service.health_snapshot())
+            except Exception as e:
+                log.warning("Heartbeat failed: %s", e)
+            time.sleep(health_interval_seconds)
+
+    threading.Thread(target=heartbeat, name=f"heartbeat-{job_name}", daemon=True).start()
+    service.run_forever()
+
+
+# ---------------------------------------------------------------------- #
+# Supervisor                                                             #
+# ---------------------------------------------------------------------- #
+@dataclass
+class WorkerHandle:
+    job: str
+    process: Optional[mp.Process] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    next_start_at: float = 0.0
+    backoff_seconds: float = 0.0
+    last_health: Optional[Dict[str, Any]] = None
+    last_heartbeat_at: float = 0.0
+    # (last_poll_utc, errors) of the heartbeats and when it last changed
+    progress: Tuple[Any, Any] = (None, None)
+    progress_at: float = 0.0
+
+    def reset_health(self, now: float) -> None:
+        self.last_heartbeat_at = now
+        self.progress = (None, None)
+        self.progress_at = now
+
+    def record_health(self, snap: Dict[str, Any], now: float) -> None:
+        self.last_health = snap
+        self.last_heartbeat_at = now
+        progress = (snap.get("last_poll_utc"), snap.get("errors"))
+        if progress != self.progress:
+            self.progress = progress
+            self.progress_at = now
+
+    def stale_reason(self, now: float, stale_seconds: float) -> Optional[str]:
+        """
+        Why a live worker must be restarted, or None. Heartbeats come from
+        a thread of their own, so a poll loop stuck in a call keeps sending
+        them: once the worker has polled, neither a new poll nor a new
+        error for stale_seconds also counts as a hang.
+        """
+        if now - self.last_heartbeat_at > stale_seconds:
+            return f"sent no heartbeat for {now - self.last_heartbeat_at:.0f}s"
+        if self.progress[0] is not None and now - self.progress_at > stale_seconds:
+            return f"completed no poll for {now - self.progress_at:.0f}s"
+        return None
+
+
+class StreamerSupervisor:
+    """
+    Run several streaming jobs (typically one per broker) in one service.
+
+    Each job gets its own worker process, since the MetaTrader5 API is a
+    module-global bound to one terminal per process. All workers hand their
+    candles to ONE DB writer in the supervisor (a bounded JoinableQueue, so a
+    lagging DB back-pressures every worker) which acks each job's batches
+    after the commit (see JobForwarder), and send periodic heartbeats
+    that are logged as a health summary. Dead, silent or stalled workers
+    (see WorkerHandle.stale_reason) are restarted with exponential backoff.
+
+    Worker-local DB traffic (watermark reads, gap scans, raw ticks) still
+    uses each worker's own connection.
+    """
+
+    def __init__(self, job_names: Sequence[str] = ()):
+        # load_settings needs a job name; any job gives the shared sections
+        first_job = job_names[0] if job_names else list_job_names()[0]
+        self.settings: Settings = load_settings(first_job)
+        self.cfg: SupervisorConfig = self.settings.supervisor
+        self.jobs = resolve_jobs(self.settings, job_names)
+
+        self._ctx = mp.get_context("spawn")
+        self.inbox = self._ctx.JoinableQueue(maxsize=self.cfg.shared_queue_max_batches)
+        self.health = self._ctx.Queue()
+
+        self.repo = TimescaleRepo(self.settings.db)
+        # Per-job commit acks; replaced whenever the job's worker restarts
+        self._acks: Dict[str, Any] = {}
+        self.writer = CandleWriter(
+            write=self._write_and_ack,
+            flush_batch_size=self.settings.streaming_defaults.get("flush_batch_size", 100),
+            inbox=self.inbox,
+        )
+        self.workers: Dict[str, WorkerHandle] = {job: WorkerHandle(job) for job in self.jobs}
+        self._stop_event = threading.Event()
+
+    def _write_and_ack(self, items: List[JobCandles]) -> None:
+        write_job_candles(self.repo, items)
+        ack_committed(items, self._acks)
+
+    # ---------------- workers ---------------- #
+    def _start_worker(self, handle: WorkerHandle) -> None:
+        ack = self._ctx.Queue()
+        self._acks[handle.job] = ack
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                handle.job,
+                self.inbox,
+                ack,
+                self.health,
+                self.cfg.health_interval_seconds,
+                self.cfg.commit_ack_timeout_seconds,
+            ),
+            name=f"streamer-{handle.job}",
+            daemon=True,
+        )
+        proc.start()
+        handle.process = proc
+        handle.started_at = time.monotonic()
+        handle.reset_health(handle.started_at)
+        logger.info("Started worker for job '%s' (pid %s)", handle.job, proc.pid)
+
+    def _check_worker(self, handle: WorkerHandle, now: float) -> None:
+        proc = handle.process
+        alive = proc is not None and proc.is_alive()
+        stale = handle.stale_reason(now, self.cfg.stale_heartbeat_seconds) if alive else None
+
+        if alive and not stale:
+            # Healthy long enough: forget earlier crashes
+            if now - handle.started_at > self.cfg.restart_backoff_max_seconds:
+                handle.backoff_seconds = 0.0
+            return
+
+        if proc is not None:
+            if stale:
+                logger.error("Worker '%s' %s, restarting", handle.job, stale)
+                proc.terminate()
+            else:
+                logger.error("Worker '%s' exited with code %s", handle.job, proc.exitcode)
+            proc.join(timeout=10)
+            handle.process = None
+            handle.restarts += 1
+            handle.backoff_seconds = min(
+                max(handle.backoff_seconds * 2, self.cfg.restart_backoff_seconds),
+                self.cfg.restart_backoff_max_seconds,
+            )
+            handle.next_start_at = now + handle.backoff_seconds
+            logger.info("Restarting '%s' in %.0fs", handle.job, handle.backoff_seconds)
+
+        if now >= handle.next_start_at:
+            self._start_worker(handle)
+
+    # ---------------- health ---------------- #
+    def _drain_health(self) -> None:
+        while True:
+            try:
+                snap = self.health.get_nowait()
+            except queue.Empty:
+                return
+            handle = self.workers.get(snap.get("job"))
+            if handle is not None:
+                handle.record_health(snap, time.monotonic())
+
+    def health_report(self) -> Dict[str, Any]:
+        """
+        Latest status per job plus the shared writer queue depth.
+        """
+        return {
+            "time_utc": datetime.now(timezone.utc).isoformat(),
+            "shared_write_queue": self.writer.qsize(),
+            "jobs": {
+                job: {
+                    "alive": h.process is not None and h.process.is_alive(),
+                    "pid": h.process.pid if h.process is not None else None,
+                    "restarts": h.restarts,
+                    **(h.last_health or {}),
+                }
+                for job, h in self.workers.items()
+            },
+        }
+
+    def _log_health(self) -> None:
+        report = self.health_report()
+        logger.info("Supervisor health: shared write queue=%d", report["shared_write_queue"])
+        for job, h in report["jobs"].items():
+            logger.info(
+                "  %-28s alive=%s pid=%s restarts=%d last_poll=%s write_queue=%s "
+                "spool_pending=%s errors=%s",
+                job,
+                h["alive"],
+                h["pid"],
+                h["restarts"],
+                h.get("last_poll_utc"),
+                h.get("write_queue"),
+                h.get("spool_pending"),
+                h.get("errors"),
+            )
+
+    # ---------------- main loop ---------------- #
+    def run_forever(self) -> None:
+        logger.info("Supervising jobs: %s", ", ".join(self.jobs))
+        self.writer.start()
+        for handle in self.workers.values():
+            self._start_worker(handle)
+
+        next_report = time.monotonic() + self.cfg.health_interval_seconds
+        try:
+            while not self._stop_event.is_set():
+                self._drain_health()
+                now = time.monotonic()
+                for handle in self.workers.values():
+                    self._check_worker(handle, now)
+                if now >= next_report:
+                    self._log_health()
+                    next_report = now + self.cfg.health_interval_seconds
+                self._stop_event.wait(1.0)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        for handle in self.workers.values():
+            if handle.process is not None and handle.process.is_alive():
+                handle.process.terminate()
+                handle.process.join(timeout=10)
+        self.writer.stop()
@@ -0,0 +1,177 @@
+# src/ticks.py
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from .candles import CandleBatch
+
+MS_PER_MINUTE = 60_000
+NS_PER_MS = 1_000_000
+
+
+@dataclass(slots=True)
+class TickBatch:
+    """
+    Struct-of-arrays MT5 ticks for ONE instrument, sorted by time.
+
+    ts_ms is true UTC as int64 epoch milliseconds (MT5 time_msc minus the
+    broker offset). bid/ask/last/volume are float64, flags int64.
+    """
+    instrument: str
+    ts_ms: np.ndarray
+    bid: np.ndarray
+    ask: np.ndarray
+    last: np.ndarray
+    volume: np.ndarray
+    flags: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.ts_ms.shape[0])
+
+    @classmethod
+    def empty(cls, instrument: str) -> "TickBatch":
+        f = np.empty(0, dtype=np.float64)
+        i = np.empty(0, dtype=np.int64)
+        return cls(instrument, i, f, f, f, f, i)
+
+    @classmethod
+    def concat(cls, instrument: str, batches: Sequence["TickBatch"]) -> "TickBatch":
+        batches = [b for b in batches if len(b) > 0]
+        if not batches:
+            return cls.empty(instrument)
+        if len(batches) == 1:
+            return batches[0]
+        return cls(
+            instrument=instrument,
+            ts_ms=np.concatenate([b.ts_ms for b in batches]),
+            bid=np.concatenate([b.bid for b in batches]),
+            ask=np.concatenate([b.ask for b in batches]),
+            last=np.concatenate([b.last for b in batches]),
+            volume=np.concatenate([b.volume for b in batches]),
+            flags=np.concatenate([b.flags for b in batches]),
+        )
+
+    def select(self, mask: np.ndarray) -> "TickBatch":
+        if mask.all():
+            return self
+        return TickBatch(
+            instrument=self.instrument,
+            ts_ms=self.ts_ms[mask],
+            bid=self.bid[mask],
+            ask=self.ask[mask],
+            last=self.last[mask],
+            volume=self.volume[mask],
+            flags=self.flags[mask],
+        )
+
+    def before_ms(self, ts_ms: int) -> "TickBatch":
+        """Ticks with ts_ms < ts_ms."""
+        return self.select(self.ts_ms < ts_ms)
+
+    def since_ms(self, ts_ms: int) -> "TickBatch":
+        """Ticks with ts_ms >= ts_ms."""
+        return self.select(self.ts_ms >= ts_ms)
+
+    def after_ms(self, ts_ms: int) -> "TickBatch":
+        """Ticks with ts_ms > ts_ms."""
+        return self.select(self.ts_ms > ts_ms)
+
+    def after_watermark(self, ts_ms: int, seen_at_ms: int) -> "TickBatch":
+        """
+        Ticks after a (ts_ms, seen_at_ms) watermark: everything later than
+        ts_ms, plus the ticks AT ts_ms beyond the first `seen_at_ms` (MT5
+        returns same-millisecond ticks in a stable order).
+        """
+        mask = self.ts_ms > ts_ms
+        mask[np.flatnonzero(self.ts_ms == ts_ms)[seen_at_ms:]] = True
+        return self.select(mask)
+
+
+def batch_from_mt5_ticks(symbol: str, ticks, server_offset_seconds: int) -> TickBatch:
+    """
+    Convert an MT5 ticks structured array (copy_ticks_range) into a TickBatch.
+
+    time_msc encodes SERVER time as epoch milliseconds, so true UTC is
+    time_msc - offset. volume_real is preferred over the integer volume.
+    """
+    if ticks is None or len(ticks) == 0:
+        return TickBatch.empty(symbol)
+
+    field_names = ticks.dtype.names or ()
+
+    if "time_msc" in field_names:
+        ts_ms = ticks["time_msc"].astype(np.int64)
+    else:
+        ts_ms = ticks["time"].astype(np.int64) * 1000
+    ts_ms = ts_ms - np.int64(server_offset_seconds) * 1000
+
+    if "volume_real" in field_names:
+        volume = ticks["volume_real"].astype(np.float64)
+    elif "volume" in field_names:
+        volume = ticks["volume"].astype(np.float64)
+    else:
+        volume = np.zeros(len(ticks), dtype=np.float64)
+
+    batch = TickBatch(
+        instrument=symbol,
+        ts_ms=ts_ms,
+        bid=ticks["bid"].astype(np.float64),
+        ask=ticks["ask"].astype(np.float64),
+        last=ticks["last"].astype(np.float64) if "last" in field_names
+        else np.zeros(len(ticks), dtype=np.float64),
+        volume=volume,
+        flags=ticks["flags"].astype(np.int64) if "flags" in field_names
+        else np.zeros(len(ticks), dtype=np.int64),
+    )
+
+    if len(batch) > 1 and np.any(batch.ts_ms[1:] < batch.ts_ms[:-1]):
+        order = np.argsort(batch.ts_ms, kind="stable")
+        batch = TickBatch(
+            instrument=symbol,
+            ts_ms=batch.ts_ms[order],
+            bid=batch.bid[order],
+            ask=batch.ask[order],
+            last=batch.last[order],
+            volume=batch.volume[order],
+            flags=batch.flags[order],
+        )
+    return batch
+
+
+def ticks_to_m1_bars(ticks: TickBatch) -> CandleBatch:
+    """
+    Aggregate ticks into M1 bars with real BID and ASK OHLC.
+
+    Ticks without a two-sided quote (bid or ask <= 0) are ignored. Bars are
+    labelled by minute start; tick_count is the number of quotes in the
+    minute and volume the summed tick volume. Callers should pass only ticks
+    from closed minutes.
+    """
+    quoted = ticks.select((ticks.bid > 0) & (ticks.ask > 0))
+    if len(quoted) == 0:
+        return CandleBatch.empty(ticks.instrument)
+
+    minute = quoted.ts_ms // MS_PER_MINUTE
+    # Start index of each minute bucket (data is time-sorted)
+    starts = np.flatnonzero(np.r_[True, minute[1:] != minute[:-1]])
+    ends = np.r_[starts[1:], len(minute)] - 1
+
+    bid, ask = quoted.bid, quoted.ask
+    return CandleBatch(
+        instrument=ticks.instrument,
+        ts_ns=minute[starts] * MS_PER_MINUTE * NS_PER_MS,
+        bid_open=bid[starts],
+        bid_high=np.maximum.reduceat(bid, starts),
+        bid_low=np.minimum.reduceat(bid, starts),
+        bid_close=bid[ends],
+        ask_open=ask[starts],
+        ask_high=np.maximum.reduceat(ask, starts),
+        ask_low=np.minimum.reduceat(ask, starts),
+        ask_close=ask[ends],
+        volume=np.add.reduceat(quoted.volume, starts).astype(np.int64),
+        tick_count=np.diff(np.r_[starts, len(minute)]).astype(np.int64),
+    )
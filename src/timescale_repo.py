@@ -2,20 +2,42 @@
 
 from __future__ import annotations
 
+import io
+import json
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional, List
+from itertools import repeat
+from typing import Optional, List, Sequence, Tuple, Union
 
+import numpy as np
 import psycopg2
 import psycopg2.extras
 
-from .mt5_client import Candle
-from .config_loader import DatabaseConfig
+from .candles import Candle, CandleBatch, NS_PER_SECOND
+from .config_loader import DatabaseConfig, MaintenanceConfig
+from .gaps import GapRange
+from .ticks import TickBatch
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class CompressionStats:
+    table: str
+    total_chunks: int
+    compressed_chunks: int
+    before_bytes: int        # compressed chunks, before compression
+    after_bytes: int         # compressed chunks, after compression
+    total_bytes: int         # whole hypertable as stored now
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.after_bytes:
+            return None
+        return self.before_bytes / self.after_bytes
+
+
 @dataclass
 class TimescaleRepo:
     cfg: DatabaseConfig
@@ -52,8 +74,147 @@ class TimescaleRepo:
         finally:
             conn.close()
 
-    def insert_candles(self, candles: List[Candle], system_source: str, created_by: str, account_id: str):
-        if not candles:
+    def find_m1_gaps(
+        self,
+        instruments: List[str],
+        start_utc: datetime,
+        end_utc: datetime,
+        min_missing_minutes: int = 1,
+    ) -> List[GapRange]:
+        """
+        List raw holes in the live M1 table between consecutive rows of each
+        instrument, using lead() over "timestamp". A hole is reported as
+        [prev_ts + 1 min, next_ts). Weekend closure is NOT removed here; run
+        the result through gaps.exclude_market_closure().
+        """
+        query = f"""
+            SELECT instrument, gap_start, gap_end
+            FROM (
+                SELECT
+                    instrument,
+                    "timestamp" + interval '1 minute' AS gap_start,
+                    lead("timestamp") OVER (
+                        PARTITION BY instrument ORDER BY "timestamp"
+                    ) AS gap_end
+                FROM {self.cfg.schema}.{self.cfg.live_table}
+                WHERE instrument = ANY(%(instruments)s)
+                  AND "timestamp" >= %(start)s
+                  AND "timestamp" <  %(end)s
+            ) t
+            WHERE gap_end - gap_start >= %(min_missing)s * interval '1 minute'
+            ORDER BY instrument, gap_start;
+        """
+        params = {
+            "instruments": list(instruments),
+            "start": start_utc,
+            "end": end_utc,
+            "min_missing": min_missing_minutes,
+        }
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                return [
+                    GapRange(
+                        instrument=inst,
+                        start_utc=gap_start.astimezone(timezone.utc),
+                        end_utc=gap_end.astimezone(timezone.utc),
+                    )
+                    for inst, gap_start, gap_end in cur.fetchall()
+                ]
+        finally:
+            conn.close()
+
+    def load_historical_m1(
+        self,
+        instrument: str,
+        start_utc: datetime,
+        end_utc: datetime,
+    ) -> CandleBatch:
+        """
+        M1 bars [start_utc, end_utc) from the historical table as a
+        CandleBatch in time order (replay input). Prices are cast to float8
+        server-side; missing asks become NaN and tick_count is 0.
+        """
+        query = f"""
+            SELECT
+                (extract(epoch FROM "timestamp") * 1000000000)::bigint,
+                bid_open::float8, bid_high::float8, bid_low::float8, bid_close::float8,
+                ask_open::float8, ask_high::float8, ask_low::float8, ask_close::float8,
+                COALESCE(round(volume), 0)::bigint
+            FROM {self.cfg.schema}.{self.cfg.historical_table}
+            WHERE instrument = %s
+              AND "timestamp" >= %s
+              AND "timestamp" <  %s
+            ORDER BY "timestamp";
+        """
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query, (instrument, start_utc, end_utc))
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+
+        if not rows:
+            return CandleBatch.empty(instrument)
+
+        cols = list(zip(*rows))
+
+        def _f(i: int) -> np.ndarray:
+            return np.array(cols[i], dtype=np.float64)   # None -> NaN
+
+        ts_ns = np.array(cols[0], dtype=np.int64)
+        return CandleBatch(
+            instrument=instrument,
+            ts_ns=ts_ns,
+            bid_open=_f(1),
+            bid_high=_f(2),
+            bid_low=_f(3),
+            bid_close=_f(4),
+            ask_open=_f(5),
+            ask_high=_f(6),
+            ask_low=_f(7),
+            ask_close=_f(8),
+            volume=np.array(cols[9], dtype=np.int64),
+            tick_count=np.zeros(len(ts_ns), dtype=np.int64),
+        )
+
+    def insert_candles(
+        self,
+        candles: Union[CandleBatch, List[Candle]],
+        system_source: str,
+        created_by: str,
+        account_id: str,
+    ):
+        """
+        Bulk insert candles (a CandleBatch, or a list of Candle for one instrument).
+        """
+        if isinstance(candles, CandleBatch):
+            batch = candles
+        else:
+            if not candles:
+                return
+            batch = CandleBatch.from_candles(candles[0].instrument, candles)
+
+        self.insert_candle_batches([batch], system_source, created_by, account_id)
+
+    def insert_candle_batches(
+        self,
+        batches: Sequence[CandleBatch],
+        system_source: str,
+        created_by: str,
+        account_id: str,
+    ):
+        """
+        Insert several batches (any instruments) in ONE statement/transaction.
+
+        Rows are built column-wise from the batch arrays and sent with
+        execute_values; timestamps travel as epoch seconds and are converted
+        server-side with to_timestamp(), so no per-row datetime is allocated.
+        """
+        batches = [b for b in batches if len(b) > 0]
+        if not batches:
             return
 
         insert_sql = f"""
@@ -77,62 +238,25 @@ class TimescaleRepo:
                 received_at,
                 created_by
             )
-            VALUES (
-                %(instrument)s,
-                %(timestamp)s,
-                %(bid_open)s,
-                %(bid_high)s,
-                %(bid_low)s,
-                %(bid_close)s,
-                %(ask_open)s,
-                %(ask_high)s,
-                %(ask_low)s,
-                %(ask_close)s,
-                %(volume)s,
-                %(tick_count)s,
-                %(source)s,
-                %(account_id)s,
-                %(data_quality_score)s,
-                %(processing_latency_ms)s,
-                %(received_at)s,
-                %(created_by)s
-            )
+            VALUES %s
             ON CONFLICT (instrument, "timestamp") DO NOTHING;
         """
+        template = (
+            "(%s, to_timestamp(%s), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, "
+            "%s, %s, %s, %s, %s, %s)"
+        )
 
         now_utc = datetime.now(timezone.utc)
-        rows = []
-        for c in candles:
-            latency_ms = int((now_utc - c.timestamp_utc).total_seconds() * 1000)
-
-            rows.append(
-                {
-                    "instrument": c.instrument,
-                    "timestamp": c.timestamp_utc,
-                    "bid_open": c.bid_open,
-                    "bid_high": c.bid_high,
-                    "bid_low": c.bid_low,
-                    "bid_close": c.bid_close,
-                    "ask_open": c.ask_open,
-                    "ask_high": c.ask_high,
-                    "ask_low": c.ask_low,
-                    "ask_close": c.ask_close,
-                    "volume": c.volume,
-                    "tick_count": c.tick_count,
-                    "source": system_source,
-                    "account_id": account_id,
-                    "data_quality_score": self.cfg.default_data_quality_score,
-                    "processing_latency_ms": latency_ms,
-                    "received_at": now_utc,
-                    "created_by": created_by,
-                }
-            )
-
+        rows: List[tuple] = []
+        for batch in batches:
+            rows.extend(self._rows_from_batch(batch, now_utc, system_source, created_by, account_id))
 
         conn = self._connect()
         try:
             with conn.cursor() as cur:
-                psycopg2.extras.execute_batch(cur, insert_sql, rows, page_size=100)
+                psycopg2.extras.execute_values(
+                    cur, insert_sql, rows, template=template, page_size=1000
+                )
             conn.commit()
             logger.info("Inserted %d candles into %s", len(rows), self.cfg.live_table)
         except Exception as e:
@@ -141,3 +265,215 @@ class TimescaleRepo:
             raise
         finally:
             conn.close()
+
+    def _rows_from_batch(
+        self,
+        batch: CandleBatch,
+        now_utc: datetime,
+        system_source: str,
+        created_by: str,
+        account_id: str,
+    ) -> List[tuple]:
+        now_ns = int(now_utc.timestamp() * 1_000_000) * 1000
+        latency_ms = ((now_ns - batch.ts_ns) // 1_000_000).tolist()
+        ts_s = (batch.ts_ns / NS_PER_SECOND).tolist()
+
+        def _prices(arr: np.ndarray) -> list:
+            # NaN means "no price" (e.g. ask not modelled) -> SQL NULL
+            if np.isnan(arr).any():
+                return [None if np.isnan(v) else v for v in arr.tolist()]
+            return arr.tolist()
+
+        n = len(batch)
+        return list(
+            zip(
+                repeat(batch.instrument, n),
+                ts_s,
+                _prices(batch.bid_open),
+                _prices(batch.bid_high),
+                _prices(batch.bid_low),
+                _prices(batch.bid_close),
+                _prices(batch.ask_open),
+                _prices(batch.ask_high),
+                _prices(batch.ask_low),
+                _prices(batch.ask_close),
+                batch.volume.tolist(),
+                batch.tick_count.tolist(),
+                repeat(system_source, n),
+                repeat(account_id, n),
+                repeat(self.cfg.default_data_quality_score, n),
+                latency_ms,
+                repeat(now_utc, n),
+                repeat(created_by, n),
+            )
+        )
+
+    # ------------------------------------------------------------------ #
+    # Ticks                                                              #
+    # ------------------------------------------------------------------ #
+    def get_last_tick_watermark(self, instrument: str) -> Optional[Tuple[int, int]]:
+        """
+        Latest stored tick time for `instrument` as epoch milliseconds (UTC),
+        with the number of ticks stored at that millisecond.
+        """
+        query = f"""
+            SELECT (extract(epoch FROM "timestamp") * 1000)::bigint, count(*)
+            FROM {self.cfg.schema}.{self.cfg.tick_table}
+            WHERE instrument = %s
+              AND "timestamp" = (
+                  SELECT max("timestamp")
+                  FROM {self.cfg.schema}.{self.cfg.tick_table}
+                  WHERE instrument = %s
+              )
+            GROUP BY 1;
+        """
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query, (instrument, instrument))
+                row = cur.fetchone()
+                return (int(row[0]), int(row[1])) if row else None
+        finally:
+            conn.close()
+
+    def insert_ticks(self, ticks: TickBatch, account_id: str) -> None:
+        """
+        Bulk load ticks with COPY (CSV built column-wise from the batch).
+        There is no conflict handling: callers only pass ticks after their
+        (millisecond, count) watermark.
+        """
+        if len(ticks) == 0:
+            return
+
+        ts_txt = np.datetime_as_string(ticks.ts_ms.astype("datetime64[ms]"), unit="ms")
+        lines = [
+            f"{ticks.instrument},{ts}+00,{bid!r},{ask!r},{last!r},{vol!r},{flags},{account_id}"
+            for ts, bid, ask, last, vol, flags in zip(
+                ts_txt.tolist(),
+                ticks.bid.tolist(),
+                ticks.ask.tolist(),
+                ticks.last.tolist(),
+                ticks.volume.tolist(),
+                ticks.flags.tolist(),
+            )
+        ]
+        buf = io.StringIO("\n".join(lines) + "\n")
+
+        copy_sql = f"""
+            COPY {self.cfg.schema}.{self.cfg.tick_table}
+                (instrument, "timestamp", bid, ask, last, volume, flags, account_id)
+            FROM STDIN WITH (FORMAT csv)
+        """
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.copy_expert(copy_sql, buf)
+            conn.commit()
+            logger.info("Inserted %d ticks into %s", len(lines), self.cfg.tick_table)
+        except Exception as e:
+            conn.rollback()
+            logger.exception("Failed to insert ticks: %s", e)
+            raise
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------ #
+    # Storage maintenance (sql/003_m1_compression_retention.sql)         #
+    # ------------------------------------------------------------------ #
+    def compression_stats(self, table: str) -> CompressionStats:
+        query = """
+            SELECT
+                s.total_chunks,
+                s.number_compressed_chunks,
+                s.before_compression_total_bytes,
+                s.after_compression_total_bytes,
+                hypertable_size(%(table)s::regclass)
+            FROM hypertable_compression_stats(%(table)s::regclass) s;
+        """
+        qualified = f"{self.cfg.schema}.{table}"
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query, {"table": qualified})
+                row = cur.fetchone() or (0, 0, 0, 0, 0)
+        finally:
+            conn.close()
+        total, compressed, before, after, size = (int(v or 0) for v in row)
+        return CompressionStats(table, total, compressed, before, after, size)
+
+    def apply_storage_policies(self, cfg: MaintenanceConfig) -> None:
+        """
+        (Re)install the compression policies and the live retention job
+        with the ages from settings.yaml, in one transaction.
+        """
+        live = f"{self.cfg.schema}.{self.cfg.live_table}"
+        hist = f"{self.cfg.schema}.{self.cfg.historical_table}"
+        retention_config = json.dumps(
+            {
+                "live_table": live,
+                "historical_table": hist,
+                "retain_after": cfg.live_retention_after,
+            }
+        )
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                for table, age in ((live, cfg.live_compress_after), (hist, cfg.historical_compress_after)):
+                    cur.execute(
+                        "SELECT remove_compression_policy(%s::regclass, if_exists => TRUE);",
+                        (table,),
+                    )
+                    cur.execute(
+                        "SELECT add_compression_policy(%s::regclass, %s::interval);",
+                        (table, age),
+                    )
+                cur.execute(
+                    "SELECT job_id FROM timescaledb_information.jobs WHERE proc_name = 'prune_live_m1';"
+                )
+                row = cur.fetchone()
+                if row is None:
+                    cur.execute(
+                        "SELECT add_job('prune_live_m1', %s::interval, config => %s::jsonb);",
+                        (cfg.retention_schedule_interval, retention_config),
+                    )
+                else:
+                    cur.execute(
+                        "SELECT alter_job(%s, schedule_interval => %s::interval, config => %s::jsonb);",
+                        (row[0], cfg.retention_schedule_interval, retention_config),
+                    )
+            conn.commit()
+            logger.info(
+                "Storage policies applied: compress live after %s, historical after %s; "
+                "live retention after %s",
+                cfg.live_compress_after,
+                cfg.historical_compress_after,
+                cfg.live_retention_after,
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def prune_live_m1(self, retain_after: str) -> None:
+        """
+        Run the live retention procedure now (normally a scheduled job).
+        """
+        config = json.dumps(
+            {
+                "live_table": f"{self.cfg.schema}.{self.cfg.live_table}",
+                "historical_table": f"{self.cfg.schema}.{self.cfg.historical_table}",
+                "retain_after": retain_after,
+            }
+        )
+        conn = self._connect()
+        try:
+            conn.autocommit = True   # CALL of a procedure that drops chunks
+            with conn.cursor() as cur:
+                # Coverage check scans whole chunks
+                cur.execute("SET statement_timeout = 0;")
+                cur.execute("CALL prune_live_m1(NULL, %s::jsonb);", (config,))
+                for notice in conn.notices:
+                    logger.info(notice.strip())
+        finally:
+            conn.close()
@@ -0,0 +1,34 @@
+# tests/helpers.py
+#
+# Builders shared by several test modules.
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+RATES_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("tick_volume", "<u8"),
+    ("spread", "<i4"),
+    ("real_volume", "<u8"),
+])
+
+
+def make_rates(n: int = 5) -> np.ndarray:
+    """
+    MT5 copy_rates_* style array: n M1 bars from 2025-01-01 12:00 server
+    time (10:00 UTC for a UTC+2 broker).
+    """
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    start = int(datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc).timestamp())
+    rates["time"] = start + 60 * np.arange(n)
+    rates["open"] = 100 + np.arange(n)
+    rates["high"] = rates["open"] + 1
+    rates["low"] = rates["open"] - 1
+    rates["close"] = rates["open"] + 0.5
+    rates["tick_volume"] = 10 + np.arange(n)
+    return rates
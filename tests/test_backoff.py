@@ -0,0 +1,21 @@
+# tests/test_backoff.py
+
+import random
+
+from src.backoff import Backoff
+
+
+def test_backoff_doubles_and_caps_without_jitter():
+    backoff = Backoff(base_seconds=1, max_seconds=5, jitter=0)
+    assert [backoff.next_delay() for _ in range(5)] == [1, 2, 4, 5, 5]
+    assert backoff.failures == 5
+
+    backoff.reset()
+    assert backoff.next_delay() == 1
+
+
+def test_jitter_stays_within_bounds():
+    backoff = Backoff(base_seconds=10, max_seconds=10, jitter=0.5, rng=random.Random(7))
+    delays = [backoff.next_delay() for _ in range(200)]
+    assert all(5 <= d <= 10 for d in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,63 @@
+# tests/test_candle_batch.py
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.candles import CandleBatch, batch_from_mt5_rates
+from tests.helpers import make_rates
+
+
+def test_batch_from_rates_shifts_server_offset():
+    rates = make_rates()
+    batch = batch_from_mt5_rates("EURUSD", rates, server_offset_seconds=2 * 3600)
+
+    assert len(batch) == 5
+    candles = batch.to_candles()
+    assert candles[0].timestamp_utc == datetime(2025, 1, 1, 10, 0, tzinfo=timezone.utc)
+    assert candles[-1].timestamp_utc == datetime(2025, 1, 1, 10, 4, tzinfo=timezone.utc)
+
+    # real_volume is present (zeros) and wins over tick_volume, as before
+    assert batch.volume.tolist() == [0, 0, 0, 0, 0]
+    assert batch.tick_count.tolist() == [10, 11, 12, 13, 14]
+    # ASK mirrors BID
+    assert np.array_equal(batch.ask_close, batch.bid_close)
+
+
+def test_batch_from_rates_sorts_out_of_order_rows():
+    rates = make_rates()[::-1].copy()
+    batch = batch_from_mt5_rates("EURUSD", rates, server_offset_seconds=0)
+
+    assert np.all(np.diff(batch.ts_ns) > 0)
+    assert batch.bid_open.tolist() == [100, 101, 102, 103, 104]
+
+
+def test_from_candles_roundtrip():
+    batch = batch_from_mt5_rates("EURUSD", make_rates(), server_offset_seconds=0)
+    again = CandleBatch.from_candles("EURUSD", batch.to_candles())
+
+    assert np.array_equal(again.ts_ns, batch.ts_ns)
+    assert np.array_equal(again.bid_high, batch.bid_high)
+    assert np.array_equal(again.tick_count, batch.tick_count)
+
+
+def test_empty_rates():
+    assert len(batch_from_mt5_rates("EURUSD", None, 0)) == 0
+
+
+def test_timestamp_filters_are_vectorized_masks():
+    batch = batch_from_mt5_rates("EURUSD", make_rates(), server_offset_seconds=0)
+    t2 = datetime(2025, 1, 1, 12, 2, tzinfo=timezone.utc)
+
+    assert len(batch.before(t2)) == 2
+    assert len(batch.after(t2)) == 2
+    assert len(batch.since(t2)) == 3
+    assert len(batch.between(t2, datetime(2025, 1, 1, 12, 4, tzinfo=timezone.utc))) == 2
+    assert batch.after(t2).bid_open.tolist() == [103, 104]
+    assert batch.last_timestamp_utc == datetime(2025, 1, 1, 12, 4, tzinfo=timezone.utc)
+    assert batch.after(batch.last_timestamp_utc).last_timestamp_utc is None
+
+
+def test_candle_is_slotted():
+    candle = batch_from_mt5_rates("EURUSD", make_rates(1), 0).to_candles()[0]
+    assert not hasattr(candle, "__dict__")
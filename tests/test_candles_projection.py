@@ -0,0 +1,33 @@
+# tests/test_candles_projection.py
+
+from datetime import datetime, timezone
+
+import pytest
+
+from pa_engine.db import candles
+from pa_engine.db.candles import HLC_COLUMNS, OHLCV_COLUMNS, load_m1_candles
+
+
+def test_projection_selects_only_requested_columns():
+    select_list = candles._select_list(HLC_COLUMNS)
+    sql = candles._unified_sql("market_data_m1_unified", select_list)
+
+    assert "bid_high::float8 AS high" in sql
+    assert "bid_close::float8 AS close" in sql
+    assert "bid_open" not in sql
+    assert "data_source" not in sql
+
+    # Duplicates are selected once
+    assert candles._select_list(("close", "close")) == "bid_close::float8 AS close"
+    assert candles._select_list(OHLCV_COLUMNS).count(" AS ") == 5
+
+
+@pytest.mark.parametrize("columns", [(), [], ("high", "bid")])
+def test_empty_or_unknown_projection_rejected_before_querying(monkeypatch, columns):
+    def no_engine():
+        raise AssertionError("the database must not be queried")
+
+    monkeypatch.setattr(candles, "get_sqlalchemy_engine", no_engine)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with pytest.raises(ValueError):
+        load_m1_candles("USDJPY", start, start, columns=columns)
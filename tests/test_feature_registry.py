@@ -0,0 +1,84 @@
+# tests/test_feature_registry.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pa_engine.pa.context import PA_FEATURES, build_pa_context_from_m1, build_pa_contexts_from_m1
+from pa_engine.pa import feature_registry
+from pa_engine.pa.feature_registry import FeatureSpec, ensure_features, resolve_feature
+from pa_engine.pa.features import FeatureConfig, add_core_features
+
+
+def _bars(n: int = 500, freq: str = "5min") -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    close = 150.0 + np.cumsum(rng.normal(0, 0.02, n))
+    index = pd.date_range("2025-11-17", periods=n, freq=freq, name="ts_utc")
+    return pd.DataFrame(
+        {"open": close, "high": close + 0.01, "low": close - 0.01, "close": close, "norm_volume": 1.0},
+        index=index,
+    )
+
+
+def test_only_requested_columns_are_computed():
+    df = _bars()
+    full = add_core_features(df, FeatureConfig(atr_period=14, ema_periods=(20, 50), donchian_periods=(20,)))
+
+    out = ensure_features(df, ["ema_50", "atr_14", "donchian_high_20", "session", "ema_50"])
+
+    assert list(out.columns) == list(df.columns) + ["ema_50", "atr_14", "donchian_high_20", "session"]
+    for name in ("ema_50", "atr_14", "donchian_high_20"):
+        np.testing.assert_allclose(out[name].to_numpy(), full[name].to_numpy(), rtol=1e-12)
+    assert (out["session"] == full["session"]).all()
+    assert "ema_50" not in df.columns
+
+
+def test_present_columns_are_reused_and_unknown_names_rejected():
+    df = ensure_features(_bars(), ["atr_14"])
+
+    assert ensure_features(df, ["atr_14"]) is df
+    with pytest.raises(KeyError):
+        resolve_feature("vwap")
+    with pytest.raises(KeyError):
+        ensure_features(df, ["ema_fast"])
+
+
+def test_columns_memoized_per_frame(monkeypatch):
+    calls = []
+    ema = feature_registry._REGISTRY["ema"]
+
+    def counting(df, span):
+        calls.append(span)
+        return ema.fn(df, span)
+
+    monkeypatch.setitem(feature_registry._REGISTRY, "ema", FeatureSpec("ema", counting))
+    df = _bars()
+
+    # Two modules handed the same original frame
+    first = ensure_features(df, ["ema_50"])
+    second = ensure_features(df, ["ema_50", "atr_14"])
+    assert calls == [50]
+    np.testing.assert_array_equal(first["ema_50"].to_numpy(), second["ema_50"].to_numpy())
+
+    # A new frame (or a new index) computes again
+    ensure_features(df.copy(), ["ema_50"])
+    assert calls == [50, 50]
+    key = id(df)
+    assert key in feature_registry._MEMO
+    del first, second, df
+    assert key not in feature_registry._MEMO
+
+
+def test_context_builders_default_to_full_core_set():
+    df_m1 = _bars(600, freq="1min")
+    full = set(add_core_features(df_m1, FeatureConfig()).columns)
+
+    ctx = build_pa_context_from_m1("USDJPY", df_m1, tfs=("M1", "M5"))
+    batched = build_pa_contexts_from_m1({"USDJPY": df_m1}, tfs=("M1", "M5"))["USDJPY"]
+    for c in (ctx, batched):
+        for tf in ("M1", "M5"):
+            assert full <= set(c.tf_contexts[tf].df.columns)
+
+    # Opt-in: only what the PA steps read
+    narrow = build_pa_context_from_m1("USDJPY", df_m1, tfs=("M1",), pa_features_only=True)
+    assert set(narrow.tf_contexts["M1"].df.columns) == set(df_m1.columns) | set(PA_FEATURES)
@@ -0,0 +1,44 @@
+# tests/test_gaps.py
+
+from datetime import datetime, timezone
+
+from src.gaps import GapRange, exclude_market_closure, trading_subranges
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_gap_inside_weekend_is_dropped():
+    # Fri 2025-11-14 21:30 -> Sun 2025-11-16 22:00
+    gap = GapRange("EURUSD", _utc(2025, 11, 14, 21, 30), _utc(2025, 11, 16, 22, 0))
+    assert exclude_market_closure([gap]) == []
+
+
+def test_gap_spanning_weekend_keeps_trading_parts():
+    # Fri 18:00 -> Mon 01:00
+    gap = GapRange("EURUSD", _utc(2025, 11, 14, 18, 0), _utc(2025, 11, 17, 1, 0))
+    pieces = exclude_market_closure([gap])
+
+    assert [(p.start_utc, p.end_utc) for p in pieces] == [
+        (_utc(2025, 11, 14, 18, 0), _utc(2025, 11, 14, 21, 0)),
+        (_utc(2025, 11, 16, 23, 0), _utc(2025, 11, 17, 1, 0)),
+    ]
+    assert pieces[0].missing_minutes == 180
+
+
+def test_always_open_instrument_keeps_weekend():
+    gap = GapRange("BTCUSD", _utc(2025, 11, 15, 10, 0), _utc(2025, 11, 15, 10, 5))
+    pieces = exclude_market_closure([gap], always_open_instruments=["BTCUSD"])
+    assert len(pieces) == 1
+    assert pieces[0].missing_minutes == 5
+
+
+def test_trading_subranges_midweek_untouched():
+    start, end = _utc(2025, 11, 12, 3, 0), _utc(2025, 11, 12, 4, 0)
+    assert trading_subranges(start, end) == [(start, end)]
+
+
+def test_min_missing_minutes_filter():
+    gap = GapRange("EURUSD", _utc(2025, 11, 12, 3, 0), _utc(2025, 11, 12, 3, 2))
+    assert exclude_market_closure([gap], min_missing_minutes=3) == []
@@ -0,0 +1,102 @@
+# tests/test_incremental_resampler.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pa_engine.db.resampler import IncrementalResampler, parse_tf, resample_tf
+
+
+def _m1_with_gaps(n: int = 12000, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2025-11-17 21:37", periods=n, freq="1min", name="ts_utc")
+    index = index[rng.random(n) > 0.2]
+    close = 150.0 + np.cumsum(rng.normal(0, 0.02, len(index)))
+    return pd.DataFrame(
+        {
+            "open": close + rng.normal(0, 0.005, len(index)),
+            "high": close + 0.01,
+            "low": close - 0.01,
+            "close": close,
+            "norm_volume": rng.integers(1, 50, len(index)).astype(float),
+        },
+        index=index,
+    )
+
+
+@pytest.mark.parametrize("tf", ["M5", "M15", "H1", "M7", "H4", "D1", "W1"])
+def test_incremental_frames_identical_to_batch(tf):
+    df = _m1_with_gaps()
+    res = IncrementalResampler(tf)
+
+    # Overlapping chunks, as consecutive polls would deliver them
+    for end in range(0, len(df) + 250, 250):
+        res.update_frame(df.iloc[max(end - 400, 0):end])
+        seen = df.iloc[:end]
+        if seen.empty:
+            continue
+        expected = resample_tf(seen, tf)
+        pd.testing.assert_frame_equal(res.frame(), expected)
+        pd.testing.assert_frame_equal(res.frame(include_partial=False), expected.iloc[:-1])
+
+
+def test_closed_bar_reported_and_history_bounded():
+    res = IncrementalResampler("M5", max_bars=2)
+    t0 = pd.Timestamp("2025-11-17 10:00").value
+    minute = pd.Timedelta(minutes=1).value
+
+    closed = [res.update(t0 + i * minute, 1.0, 2.0, 0.5, 1.5, 1.0) for i in range(21)]
+
+    assert closed.count(True) == 4 and closed[5] and closed[20]
+    assert res.update(t0, 9.0, 9.0, 9.0, 9.0, 9.0) is False        # already seen
+    frame = res.frame()
+    assert list(frame.index) == [
+        pd.Timestamp("2025-11-17 10:10"), pd.Timestamp("2025-11-17 10:15"), pd.Timestamp("2025-11-17 10:20"),
+    ]
+    assert frame["norm_volume"].tolist() == [5.0, 5.0, 1.0]
+
+
+def test_fx_day_and_week_anchoring():
+    df = _m1_with_gaps()     # 2025-11-17 21:37 (Monday) onwards
+
+    h4 = resample_tf(df, "H4")
+    d1 = resample_tf(df, "D1")
+    w1 = resample_tf(df, "W1")
+    m7 = resample_tf(df, "M7")
+
+    assert list(h4.index[:3]) == [
+        pd.Timestamp("2025-11-17 18:00"), pd.Timestamp("2025-11-17 22:00"), pd.Timestamp("2025-11-18 02:00"),
+    ]
+    assert (d1.index.hour == 22).all()
+    day = df.loc["2025-11-18 22:00":"2025-11-19 21:59"]
+    assert d1.loc["2025-11-18 22:00", "high"] == day["high"].max()
+    assert d1.loc["2025-11-18 22:00", "norm_volume"] == day["norm_volume"].sum()
+    assert list(w1.index) == [pd.Timestamp("2025-11-16 22:00"), pd.Timestamp("2025-11-23 22:00")]
+    # Widths that do not divide a day restart at each FX day open: the
+    # last M7 bar of a day (21:55) is 5 minutes long
+    assert pd.Timestamp("2025-11-18 21:55") in m7.index
+    assert pd.Timestamp("2025-11-18 22:00") in m7.index
+
+    for bad in ("M0", "H25", "D2", "W2", "X1", "h1"):
+        with pytest.raises(ValueError):
+            parse_tf(bad)
+
+
+def test_fx_day_follows_new_york_across_dst_change():
+    index = pd.date_range("2025-10-30", "2025-11-06", freq="1min", name="ts_utc")
+    df = pd.DataFrame(
+        {"open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "norm_volume": 1.0}, index=index
+    )
+
+    d1 = resample_tf(df, "D1")
+    w1 = resample_tf(df, "W1")
+
+    # 17:00 New York: 21:00 UTC until the Sunday 2025-11-02 change, then
+    # 22:00 UTC; that FX day is 25 hours long
+    assert d1.loc["2025-11-01 21:00", "norm_volume"] == 1500
+    assert pd.Timestamp("2025-11-02 22:00") in d1.index
+    assert list(w1.index) == [pd.Timestamp("2025-10-26 21:00"), pd.Timestamp("2025-11-02 22:00")]
+    for tf in ("D1", "W1", "H4"):
+        res = IncrementalResampler(tf)
+        res.update_frame(df)
+        pd.testing.assert_frame_equal(res.frame(), resample_tf(df, tf))
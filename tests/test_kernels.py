@@ -0,0 +1,109 @@
+# tests/test_kernels.py
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pa_engine.pa.features import (
+    FeatureConfig,
+    StreamingCoreFeatures,
+    _compute_atr,
+    add_core_features,
+    add_core_features_batch,
+)
+from pa_engine.pa import kernels
+from pa_engine.pa.kernels import BATCH_ROW_LOOP_BARS, compute_core_features
+
+
+def _random_bars(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 150.0 + np.cumsum(rng.normal(0, 0.02, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.uniform(0, 0.01, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 0.01, n)
+    index = pd.date_range("2025-11-17", periods=n, freq="1min", name="ts_utc")
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "norm_volume": 1.0},
+        index=index,
+    )
+
+
+def test_kernel_matches_pandas_reference():
+    df = _random_bars(5000)
+    cfg = FeatureConfig(atr_period=14, ema_periods=(2, 20, 50, 200), donchian_periods=(1, 20, 50))
+
+    names, block = compute_core_features(
+        df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy(),
+        cfg.atr_period, cfg.ema_periods, cfg.donchian_periods,
+    )
+    got = dict(zip(names, block))
+
+    np.testing.assert_allclose(got["atr_14"], _compute_atr(df, 14).to_numpy(), rtol=1e-9)
+    for n in cfg.ema_periods:
+        expected = df["close"].ewm(span=n, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(got[f"ema_{n}"], expected, rtol=1e-12)
+    for n in cfg.donchian_periods:
+        np.testing.assert_array_equal(
+            got[f"donchian_high_{n}"], df["high"].rolling(n, min_periods=1).max().to_numpy()
+        )
+        np.testing.assert_array_equal(
+            got[f"donchian_low_{n}"], df["low"].rolling(n, min_periods=1).min().to_numpy()
+        )
+
+
+def test_short_frames_and_caller_frame_untouched():
+    df = _random_bars(10)
+    before = df.copy()
+
+    out = add_core_features(df, FeatureConfig(atr_period=14, ema_periods=(20,), donchian_periods=(50,)))
+
+    pd.testing.assert_frame_equal(df, before)
+    assert out["atr_14"].isna().all()
+    assert out["donchian_high_50"].iloc[-1] == df["high"].max()
+    assert out["ema_20"].iloc[0] == df["close"].iloc[0]
+
+
+def test_streaming_state_matches_batch_and_survives_checkpoint():
+    df = _random_bars(600)
+    cfg = FeatureConfig(atr_period=14, ema_periods=(2, 20, 50), donchian_periods=(1, 20, 50))
+    expected = add_core_features(df, cfg)
+
+    state = StreamingCoreFeatures(cfg)
+    first = state.update_frame(df.iloc[:250])
+    # JSON round trip mid-stream, then an overlapping poll
+    state = StreamingCoreFeatures.from_dict(json.loads(json.dumps(state.to_dict())))
+    rest = state.update_frame(df.iloc[200:])
+
+    assert len(rest) == 350
+    got = pd.concat([first, rest])
+    for name in got.columns:
+        np.testing.assert_allclose(got[name].to_numpy(), expected[name].to_numpy(), rtol=1e-9)
+    assert state.update(df.index[-1], 1.0, 1.0, 1.0) is None
+
+
+@pytest.mark.parametrize("row_loop_bars", [BATCH_ROW_LOOP_BARS, 0])
+def test_batch_matches_per_instrument_with_missing_minutes(monkeypatch, row_loop_bars):
+    monkeypatch.setattr(kernels, "BATCH_ROW_LOOP_BARS", row_loop_bars)
+    cfg = FeatureConfig(atr_period=14, ema_periods=(20, 50), donchian_periods=(20,))
+    full = _random_bars(800)
+    frames = {
+        "USDJPY": full,
+        "EURUSD": _random_bars(800, seed=8).iloc[::3],          # sparse
+        "GBPUSD": _random_bars(800, seed=9).iloc[100:700].drop(full.index[300:420], errors="ignore"),
+        "XAUUSD": full.iloc[:0],
+    }
+
+    out = add_core_features_batch(frames, cfg)
+
+    assert list(out) == list(frames)
+    assert out["XAUUSD"].empty
+    for inst, df in frames.items():
+        if df.empty:
+            continue
+        expected = add_core_features(df, cfg)
+        assert out[inst].index.equals(df.index)
+        for name in ("atr_14", "ema_20", "ema_50", "donchian_high_20", "donchian_low_20"):
+            np.testing.assert_allclose(out[inst][name].to_numpy(), expected[name].to_numpy(), rtol=1e-12)
+        assert (out[inst]["session"] == expected["session"]).all()
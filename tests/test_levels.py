@@ -0,0 +1,161 @@
+# tests/test_levels.py
+
+import numpy as np
+import pandas as pd
+
+from pa_engine.db.resampler import resample_tf
+from pa_engine.pa.features import compute_daily_levels, compute_session_levels
+from pa_engine.pa.levels import LevelsEngine, daily_levels_table, session_levels_table
+
+
+def _m1(start: str, end: str, seed: int = 5) -> pd.DataFrame:
+    index = pd.date_range(start, end, freq="1min", inclusive="left", name="ts_utc")
+    rng = np.random.default_rng(seed)
+    close = 150.0 + np.cumsum(rng.normal(0, 0.02, len(index)))
+    return pd.DataFrame(
+        {"open": close, "high": close + 0.01, "low": close - 0.01, "close": close, "norm_volume": 1.0},
+        index=index,
+    )
+
+
+def test_daily_table_uses_22utc_boundary():
+    df = _m1("2025-11-17 22:00", "2025-11-20 03:00")
+
+    days = daily_levels_table(df)
+
+    assert list(days.index) == [
+        pd.Timestamp("2025-11-17 22:00"),
+        pd.Timestamp("2025-11-18 22:00"),
+        pd.Timestamp("2025-11-19 22:00"),
+    ]
+    assert list(days["bars"]) == [1440, 1440, 300]
+    day = df.loc["2025-11-18 22:00":"2025-11-19 21:59"]
+    row = days.loc[pd.Timestamp("2025-11-18 22:00")]
+    assert row["date"] == pd.Timestamp("2025-11-19")
+    assert (row["open"], row["close"]) == (day["open"].iloc[0], day["close"].iloc[-1])
+    assert (row["high"], row["low"]) == (day["high"].max(), day["low"].min())
+
+    levels = compute_daily_levels(df)
+    assert levels["prev_day"]["date"] == "2025-11-19"
+    assert levels["prev_day"]["high"] == row["high"]
+    assert levels["current_day"] == {
+        "date": "2025-11-20", "open": days["open"].iloc[-1], "incomplete_day": True,
+    }
+
+
+def test_fx_day_rolls_with_asia_at_17_new_york_in_summer():
+    df = _m1("2025-07-08 20:00", "2025-07-09 02:00")
+
+    days = daily_levels_table(df)
+    sessions = session_levels_table(df)
+
+    # EDT: the FX day and ASIA both open at 21:00 UTC
+    assert list(days.index) == [pd.Timestamp("2025-07-07 21:00"), pd.Timestamp("2025-07-08 21:00")]
+    assert list(days["bars"]) == [60, 300]
+    asia = sessions[sessions["session"] == "ASIA"].iloc[-1]
+    assert asia["open_utc"] == asia["fx_day_start_utc"] == pd.Timestamp("2025-07-08 21:00")
+
+    # Every session row lies in one FX day; per day they add up to the daily row
+    per_day = sessions.groupby("fx_day_start_utc").agg(
+        high=("high", "max"), low=("low", "min"), bars=("bars", "sum")
+    )
+    pd.testing.assert_frame_equal(per_day, days[["high", "low", "bars"]], check_names=False)
+
+    d1 = resample_tf(df, "D1")
+    assert list(d1.index) == list(days.index)
+    assert list(resample_tf(df, "H4").index) == [
+        pd.Timestamp("2025-07-08 17:00"), pd.Timestamp("2025-07-08 21:00"), pd.Timestamp("2025-07-09 01:00"),
+    ]
+
+    levels = compute_daily_levels(df)
+    assert levels["prev_day"]["high"] == days["high"].iloc[0]
+    assert levels["current_day"]["incomplete_day"]
+
+
+def test_session_table_one_row_per_occurrence():
+    df = _m1("2025-07-01 00:00", "2025-07-02 00:00")
+
+    table = session_levels_table(df)
+
+    # Summer: LONDON opens 07:00 UTC, NY session ends at 21:00 UTC
+    assert list(table["session"].astype(str)) == ["ASIA", "LONDON", "NY_OVERLAP", "NY", "ASIA"]
+    london = table.iloc[1]
+    assert (london["open_utc"], london["close_utc"]) == (
+        pd.Timestamp("2025-07-01 07:00"), pd.Timestamp("2025-07-01 12:00")
+    )
+    assert london["high"] == df.loc["2025-07-01 07:00":"2025-07-01 11:59", "high"].max()
+    assert table["bars"].sum() == len(df)
+
+    # Both ASIA pieces of the UTC day feed the same ASIA entry
+    asia = table[table["session"] == "ASIA"]
+    levels = compute_session_levels(df)
+    assert levels["date"] == "2025-07-01"
+    assert levels["sessions"]["ASIA"] == {"high": asia["high"].max(), "low": asia["low"].min()}
+
+
+def test_engine_folds_new_bars_into_seeded_days():
+    df = _m1("2025-10-20 00:00", "2025-11-05 10:00")
+    seed_end = pd.Timestamp("2025-10-28 09:13")
+    engine = LevelsEngine()
+    engine.seed("USDJPY", daily_levels_table(df[df.index < seed_end]).drop(columns="date"))
+
+    # Overlapping 24h windows, as the live loop would load them
+    ends = list(pd.date_range("2025-10-28 10:00", "2025-11-05 09:00", freq="7h"))
+    for end in ends + [pd.Timestamp("2025-11-05 10:00")]:
+        engine.update("USDJPY", df[(df.index >= end - pd.Timedelta(hours=24)) & (df.index < end)])
+
+    pd.testing.assert_frame_equal(engine.days("USDJPY"), daily_levels_table(df), check_like=True)
+
+    levels = engine.reference_levels("USDJPY", df.tail(1440))
+    week = df.loc["2025-11-02 22:00":]                 # FX week of Monday 2025-11-03
+    assert levels["week"] == {
+        "start": "2025-11-03", "open": week["open"].iloc[0],
+        "high": week["high"].max(), "low": week["low"].min(), "days": 3,
+    }
+    assert levels["prev_week"]["close"] == df.loc[:"2025-11-02 21:59", "close"].iloc[-1]
+    october = df.loc["2025-09-30 22:00":"2025-10-31 21:59"]
+    assert levels["prev_month"]["high"] == october["high"].max()
+    # 2025-11-05 is EST (UTC-5): midnight 05:00 UTC, NY open 13:30 UTC (previous day)
+    assert levels["midnight_open"] == {
+        "ts": "2025-11-05T05:00:00", "price": df.loc["2025-11-05 05:00", "open"],
+    }
+    assert levels["ny_open"]["ts"] == "2025-11-04T13:30:00"
+    assert levels["session_opens"]["ASIA"]["session_open_utc"] == "2025-11-04T22:00:00"
+
+
+def test_engine_refresh_fills_holes_and_picks_up_late_writes():
+    full = _m1("2025-10-01 00:00", "2025-11-05 10:00")
+    late = (full.index >= "2025-11-03 10:00") & (full.index < "2025-11-03 12:00")
+    db = full[~late]                                   # two hours not written yet
+
+    def load_days(start, end):
+        start, end = start.tz_localize(None), end.tz_localize(None)
+        return daily_levels_table(db[(db.index >= start) & (db.index < end)]).drop(columns="date")
+
+    engine = LevelsEngine(reseed_minutes=60)
+
+    def cycle(end: str):
+        end = pd.Timestamp(end)
+        start = end - pd.Timedelta(hours=24)
+        engine.refresh("USDJPY", start.tz_localize("UTC"), end.tz_localize("UTC"), load_days)
+        engine.update("USDJPY", db[(db.index >= start) & (db.index < end)])
+
+    cycle("2025-11-03 20:00")
+    cycle("2025-11-03 20:30")
+    expected = daily_levels_table(db[db.index < "2025-11-03 20:30"]).iloc[-engine.days_kept:]
+    pd.testing.assert_frame_equal(engine.days("USDJPY"), expected, check_like=True)
+
+    # Loop paused for more than the window: the missing day is reloaded
+    cycle("2025-11-05 10:00")
+    pd.testing.assert_frame_equal(
+        engine.days("USDJPY"), daily_levels_table(db).iloc[-engine.days_kept:], check_like=True
+    )
+
+    # Gap repair writes the missing hours; the periodic reload picks them up
+    db = full
+    cycle("2025-11-05 10:00")
+    assert engine.days("USDJPY").loc["2025-11-02 22:00", "bars"] < 1440
+    cycle("2025-11-05 11:00")
+    pd.testing.assert_frame_equal(
+        engine.days("USDJPY"), daily_levels_table(full).iloc[-engine.days_kept:], check_like=True
+    )
@@ -0,0 +1,45 @@
+# tests/test_liquidity.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pa_engine.pa.liquidity import LiquidityType, detect_asia_range_liquidity
+
+
+def _m1(start: str, end: str) -> pd.DataFrame:
+    index = pd.date_range(start, end, freq="1min", inclusive="left", name="ts_utc")
+    close = 150.0 + np.sin(np.arange(len(index)) / 50.0)
+    return pd.DataFrame(
+        {"open": close, "high": close + 0.01, "low": close - 0.01, "close": close},
+        index=index,
+    )
+
+
+def test_asia_range_spans_both_utc_dates_all_year():
+    # Summer: ASIA 21:00 -> 07:00 UTC; winter: 22:00 -> 08:00 UTC
+    for start, asia_open, end in (
+        ("2025-07-01 12:00", "2025-07-01 21:00", "2025-07-02 03:00"),
+        ("2025-01-14 12:00", "2025-01-14 22:00", "2025-01-15 03:00"),
+    ):
+        df = _m1(start, end)
+        spike = pd.Timestamp(asia_open) + pd.Timedelta(minutes=30)  # before midnight UTC
+        df.loc[spike, "high"] = 160.0
+        df.loc[spike - pd.Timedelta(minutes=40), "low"] = 140.0     # NY, not ASIA
+
+        high, low = detect_asia_range_liquidity(df)
+
+        asia = df.loc[asia_open:]
+        assert (high.type, high.price, high.ts) == (LiquidityType.ASIA_HIGH, 160.0, spike)
+        assert (low.type, low.price) == (LiquidityType.ASIA_LOW, asia["low"].min())
+        assert low.ts >= pd.Timestamp(asia_open)
+
+
+def test_session_col_still_accepted_but_deprecated():
+    df = _m1("2025-01-14 12:00", "2025-01-15 03:00")
+    expected = detect_asia_range_liquidity(df)
+
+    with pytest.warns(DeprecationWarning):
+        assert detect_asia_range_liquidity(df, "session") == expected
+    with pytest.warns(DeprecationWarning):
+        assert detect_asia_range_liquidity(df, session_col="session", asia_label="ASIA") == expected
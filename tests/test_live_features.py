@@ -0,0 +1,78 @@
+# tests/test_live_features.py
+
+import numpy as np
+import pandas as pd
+
+from pa_engine.db.resampler import resample_tf
+from pa_engine.pa.features import FeatureConfig, add_core_features
+from pa_engine.pa.live_features import LiveFeatureCache
+
+CFG = FeatureConfig(atr_period=14, ema_periods=(20,), donchian_periods=(20,))
+WINDOW = 300
+
+
+def _random_bars(n: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 150.0 + np.cumsum(rng.normal(0, 0.02, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.uniform(0, 0.01, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 0.01, n)
+    index = pd.date_range("2025-11-17 20:00", periods=n, freq="1min", name="ts_utc")
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "norm_volume": 1.0},
+        index=index,
+    )
+
+
+def test_rolling_window_feeds_only_new_bars():
+    df = _random_bars(WINDOW + 40)
+    cache = LiveFeatureCache()
+
+    first = cache.frames("USDJPY", df.iloc[:WINDOW], ("M1",), CFG)["M1"]
+    pd.testing.assert_frame_equal(first, add_core_features(df.iloc[:WINDOW], CFG))
+
+    for end in range(WINDOW + 5, len(df) + 1, 5):
+        window = df.iloc[end - WINDOW:end]
+        got = cache.frames("USDJPY", window, ("M1",), CFG)["M1"]
+
+    # ATR / Donchian only look back `period` bars: past the first 20 bars
+    # (already warm here) same as recomputing the window; the EMA still
+    # carries the history since the first window
+    expected = add_core_features(window, CFG)
+    since_first = add_core_features(df, CFG).iloc[-WINDOW:]
+    assert got.index.equals(window.index)
+    for name in ("atr_14", "donchian_high_20", "donchian_low_20"):
+        np.testing.assert_allclose(got[name].to_numpy()[20:], expected[name].to_numpy()[20:], rtol=1e-9)
+    np.testing.assert_allclose(got["ema_20"].to_numpy(), since_first["ema_20"].to_numpy(), rtol=1e-9)
+    assert (got["session"] == expected["session"]).all()
+
+
+def test_window_not_extending_seen_bars_rebuilds_state():
+    df = _random_bars(WINDOW + 10)
+    holed = df.drop(df.index[100])
+    cache = LiveFeatureCache()
+
+    cache.frames("USDJPY", holed.iloc[:WINDOW], ("M1",), CFG)
+    # Gap repair wrote the missing bar: the window is recomputed as a whole
+    window = df.iloc[10:WINDOW + 10]
+    got = cache.frames("USDJPY", window, ("M1",), CFG)["M1"]
+    pd.testing.assert_frame_equal(got, add_core_features(window, CFG))
+
+
+def test_htf_bars_resampled_incrementally_with_forming_bar():
+    df = _random_bars(WINDOW + 47)
+    cache = LiveFeatureCache()
+
+    first = cache.frames("USDJPY", df.iloc[:WINDOW], ("M5", "H1"), CFG)
+    for tf in ("M5", "H1"):
+        pd.testing.assert_frame_equal(first[tf], add_core_features(resample_tf(df.iloc[:WINDOW], tf), CFG))
+
+    for end in range(WINDOW + 1, len(df) + 1, 7):
+        got = cache.frames("USDJPY", df.iloc[end - WINDOW:end], ("M5", "H1"), CFG)
+        # Same bars and values as recomputing every bar seen since the
+        # first window, the forming bar included
+        for tf in ("M5", "H1"):
+            expected = add_core_features(resample_tf(df.iloc[:end], tf), CFG)
+            pd.testing.assert_frame_equal(got[tf], expected.loc[got[tf].index], check_freq=False)
+            # Bars opening before the window's first bucket are dropped
+            assert got[tf].index[0] == resample_tf(df.iloc[end - WINDOW:end], tf).index[0]
@@ -0,0 +1,53 @@
+# tests/test_metrics.py
+
+import urllib.request
+
+from src.metrics import Histogram, Metrics, MetricsServer
+
+
+def test_histogram_buckets_and_quantile():
+    hist = Histogram(buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 5.0):
+        hist.observe(v)
+
+    assert hist.counts == [1, 2, 1]
+    assert hist.count == 4
+    assert hist.quantile(0.5) == 1.0
+    assert hist.quantile(1.0) == 5.0
+
+
+def test_prometheus_text_is_cumulative_and_labelled():
+    m = Metrics(prefix="t")
+    m.describe("stage_seconds", "stage time", buckets=(0.1, 1.0))
+    m.observe("stage_seconds", 0.05, stage="mt5_fetch", instrument="EURUSD")
+    m.observe("stage_seconds", 0.5, stage="mt5_fetch", instrument="EURUSD")
+    m.inc("rows_inserted_total", 3, instrument="EURUSD")
+
+    text = m.render_prometheus()
+    assert "# TYPE t_stage_seconds histogram" in text
+    assert 't_stage_seconds_bucket{instrument="EURUSD",stage="mt5_fetch",le="0.1"} 1' in text
+    assert 't_stage_seconds_bucket{instrument="EURUSD",stage="mt5_fetch",le="+Inf"} 2' in text
+    assert 't_stage_seconds_count{instrument="EURUSD",stage="mt5_fetch"} 2' in text
+    assert 't_rows_inserted_total{instrument="EURUSD"} 3.0' in text
+
+
+def test_summary_merges_instruments_per_stage():
+    m = Metrics()
+    m.observe("stage_seconds", 0.002, stage="convert", instrument="EURUSD")
+    m.observe("stage_seconds", 0.004, stage="convert", instrument="GBPUSD")
+
+    lines = m.summary_lines()
+    assert lines[0].startswith("stage_seconds[convert]: n=2 mean=3.0ms")
+
+
+def test_http_endpoint_serves_metrics():
+    m = Metrics(prefix="t")
+    m.inc("poll_cycles_total")
+    server = MetricsServer(m, port=0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as resp:
+            body = resp.read().decode()
+    finally:
+        server.stop()
+    assert "t_poll_cycles_total 1.0" in body
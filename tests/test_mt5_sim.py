@@ -0,0 +1,87 @@
+# tests/test_mt5_sim.py
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from src.mt5_client import MT5BrokerConfig, MT5Client
+from src.mt5_sim import CsvSource, RandomWalkSource, SimClock, SimulatedMT5
+from src.ticks import ticks_to_m1_bars
+
+# Wednesday 2025-11-19 12:00:30 UTC (forming minute 12:00)
+NOW = datetime(2025, 11, 19, 12, 0, 30, tzinfo=timezone.utc)
+
+
+def _client(now: datetime = NOW, seed: int = 42) -> MT5Client:
+    source = RandomWalkSource(anchor_utc=now - timedelta(days=7), seed=seed, always_open=["BTCUSD"])
+    sim = SimulatedMT5(source, SimClock(now, speedup=0), server_offset_hours=2)
+    client = MT5Client(MT5BrokerConfig(0, "", "sim", utc_offset_hours=2), api=sim)
+    client.connect()
+    return client
+
+
+def test_recent_bars_end_at_forming_minute_in_true_utc():
+    batch = _client().copy_rates_recent_batch("EURUSD", "M1", 10)
+
+    assert len(batch) == 10
+    assert batch.last_timestamp_utc == datetime(2025, 11, 19, 12, 0, tzinfo=timezone.utc)
+    assert np.all(np.diff(batch.ts_ns) == 60 * 10**9)
+
+
+def test_same_seed_is_deterministic():
+    a = _client().copy_rates_recent_batch("XAUUSD", "M1", 100)
+    b = _client().copy_rates_recent_batch("XAUUSD", "M1", 100)
+    c = _client(seed=7).copy_rates_recent_batch("XAUUSD", "M1", 100)
+
+    assert np.array_equal(a.bid_close, b.bid_close)
+    assert not np.array_equal(a.bid_close, c.bid_close)
+
+
+def test_weekend_closed_except_always_open():
+    client = _client()
+    sat = datetime(2025, 11, 15, tzinfo=timezone.utc)
+
+    assert len(client.copy_rates_range_batch("EURUSD", "M1", sat, sat + timedelta(hours=6))) == 0
+    assert len(client.copy_rates_range_batch("BTCUSD", "M1", sat, sat + timedelta(hours=6))) == 360
+
+
+def test_paged_range_matches_single_range_and_h1_aggregation():
+    client = _client()
+    start, end = datetime(2025, 11, 18, tzinfo=timezone.utc), datetime(2025, 11, 19, tzinfo=timezone.utc)
+
+    whole = client.copy_rates_range_batch("GBPUSD", "M1", start, end)
+    pages = list(client.iter_rates_range("GBPUSD", "M1", start, end, page_bars=100))
+    assert len(whole) == 1440
+    assert np.array_equal(np.concatenate([p.ts_ns for p in pages]), whole.ts_ns)
+
+    h1 = client.copy_rates_range_batch("GBPUSD", "H1", start, end)
+    assert len(h1) == 24
+    assert h1.bid_high[0] == whole.bid_high[:60].max()
+    assert h1.bid_close[0] == whole.bid_close[59]
+
+
+def test_ticks_rebuild_the_bars():
+    client = _client()
+    start = datetime(2025, 11, 19, 10, 0, tzinfo=timezone.utc)
+    end = start + timedelta(minutes=30)
+
+    bars = ticks_to_m1_bars(client.copy_ticks_range_batch("USDJPY", start, end))
+    rates = client.copy_rates_range_batch("USDJPY", "M1", start, end)
+
+    assert np.array_equal(bars.ts_ns, rates.ts_ns)
+    assert np.allclose(bars.bid_high, rates.bid_high)
+    assert np.allclose(bars.bid_close, rates.bid_close)
+    assert np.all(bars.ask_close > bars.bid_close)
+
+
+def test_csv_source_replays_export():
+    source = CsvSource("market_data_m1_*.csv")
+    now = datetime(2025, 11, 19, 0, 0, 30, tzinfo=timezone.utc)
+    sim = SimulatedMT5(source, SimClock(now, speedup=0), server_offset_hours=0)
+    client = MT5Client(MT5BrokerConfig(0, "", "sim", utc_offset_hours=0), api=sim)
+    client.connect()
+
+    batch = client.copy_rates_recent_batch("USDJPY", "M1", 100)
+    assert len(batch) == 10
+    # 05:29 +0530 in the export == 23:59 UTC
+    assert batch.last_timestamp_utc == datetime(2025, 11, 18, 23, 59, tzinfo=timezone.utc)
@@ -0,0 +1,55 @@
+# tests/test_pipeline.py
+
+import queue
+
+import pytest
+
+from src.candles import batch_from_mt5_rates
+from src.pipeline import CandleWriter
+from tests.helpers import make_rates
+
+
+def _batch(symbol: str, n: int = 5):
+    return batch_from_mt5_rates(symbol, make_rates(n), server_offset_seconds=0)
+
+
+def test_writer_coalesces_across_instruments_up_to_flush_batch_size():
+    calls = []
+    writer = CandleWriter(write=calls.append, flush_batch_size=10)
+    for sym in ("EURUSD", "GBPUSD", "USDJPY"):
+        writer.submit(_batch(sym))
+
+    assert writer.flush_once(timeout=0) == 10
+    assert [b.instrument for b in calls[0]] == ["EURUSD", "GBPUSD"]
+    assert writer.flush_once(timeout=0) == 5
+    assert writer.flush_once(timeout=0) == 0
+    assert len(calls) == 2
+
+
+def test_full_queue_applies_backpressure():
+    writer = CandleWriter(write=lambda batches: None, queue_max_batches=2)
+    writer.submit(_batch("EURUSD"))
+    writer.submit(_batch("GBPUSD"))
+
+    with pytest.raises(queue.Full):
+        writer.submit(_batch("USDJPY"), timeout=0.01)
+
+    writer.flush_once(timeout=0)
+    writer.submit(_batch("USDJPY"), timeout=0.01)
+
+
+def test_failed_write_is_retried_with_same_rows():
+    attempts = []
+
+    def flaky(batches):
+        attempts.append(sum(len(b) for b in batches))
+        if len(attempts) < 3:
+            raise RuntimeError("db down")
+
+    writer = CandleWriter(write=flaky, flush_interval_seconds=0.001)
+    writer.submit(_batch("EURUSD"))
+    writer.start()
+    writer.join_queue()
+    writer.stop()
+
+    assert attempts == [5, 5, 5]
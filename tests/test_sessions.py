@@ -0,0 +1,65 @@
+# tests/test_sessions.py
+
+import numpy as np
+import pandas as pd
+
+from pa_engine.pa.config import SESSION_BY_HOUR, SESSION_LABELS, session_for_hour
+from pa_engine.pa.features import infer_session, session_labels
+from pa_engine.pa.sessions import SessionCalendar, utc_ns
+
+
+def test_hour_lookup_resolves_overlaps_by_priority():
+    assert len(SESSION_BY_HOUR) == 24
+    assert session_for_hour(23) == "ASIA"      # wraps past midnight
+    assert session_for_hour(7) == "ASIA"
+    assert session_for_hour(8) == "LONDON"
+    assert session_for_hour(14) == "NY_OVERLAP"
+    assert session_for_hour(21) == "NY"
+
+
+def test_vectorized_labels_match_per_row_inference():
+    index = pd.date_range("2025-11-17", periods=3 * 1440, freq="1min", name="ts_utc")
+
+    labels = session_labels(index)
+
+    assert isinstance(labels.dtype, pd.CategoricalDtype)
+    assert list(labels.astype(str)) == [infer_session(ts) for ts in index]
+
+
+def test_calendar_follows_london_and_new_york_dst():
+    cal = SessionCalendar()
+
+    # Winter: same hours as the fixed-UTC table
+    assert cal.label(pd.Timestamp("2025-12-01 08:00")) == "LONDON"
+    assert cal.label(pd.Timestamp("2025-12-01 13:00")) == "NY_OVERLAP"
+    assert cal.label(pd.Timestamp("2025-12-01 21:59")) == "NY"
+    # Summer (BST / EDT): everything an hour earlier
+    assert cal.label(pd.Timestamp("2025-07-01 07:00")) == "LONDON"
+    assert cal.label(pd.Timestamp("2025-07-01 12:00")) == "NY_OVERLAP"
+    assert cal.label(pd.Timestamp("2025-07-01 21:00")) == "ASIA"
+    # US already on EDT, UK still on GMT (2025-03-10)
+    windows = cal.windows(pd.Timestamp("2025-03-10"), pd.Timestamp("2025-03-11"))
+    london = windows[windows["session"] == "LONDON"].iloc[0]
+    assert (london["open_utc"], london["close_utc"]) == (
+        pd.Timestamp("2025-03-10 08:00"),
+        pd.Timestamp("2025-03-10 12:00"),
+    )
+
+
+def test_calendar_extends_and_accepts_tz_aware_index():
+    cal = SessionCalendar(first_year=2024, last_year=2024)
+    index = pd.DatetimeIndex(["1999-07-01 12:30", "2031-01-06 14:00"]).tz_localize("UTC")
+
+    assert list(cal.labels(index).astype(str)) == ["NY_OVERLAP", "NY_OVERLAP"]
+    assert cal.first_year == 1999 and cal.last_year == 2031
+
+
+def test_lookup_positions_match_the_arrays_returned_with_them():
+    cal = SessionCalendar(first_year=2024, last_year=2024)
+    ts = utc_ns(pd.DatetimeIndex(["2025-07-01 12:30", "1999-07-01 12:30"]))
+
+    pos, open_ns, codes = cal.lookup(ts)   # rebuilds to cover 1999
+
+    assert open_ns is cal.open_ns and codes is cal.codes
+    assert [SESSION_LABELS[c] for c in codes[pos]] == ["NY_OVERLAP", "NY_OVERLAP"]
+    assert np.all(open_ns[pos] <= ts) and np.all(ts < open_ns[pos + 1])
@@ -0,0 +1,101 @@
+# tests/test_spool.py
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.candles import batch_from_mt5_rates
+from src.spool import SPOOL_RECORD_DTYPE, CandleSpool, SpoolFlusher
+from tests.helpers import make_rates
+
+
+def _batch(symbol: str = "EURUSD", n: int = 5):
+    return batch_from_mt5_rates(symbol, make_rates(n), server_offset_seconds=0)
+
+
+def test_append_read_commit_roundtrip(tmp_path):
+    spool = CandleSpool(tmp_path, segment_max_records=100)
+    spool.append([_batch("EURUSD"), _batch("GBPUSD", 3)])
+
+    batches, pos = spool.read_pending(max_records=100)
+    assert [(b.instrument, len(b)) for b in batches] == [("EURUSD", 5), ("GBPUSD", 3)]
+    assert np.array_equal(batches[0].bid_close, _batch().bid_close)
+
+    spool.commit(pos)
+    assert spool.pending_records() == 0
+    assert spool.read_pending(max_records=100)[0] == []
+
+
+def test_segments_roll_over_and_are_deleted_once_drained(tmp_path):
+    spool = CandleSpool(tmp_path, segment_max_records=4)
+    spool.append([_batch(n=10)])
+    assert len(list(tmp_path.glob("segment-*.spool"))) == 3
+
+    batches, pos = spool.read_pending(max_records=6)
+    assert sum(len(b) for b in batches) == 6
+    spool.commit(pos)
+    assert spool.pending_records() == 4
+    assert len(list(tmp_path.glob("segment-*.spool"))) == 2
+
+
+def test_checkpoint_survives_restart(tmp_path):
+    spool = CandleSpool(tmp_path)
+    spool.append([_batch()])
+    _, pos = spool.read_pending(max_records=2)
+    spool.commit(pos)
+
+    reopened = CandleSpool(tmp_path)
+    assert reopened.pending_records() == 3
+    assert reopened.last_timestamps() == {
+        "EURUSD": datetime(2025, 1, 1, 12, 4, tzinfo=timezone.utc)
+    }
+
+
+def test_last_timestamps_scans_backlog_once_then_tracks_appends(tmp_path, monkeypatch):
+    spool = CandleSpool(tmp_path, segment_max_records=4)
+    spool.append([_batch("EURUSD", 6), _batch("GBPUSD", 2)])
+
+    reopened = CandleSpool(tmp_path, segment_max_records=4)
+    scans = []
+    scan = reopened._scan_tail
+    monkeypatch.setattr(reopened, "_scan_tail", lambda: scans.append(1) or scan())
+    assert reopened.last_timestamps() == {
+        "EURUSD": datetime(2025, 1, 1, 12, 5, tzinfo=timezone.utc),
+        "GBPUSD": datetime(2025, 1, 1, 12, 1, tzinfo=timezone.utc),
+    }
+    reopened.append([_batch("GBPUSD", 4)])
+    assert reopened.last_timestamps()["GBPUSD"] == datetime(2025, 1, 1, 12, 3, tzinfo=timezone.utc)
+    assert scans == [1]
+
+
+def test_torn_tail_is_ignored_and_truncated(tmp_path):
+    spool = CandleSpool(tmp_path)
+    spool.append([_batch(n=2)])
+    segment = next(tmp_path.glob("segment-*.spool"))
+    with open(segment, "ab") as f:
+        f.write(b"\x00" * (SPOOL_RECORD_DTYPE.itemsize // 2))
+
+    assert spool.pending_records() == 2
+    spool.append([_batch(n=1)])
+    assert segment.stat().st_size == 3 * SPOOL_RECORD_DTYPE.itemsize
+
+
+def test_flusher_commits_only_after_successful_write(tmp_path):
+    spool = CandleSpool(tmp_path)
+    spool.append([_batch()])
+    written = []
+
+    def failing(batches):
+        raise RuntimeError("db down")
+
+    flusher = SpoolFlusher(spool, write=failing)
+    try:
+        flusher.flush_once()
+    except RuntimeError:
+        pass
+    assert spool.pending_records() == 5
+
+    flusher.write = written.extend
+    assert flusher.flush_once() == 5
+    assert spool.pending_records() == 0
+    assert len(written) == 1
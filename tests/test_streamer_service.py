@@ -0,0 +1,146 @@
+# tests/test_streamer_service.py
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from src.clock import ReplayClock
+from src.gaps import GapRange
+from src.mt5_client import MT5Error
+from src.streamer_service import StreamerService
+from src.ticks import TickBatch
+
+T0_MS = 1_735_725_600_000  # 2025-01-01 10:00:00 UTC
+
+
+class _EmptyRepo:
+    """
+    Stands in for TimescaleRepo: an empty live table.
+    """
+
+    def get_last_timestamp_utc(self, instrument):
+        return None
+
+
+def _service() -> StreamerService:
+    written = []
+    service = StreamerService("sim_streaming_job", db_write=written.extend, use_spool=False)
+    service.db = _EmptyRepo()
+    service.mt5_client.connect()
+    return service
+
+
+def test_mt5_none_backs_off_instruments_and_requests_reconnect():
+    service = _service()
+    inst = service.instruments[0]
+    assert len(service.mt5_client.copy_rates_recent_batch(inst, "M1", 10)) == 10
+
+    service.simulator.shutdown()  # terminal drops: every call returns None
+    with pytest.raises(MT5Error) as exc_info:
+        service.mt5_client.copy_rates_recent_batch(inst, "M1", 10)
+    assert exc_info.value.code == -10004
+
+    with pytest.raises(ConnectionError):
+        service._poll_once()
+    assert set(service._inst_retry_at) == set(service.instruments)
+    assert service.metrics.total("errors_total") == len(service.instruments)
+
+
+class _Stop(BaseException):
+    pass
+
+
+class _RecordingClock(ReplayClock):
+    """
+    ReplayClock that records the sleeps and ends run_forever after `limit`.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__()
+        self.slept = []
+        self.limit = limit
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        super().sleep(seconds)
+        if len(self.slept) >= self.limit:
+            raise _Stop
+
+
+def test_instrument_retry_follows_the_injected_clock():
+    service = _service()
+    service.clock = ReplayClock()
+    inst = service.instruments[0]
+
+    service._instrument_failed(inst, MT5Error("copy_rates_from_pos", inst, (-10004, "No IPC")))
+    delay = service._inst_retry_at[inst] - service.clock.monotonic()
+    service.clock.sleep(delay - 0.5)
+    assert not service._instrument_ready(inst)
+    service.clock.sleep(1.0)
+    assert service._instrument_ready(inst)
+
+
+def test_reconnect_backoff_sleeps_on_the_injected_clock():
+    service = _service()
+    service.clock = _RecordingClock(limit=2)
+
+    def refuse():
+        raise MT5Error("initialize", "", (-10004, "No IPC"))
+
+    service.mt5_client.connect = refuse
+    with pytest.raises(_Stop):
+        service.run_forever()
+    assert len(service.clock.slept) == 2
+    assert service.clock.slept[1] >= service.clock.slept[0] > 0
+
+
+def test_gap_marked_unfillable_only_when_mt5_answered_without_bars():
+    service = StreamerService("sim_streaming_job", db_write=[].extend, use_spool=False)
+    service.db = _EmptyRepo()
+    now = service._now_utc().replace(second=0, microsecond=0)
+    before_history = GapRange("BTCUSD", now - timedelta(days=10), now - timedelta(days=10, minutes=-30))
+    fillable = GapRange("BTCUSD", now - timedelta(hours=2), now - timedelta(hours=1, minutes=30))
+    service.scan_gaps = lambda: [before_history, fillable]
+
+    # Disconnected: nothing is attempted or marked
+    assert service.repair_gaps() == 0
+    assert service._unfillable_gaps == {}
+
+    # Calls fail mid-pass: nothing marked either
+    service.mt5_client.is_connected = lambda: True
+    assert service.repair_gaps() == 0
+    assert service._unfillable_gaps == {}
+
+    service.mt5_client.connect()
+    assert service.repair_gaps() == 30
+    assert list(service._unfillable_gaps) == [("BTCUSD", before_history.start_utc, before_history.end_utc)]
+
+    # Marks expire after unfillable_retry_hours
+    later = service._now_utc() + timedelta(hours=service.gap_repair_cfg.unfillable_retry_hours)
+    service._expire_unfillable_gaps(later)
+    assert service._unfillable_gaps == {}
+
+
+def test_tick_poll_stores_same_ms_ticks_arriving_in_a_later_poll():
+    service = StreamerService("sim_streaming_job", db_write=[].extend, use_spool=False)
+    stored = []
+    service.db.insert_ticks = lambda ticks, account_id: stored.append(ticks.bid.tolist())
+    service._tick_watermark["XAUUSD"] = (T0_MS - 1, 1)
+
+    polls = [
+        [0, 5, 5],            # burst at +5ms is still arriving
+        [0, 5, 5, 5, 5, 7],
+        [0, 5, 5, 5, 5, 7],   # nothing new
+    ]
+    for offsets in polls:
+        n = len(offsets)
+        bid = np.arange(n, dtype=np.float64)
+        page = TickBatch(
+            "XAUUSD", T0_MS + np.array(offsets), bid, bid + 0.1, np.zeros(n), np.ones(n), np.full(n, 6)
+        )
+        service.mt5_client.iter_ticks_range = lambda *a, **k: iter([page])
+        service._poll_ticks_instrument("XAUUSD", service._now_utc(), T0_MS)
+
+    assert stored == [[0, 1, 2], [3, 4, 5]]
+    assert service._tick_watermark["XAUUSD"] == (T0_MS + 7, 1)
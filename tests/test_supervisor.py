@@ -0,0 +1,113 @@
+# tests/test_supervisor.py
+
+import queue
+import threading
+
+import pytest
+
+from src.candles import batch_from_mt5_rates
+from src.config_loader import list_job_names, load_settings
+from src.pipeline import CandleWriter
+from src.supervisor import (
+    JobCandles,
+    JobForwarder,
+    WorkerHandle,
+    ack_committed,
+    resolve_jobs,
+    write_job_candles,
+)
+from tests.helpers import make_rates
+
+
+class _RecordingRepo:
+    def __init__(self):
+        self.calls = []
+
+    def insert_candle_batches(self, batches, system_source, created_by, account_id):
+        self.calls.append((account_id, [b.instrument for b in batches]))
+
+
+def _item(job: str, account_id: str, symbol: str) -> JobCandles:
+    batch = batch_from_mt5_rates(symbol, make_rates(3), server_offset_seconds=0)
+    return JobCandles(job, account_id, "src", "me", batch)
+
+
+def test_shared_writer_groups_jobs_by_account():
+    repo = _RecordingRepo()
+    write_job_candles(repo, [
+        _item("fn", "fn-acct", "EURUSD"),
+        _item("ict", "ict-acct", "EURUSD"),
+        _item("fn", "fn-acct", "GBPUSD"),
+    ])
+    assert repo.calls == [
+        ("fn-acct", ["EURUSD", "GBPUSD"]),
+        ("ict-acct", ["EURUSD"]),
+    ]
+
+
+def test_candle_writer_coalesces_job_candles_by_rows():
+    repo = _RecordingRepo()
+    writer = CandleWriter(write=lambda items: write_job_candles(repo, items), flush_batch_size=6)
+    for job, sym in (("fn", "EURUSD"), ("ict", "XAUUSD"), ("fn", "GBPUSD")):
+        writer.submit(_item(job, f"{job}-acct", sym))
+
+    assert writer.flush_once(timeout=0) == 6
+    assert writer.flush_once(timeout=0) == 3
+    assert len(repo.calls) == 3
+
+
+def test_forwarder_returns_only_after_shared_writer_commits():
+    repo = _RecordingRepo()
+    inbox, ack = queue.Queue(), queue.Queue()
+    writer = CandleWriter(
+        write=lambda items: (write_job_candles(repo, items), ack_committed(items, {"fn": ack})),
+        flush_batch_size=1,
+        inbox=inbox,
+    )
+    forward = JobForwarder("fn", inbox, ack, ("fn-acct", "src", "me"), ack_timeout_seconds=5)
+    batches = [_item("fn", "fn-acct", sym).batch for sym in ("EURUSD", "GBPUSD")]
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (forward(batches), done.set()), daemon=True).start()
+    assert not done.wait(0.2)           # handed off, not committed yet
+    writer.flush_once(timeout=1)
+    assert not done.wait(0.2)
+    writer.flush_once(timeout=1)
+    assert done.wait(2)
+    assert repo.calls == [("fn-acct", ["EURUSD"]), ("fn-acct", ["GBPUSD"])]
+
+
+def test_forwarder_times_out_without_commit():
+    forward = JobForwarder("fn", queue.Queue(), queue.Queue(), ("fn-acct", "src", "me"), ack_timeout_seconds=0.05)
+    with pytest.raises(TimeoutError):
+        forward([_item("fn", "fn-acct", "EURUSD").batch])
+
+
+def test_worker_stuck_in_poll_is_stale_despite_heartbeats():
+    handle = WorkerHandle("job")
+    handle.reset_health(0.0)
+    # Startup / backfill: heartbeats alone keep the worker alive
+    handle.record_health({"job": "job", "last_poll_utc": None, "errors": 0}, 250.0)
+    assert handle.stale_reason(400.0, 300) is None
+
+    polled = {"job": "job", "last_poll_utc": "2025-01-01T10:00:00+00:00", "errors": 0}
+    handle.record_health(polled, 450.0)
+    for now in range(480, 780, 30):
+        handle.record_health(dict(polled), float(now))
+        assert handle.stale_reason(float(now), 300) is None
+    # Heartbeats keep coming but the poll loop has not moved
+    handle.record_health(dict(polled), 780.0)
+    assert "no poll" in handle.stale_reason(780.0, 300)
+
+    # A retry error counts as progress; silence is stale on its own
+    handle.record_health({**polled, "errors": 1}, 780.0)
+    assert handle.stale_reason(800.0, 300) is None
+    assert "no heartbeat" in handle.stale_reason(1100.0, 300)
+
+
+def test_supervised_jobs_come_from_listed_job_names():
+    names = list_job_names()
+    assert "sim_streaming_job" in names
+    settings = load_settings(names[0])
+    assert list(settings.streaming_jobs) == names
+    assert set(resolve_jobs(settings)) <= set(names)
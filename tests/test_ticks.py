@@ -0,0 +1,65 @@
+# tests/test_ticks.py
+
+import numpy as np
+
+from src.ticks import TickBatch, batch_from_mt5_ticks, ticks_to_m1_bars
+
+TICKS_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("last", "<f8"),
+    ("volume", "<u8"),
+    ("time_msc", "<i8"),
+    ("flags", "<u4"),
+    ("volume_real", "<f8"),
+])
+
+T0_MS = 1_735_725_600_000  # 2025-01-01 10:00:00 UTC
+
+
+def _make_ticks(offsets_ms, bids, spread=0.0002, server_offset_s=0) -> np.ndarray:
+    ticks = np.zeros(len(offsets_ms), dtype=TICKS_DTYPE)
+    ticks["time_msc"] = T0_MS + np.asarray(offsets_ms) + server_offset_s * 1000
+    ticks["time"] = ticks["time_msc"] // 1000
+    ticks["bid"] = bids
+    ticks["ask"] = np.asarray(bids) + spread
+    ticks["flags"] = 6
+    return ticks
+
+
+def test_batch_from_ticks_removes_server_offset():
+    ticks = _make_ticks([0, 500], [1.1, 1.2], server_offset_s=7200)
+    batch = batch_from_mt5_ticks("EURUSD", ticks, server_offset_seconds=7200)
+    assert batch.ts_ms.tolist() == [T0_MS, T0_MS + 500]
+
+
+def test_ticks_to_m1_bars_bid_and_ask():
+    # minute 0: 3 ticks, minute 1: 2 ticks, one one-sided quote ignored
+    offsets = [1_000, 20_000, 59_999, 60_000, 61_000, 62_000]
+    bids = [1.10, 1.15, 1.12, 1.13, 1.09, 1.50]
+    ticks = _make_ticks(offsets, bids)
+    ticks["ask"][-1] = 0.0
+
+    bars = ticks_to_m1_bars(batch_from_mt5_ticks("EURUSD", ticks, 0))
+
+    assert len(bars) == 2
+    assert bars.ts_ns.tolist() == [T0_MS * 1_000_000, (T0_MS + 60_000) * 1_000_000]
+    assert bars.bid_open.tolist() == [1.10, 1.13]
+    assert bars.bid_high.tolist() == [1.15, 1.13]
+    assert bars.bid_low.tolist() == [1.10, 1.09]
+    assert bars.bid_close.tolist() == [1.12, 1.09]
+    assert np.allclose(bars.ask_close - bars.bid_close, 0.0002)
+    assert bars.tick_count.tolist() == [3, 2]
+
+
+def test_ticks_to_m1_bars_empty():
+    assert len(ticks_to_m1_bars(TickBatch.empty("EURUSD"))) == 0
+
+
+def test_after_watermark_keeps_unseen_ticks_in_the_same_ms():
+    batch = batch_from_mt5_ticks("XAUUSD", _make_ticks([0, 5, 5, 5, 9], [1, 2, 3, 4, 5]), 0)
+
+    fresh = batch.after_watermark(T0_MS + 5, seen_at_ms=2)
+    assert fresh.bid.tolist() == [4, 5]
+    assert len(batch.after_watermark(T0_MS + 5, seen_at_ms=0)) == 4